@@ -0,0 +1,104 @@
+"""
+Benchmark del índice IVF contra la búsqueda exacta (recall@k y latencia)
+
+Uso:
+    python benchmark_ann.py                         # datos sintéticos (100k × 384)
+    python benchmark_ann.py --n 20000 --dim 384
+    python benchmark_ann.py --from-index ann.npz    # vectores de un índice ya construido
+
+Sirve para elegir nlist / nprobe (KB_ANN_NPROBE) antes de activarlo en producción.
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from services.ann_index import IVFIndex
+
+
+def synthetic_embeddings(n: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    """Vectores normalizados agrupados en clusters, parecidos a embeddings de texto."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, n)
+    vectors = centers[labels] + 0.35 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_top_k(matrix: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    scores = matrix @ query
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def percentile_ms(samples, q: float) -> float:
+    return float(np.percentile(samples, q) * 1000)
+
+
+def run_benchmark(vectors: np.ndarray, nlists, nprobes, k: int, n_queries: int, seed: int) -> None:
+    rng = np.random.default_rng(seed + 1)
+    queries = vectors[rng.choice(len(vectors), n_queries, replace=False)]
+    # Perturbar las consultas para que no coincidan exactamente con un documento
+    queries = queries + 0.05 * rng.standard_normal(queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    print(f"\n📊 {len(vectors)} vectores × {vectors.shape[1]} dims, {n_queries} consultas, k={k}")
+
+    exact_times, truth = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        truth.append(set(exact_top_k(vectors, q, k).tolist()))
+        exact_times.append(time.perf_counter() - t0)
+    print(f"  exacta         p50={percentile_ms(exact_times, 50):7.3f} ms  "
+          f"p95={percentile_ms(exact_times, 95):7.3f} ms  recall=1.000")
+
+    for nlist in nlists:
+        index = IVFIndex(vectors.shape[1], nlist=nlist, seed=seed)
+        t0 = time.perf_counter()
+        index.train(vectors)
+        index.add(vectors, np.arange(len(vectors)))
+        build_s = time.perf_counter() - t0
+        print(f"\n  nlist={index.nlist} (build {build_s:.1f}s)")
+        for nprobe in nprobes:
+            if nprobe > index.nlist:
+                continue
+            times, hits = [], 0
+            for q, expected in zip(queries, truth):
+                t0 = time.perf_counter()
+                ids, _ = index.search(q, k, nprobe=nprobe)
+                times.append(time.perf_counter() - t0)
+                hits += len(expected & set(ids.tolist()))
+            recall = hits / (k * len(queries))
+            print(f"    nprobe={nprobe:<4} p50={percentile_ms(times, 50):7.3f} ms  "
+                  f"p95={percentile_ms(times, 95):7.3f} ms  recall={recall:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall/latencia del índice IVF vs búsqueda exacta")
+    parser.add_argument("--n", type=int, default=100_000, help="cantidad de vectores sintéticos")
+    parser.add_argument("--dim", type=int, default=384, help="dimensión (MiniLM-L12 = 384)")
+    parser.add_argument("--clusters", type=int, default=200, help="clusters en los datos sintéticos")
+    parser.add_argument("--from-index", help="usar los vectores de un índice IVF persistido")
+    parser.add_argument("--nlist", type=int, nargs="*", help="valores de nlist (default ~2·√n, 4·√n, 8·√n)")
+    parser.add_argument("--nprobe", type=int, nargs="*", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.from_index:
+        index = IVFIndex.load(args.from_index)
+        index._compact()
+        vectors = np.concatenate(index._list_vecs)
+    else:
+        print("🔄 Generando embeddings sintéticos...")
+        vectors = synthetic_embeddings(args.n, args.dim, args.clusters, args.seed)
+
+    root = math.sqrt(len(vectors))
+    nlists = args.nlist or [int(2 * root), int(4 * root), int(8 * root)]
+    run_benchmark(vectors, nlists, args.nprobe, args.k, min(args.queries, len(vectors)), args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Compila la base de conocimientos en un bundle para servir con mmap
+
+Aplica el seed oficial sobre prados.db (salvo --no-seed) y escribe el bundle
+versionado: documentos, chunks, postings BM25 y, con --embeddings, la matriz de
+embeddings. Los workers lo usan con KB_BUNDLE_PATH=<archivo> y no siembran ni
+indexan al arrancar; al reemplazar el archivo lo recargan solos.
+
+Uso:
+    python build_kb_bundle.py                          # prados.db → kb.bundle
+    python build_kb_bundle.py --out /srv/kb/kb.bundle --embeddings
+    python build_kb_bundle.py --db otra.db --no-seed
+"""
+import argparse
+import logging
+from pathlib import Path
+
+from services.kb_bundle import KBBundle, write_bundle
+from services.kb_seed import seed_knowledge_base
+from services.sqlite_knowledge import SQLiteKnowledgeBase
+
+ROOT_DIR = Path(__file__).parent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compila la KB de SQLite en un bundle mmap")
+    parser.add_argument("--db", default=str(ROOT_DIR / "prados.db"), help="base SQLite de origen")
+    parser.add_argument("--out", default=str(ROOT_DIR / "kb.bundle"), help="archivo de salida")
+    parser.add_argument("--embeddings", action="store_true", help="incluir la matriz de embeddings")
+    parser.add_argument("--no-seed", action="store_true", help="no sincronizar los documentos oficiales")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    kb = SQLiteKnowledgeBase(db_path=args.db)
+    try:
+        if not args.no_seed:
+            touched = seed_knowledge_base(kb)
+            print(f"🌱 Seed aplicado ({len(touched)} documentos modificados)")
+        info = write_bundle(args.out, kb, include_embeddings=args.embeddings)
+    finally:
+        kb.close()
+
+    bundle = KBBundle.open(args.out)
+    print(f"\n✅ Bundle v{info['version']}: {info['documents']} documentos, {info['chunks']} chunks, "
+          f"{info['terms']} términos, {info['embeddings']} embeddings")
+    print(f"📁 {info['path']} ({info['bytes'] / 1024:,.0f} KiB, {info['build_ms']:.0f} ms)")
+    print(f"🔎 Verificación: {len(bundle.documents)} documentos legibles, "
+          f"{len(bundle.official_ids)} oficiales")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,31 @@
 """
 Script para cargar documentos legales en SQLite
+
+Se puede ejecutar más de una vez: los documentos que ya están (mismo contenido
+normalizado) se descartan y se listan en el reporte. Los casi duplicados se insertan
+y se listan para revisión, salvo con --near-dedup.
+
+Uso:
+    python load_documents.py
+    python load_documents.py --merge              # fusiona la metadata de los duplicados
+    python load_documents.py --near-dedup         # descarta también los casi duplicados (MinHash)
+    python load_documents.py --remove-existing    # limpia duplicados de cargas anteriores
 """
-from services.sqlite_knowledge import SQLiteKnowledgeBase
+import argparse
+
+from services.dedup import DedupReport
+from services.sqlite_knowledge import SQLiteKnowledgeBase, OFFICIAL_DOC_PREFIX
+
 
-def load_legal_documents():
+def print_report(report: DedupReport, header: str) -> None:
+    summary = report.summary()
+    print(f"\n🧹 {header}: {summary['dropped']} descartados "
+          f"({summary['exact_duplicates']} exactos, {summary['near_duplicates']} casi duplicados)")
+    for line in report.lines():
+        print(f"  {line}")
+
+
+def load_legal_documents(on_duplicate: str = "skip", remove_existing: bool = False, near_dedup: bool = False):
     """Carga los documentos legales en la base de datos"""
     
     print("🔄 Cargando documentos legales en SQLite...")
@@ -428,17 +450,32 @@ Si deseas mayor información sobre esta modalidad o sobre el proyecto, estaré e
         }
     ]
     
+    if remove_existing:
+        print_report(sqlite_kb.remove_duplicates(near_duplicates=near_dedup), "Duplicados previos eliminados")
+
     # Cargar documentos base
     print("\n📄 Cargando documentos base...")
-    for doc in documentos_base:
-        sqlite_kb.add_document(
-            titulo=doc["titulo"],
-            contenido=doc["contenido"],
-            metadata={"source": "base_knowledge", "type": "legal_info"}
-        )
-        print(f"  ✓ {doc['titulo']}")
+    report = DedupReport()
+    ids = sqlite_kb.add_documents(
+        (
+            {
+                "titulo": doc["titulo"],
+                "contenido": doc["contenido"],
+                "metadata": {"source": "base_knowledge", "type": "legal_info"},
+                # Las preguntas oficiales se guardan también como chunks individuales
+                "chunked": doc["titulo"].startswith(OFFICIAL_DOC_PREFIX),
+            }
+            for doc in documentos_base
+        ),
+        on_duplicate=on_duplicate,
+        report=report,
+        near_duplicates=near_dedup,
+    )
+    for doc_id, doc in zip(ids, documentos_base):
+        print(f"  ✓ {doc['titulo']} (ID: {doc_id})")
+    print_report(report, "Deduplicación")
     
-    print(f"\n✅ {len(documentos_base)} documentos cargados exitosamente")
+    print(f"\n✅ {report.inserted} de {len(documentos_base)} documentos cargados exitosamente")
     print(f"📊 Total documentos en base: {sqlite_kb.count_documents()}")
     
     # Prueba de búsqueda
@@ -447,7 +484,13 @@ Si deseas mayor información sobre esta modalidad o sobre el proyecto, estaré e
     for i, result in enumerate(results, 1):
         print(f"\n  {i}. {result['titulo']}")
         print(f"     Score: {result['score']:.4f}")
-        print(f"     Contenido: {result['contenido'][:150]}...")
+        print(f"     Extracto: {result['snippet'][:150]}...")
 
 if __name__ == "__main__":
-    load_legal_documents()
+    parser = argparse.ArgumentParser(description="Carga los documentos legales base en SQLite")
+    parser.add_argument("--merge", action="store_true", help="fusionar la metadata de los duplicados")
+    parser.add_argument("--remove-existing", action="store_true", help="eliminar duplicados ya cargados")
+    parser.add_argument("--near-dedup", action="store_true", help="descartar también casi duplicados (MinHash)")
+    args = parser.parse_args()
+    load_legal_documents(on_duplicate="merge" if args.merge else "skip", remove_existing=args.remove_existing,
+                         near_dedup=args.near_dedup)
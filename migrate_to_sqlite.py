@@ -1,69 +1,131 @@
 """
 Script para migrar datos de MongoDB a SQLite
+
+Lee la colección knowledge_base en streaming (cursor ordenado por _id), escribe lotes
+en una tabla de staging con checkpoint del último _id y recién al final reemplaza los
+documentos de SQLite en una sola transacción. Si se corta, volver a ejecutarlo
+retoma desde el checkpoint; la base activa no se toca hasta el swap.
+
+Uso:
+    python migrate_to_sqlite.py                    # migra (o reanuda)
+    python migrate_to_sqlite.py --restart          # descarta el staging previo
+    python migrate_to_sqlite.py --batch-size 5000
+    python migrate_to_sqlite.py --near-dedup       # además descarta casi duplicados tras el swap
 """
+import argparse
 import asyncio
 import os
+import time
 from motor.motor_asyncio import AsyncIOMotorClient
+from bson import ObjectId
 from services.sqlite_knowledge import SQLiteKnowledgeBase
 
-async def migrate_mongodb_to_sqlite():
-    """Migra todos los documentos de MongoDB a SQLite"""
-    
+SOURCE = "mongodb:knowledge_base"
+BATCH_SIZE = 1000
+
+
+def _parse_id(value: str):
+    """El checkpoint guarda el _id como texto; los ObjectId vuelven a su tipo."""
+    return ObjectId(value) if ObjectId.is_valid(value) else value
+
+
+def _to_staging(doc: dict) -> dict:
+    text_chunk = doc['text_chunk']
+    return {
+        'fuente_id': str(doc['_id']),
+        # Crear título desde el inicio del texto
+        'titulo': text_chunk[:100] + '...' if len(text_chunk) > 100 else text_chunk,
+        'contenido': text_chunk,
+        'metadata': {'source': 'mongodb_migration'},
+        'embedding': doc.get('embedding'),
+    }
+
+
+async def migrate_mongodb_to_sqlite(batch_size: int = BATCH_SIZE, restart: bool = False,
+                                    near_dedup: bool = False):
+    """Migra todos los documentos de MongoDB a SQLite (streaming + staging + swap)"""
+
     print("🔄 Iniciando migración de MongoDB a SQLite...")
-    
+
     # Conectar a MongoDB
     mongo_url = os.getenv('MONGO_URL', 'mongodb://localhost:27017')
     db_name = os.getenv('DB_NAME', 'prados_legal_hub')
-    
+
+    client = None
     try:
         client = AsyncIOMotorClient(mongo_url)
         db = client[db_name]
-        
-        # Obtener documentos de knowledge_base
-        documents = await db.knowledge_base.find({}, {"_id": 0}).to_list(None)
-        
-        print(f"📦 Encontrados {len(documents)} documentos en MongoDB")
-        
+
         # Inicializar SQLite
         sqlite_kb = SQLiteKnowledgeBase()
-        
-        # Limpiar base de datos existente
-        print("🗑️  Limpiando base de datos SQLite existente...")
-        sqlite_kb.clear_database()
-        
-        # Migrar documentos
-        migrated = 0
-        for doc in documents:
-            text_chunk = doc.get('text_chunk', '')
-            
-            if text_chunk:
-                # Crear título desde el inicio del texto
-                titulo = text_chunk[:100] + '...' if len(text_chunk) > 100 else text_chunk
-                
-                # Agregar documento
-                sqlite_kb.add_document(
-                    titulo=titulo,
-                    contenido=text_chunk,
-                    metadata={'source': 'mongodb_migration'}
-                )
-                migrated += 1
-                
-                if migrated % 10 == 0:
-                    print(f"  ✓ Migrados {migrated}/{len(documents)} documentos...")
-        
-        print(f"\n✅ Migración completada: {migrated} documentos migrados a SQLite")
-        print(f"📁 Base de datos: /app/backend/prados.db")
-        
+
+        last_id, staged = sqlite_kb.begin_staging(SOURCE, restart=restart)
+        if last_id:
+            print(f"⏯️  Reanudando desde _id {last_id} ({staged} filas ya en staging)")
+
+        query = {'_id': {'$gt': _parse_id(last_id)}} if last_id else {}
+        cursor = (
+            db.knowledge_base
+            .find(query, {'_id': 1, 'text_chunk': 1, 'embedding': 1})
+            .sort('_id', 1)
+            .batch_size(batch_size)
+        )
+
+        started = time.perf_counter()
+        read = 0
+        batch = []
+        batch_last_id = None
+        async for doc in cursor:
+            read += 1
+            batch_last_id = doc['_id']
+            if doc.get('text_chunk'):
+                batch.append(_to_staging(doc))
+            if read % batch_size == 0:
+                staged += sqlite_kb.stage_documents(SOURCE, batch, str(batch_last_id))
+                batch = []
+                rate = read / (time.perf_counter() - started)
+                print(f"  ✓ {read} leídos, {staged} en staging ({rate:,.0f} filas/s)")
+        if batch_last_id is not None and read % batch_size:
+            staged += sqlite_kb.stage_documents(SOURCE, batch, str(batch_last_id))
+
+        elapsed = time.perf_counter() - started
+        print(f"📦 {read} documentos leídos de MongoDB en {elapsed:.1f}s "
+              f"({read / elapsed if elapsed else 0:,.0f} filas/s)")
+
+        # Swap atómico: reemplaza la base activa recién ahora
+        swap_started = time.perf_counter()
+        migrated = sqlite_kb.swap_in_staging(SOURCE)
+        swap_elapsed = time.perf_counter() - swap_started
+
+        total = time.perf_counter() - started
+        print(f"\n✅ Migración completada: {migrated} documentos migrados a SQLite "
+              f"(swap {swap_elapsed:.1f}s, {migrated / total if total else 0:,.0f} filas/s en total)")
+        print(f"🧹 {max(staged - migrated, 0)} duplicados exactos descartados en el swap")
+        if near_dedup:
+            report = sqlite_kb.remove_duplicates()
+            print(f"🧹 {report.dropped} duplicados eliminados tras el swap ({len(report.near)} casi duplicados)")
+            for line in report.lines():
+                print(f"  {line}")
+        print(f"📁 Base de datos: {sqlite_kb.db_path}")
+
         # Verificar
         count = sqlite_kb.count_documents()
         print(f"✅ Verificación: {count} documentos en SQLite")
-        
-        client.close()
-        
+
     except Exception as e:
         print(f"❌ Error en migración: {str(e)}")
+        print("   El staging y el checkpoint se conservan: volvé a ejecutar para reanudar.")
         import traceback
         traceback.print_exc()
+    finally:
+        if client:
+            client.close()
 
 if __name__ == "__main__":
-    asyncio.run(migrate_mongodb_to_sqlite())
+    parser = argparse.ArgumentParser(description="Migración MongoDB → SQLite reanudable")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="documentos por lote/transacción")
+    parser.add_argument("--restart", action="store_true", help="descartar staging y checkpoint previos")
+    parser.add_argument("--near-dedup", action="store_true", help="eliminar casi duplicados (MinHash) tras el swap")
+    args = parser.parse_args()
+    asyncio.run(migrate_mongodb_to_sqlite(batch_size=args.batch_size, restart=args.restart,
+                                          near_dedup=args.near_dedup))
@@ -1,5 +1,5 @@
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, WebSocket, WebSocketDisconnect, Form
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, WebSocket, WebSocketDisconnect, Form, Header, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -7,7 +7,7 @@ import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator, Tuple, Union
 import uuid
 from datetime import datetime, timezone
 import asyncio
@@ -42,6 +42,9 @@ class LlmChat:
 import aiofiles
 import json
 import io
+import hashlib
+import sqlite3
+import time
 import base64
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
@@ -73,6 +76,7 @@ OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
 LLM_KEY = OPENAI_API_KEY or GEMINI_API_KEY or EMERGENT_LLM_KEY
 LLM_MODEL_PROVIDER = "openai" if OPENAI_API_KEY else "gemini"
 LLM_MODEL_NAME = "gpt-4o-mini" if OPENAI_API_KEY else "gemini-2.0-flash"
+LLM_MODEL = f"{LLM_MODEL_PROVIDER}/{LLM_MODEL_NAME}"
 HEYGEN_API_KEY = os.environ.get('HEYGEN_API_KEY', '')
 ELEVENLABS_API_KEY = os.environ.get('ELEVENLABS_API_KEY', '')
 
@@ -94,19 +98,85 @@ if ELEVENLABS_API_KEY:
 
 # Import custom services
 from services.sqlite_knowledge import SQLiteKnowledgeBase
+from services.async_knowledge import AsyncKnowledgeBase, KnowledgeBaseBusyError
+from services.kb_snapshot import KBSnapshot, KBSnapshotManager
+from services.kb_bundle import KBBundle
+from services.context_cache import ContextCache
+from services.answer_cache import AnswerCache
+from services.sentence_stream import SentenceAccumulator
+from services.speech_pipeline import SpeechInterrupted, SpeechPipeline
+from services.generation_stats import GenerationStats
+from services.token_budget import ContextBudget, ContextPiece, TokenCounter
+from services.kb_seed import LEGAL_INFO, seed_knowledge_base
+from services.keyword_matcher import KeywordMatcher
+from services.sharded_knowledge import ShardedKnowledgeBase, UnknownShardError, parse_shards
 from services.liveavatar_service import LiveAvatarService as LiveAvatarAPIService
 
 # Initialize SQLite Knowledge Base (reemplaza MongoDB)
 _db_path = str(ROOT_DIR / "prados.db")
 sqlite_kb = SQLiteKnowledgeBase(db_path=_db_path)
+# Fachada async — los handlers nunca consultan SQLite desde el event loop
+kb = AsyncKnowledgeBase(
+    sqlite_kb,
+    max_workers=int(os.environ.get("KB_EXECUTOR_WORKERS", "4")),
+    max_queue=int(os.environ.get("KB_MAX_QUEUE", "64")),
+    timeout=float(os.environ.get("KB_TIMEOUT_S", "5")),
+)
+# Foto versionada de la KB — se recarga sin reiniciar (admin endpoint o cambio de kb_version).
+# Con KB_BUNDLE_PATH se sirve el bundle precompilado (build_kb_bundle.py) mapeado con mmap
+KB_BUNDLE_PATH = os.environ.get("KB_BUNDLE_PATH") or None
+kb_snapshots = KBSnapshotManager(
+    kb,
+    poll_interval=float(os.environ.get("KB_RELOAD_POLL_S", "5")),
+    bundle_path=KB_BUNDLE_PATH,
+)
+# Shards por proyecto/categoría (KB_SHARDS="lomas=lomas.db,lomas/contratos=..."); la KB
+# principal es el shard por defecto y sigue sirviéndose desde la foto/bundle
+KB_DEFAULT_SHARD = os.environ.get("KB_DEFAULT_SHARD", "prados").strip().lower()
+sharded_kb = ShardedKnowledgeBase.open(
+    parse_shards(os.environ.get("KB_SHARDS", ""), ROOT_DIR),
+    default=KB_DEFAULT_SHARD,
+    existing={KB_DEFAULT_SHARD: sqlite_kb},
+    max_workers=int(os.environ.get("KB_SHARD_WORKERS", "8")),
+)
+# Contexto armado por (consulta normalizada, versión de KB) — las FAQ se repiten mucho
+context_cache = ContextCache(
+    max_items=int(os.environ.get("KB_CONTEXT_CACHE_SIZE", "512")),
+    ttl_seconds=float(os.environ.get("KB_CONTEXT_CACHE_TTL_S", "600")),
+)
+# Respuestas ya generadas por (pregunta normalizada, versión de KB, modelo) — un acierto no
+# llama al LLM. KB_ANSWER_SIMILARITY > 0 habilita el tier por similitud léxica
+answer_cache = AnswerCache(
+    db_path=os.environ.get("KB_ANSWER_CACHE_PATH", str(ROOT_DIR / "answer_cache.db")),
+    max_items=int(os.environ.get("KB_ANSWER_CACHE_SIZE", "2000")),
+    ttl_seconds=float(os.environ.get("KB_ANSWER_CACHE_TTL_S", "86400")),
+    similarity_threshold=float(os.environ.get("KB_ANSWER_SIMILARITY", "0")),
+)
+# Corte temprano: al completar la 5ª oración se cancela la request al LLM. Con LLM_EARLY_STOP=0
+# se genera completo (como antes) y solo se mide cuánto se habría ahorrado
+LLM_MAX_TOKENS = 300
+LLM_EARLY_STOP = os.environ.get("LLM_EARLY_STOP", "1") != "0"
+generation_stats = GenerationStats(
+    max_tokens=LLM_MAX_TOKENS,
+    sample_rate=float(os.environ.get("LLM_EARLY_STOP_SAMPLE", "0.02")),
+)
+# Contexto por presupuesto de tokens (system + contexto + pregunta); los conteos se cachean por chunk
+token_counter = TokenCounter(LLM_MODEL)
+context_budget = ContextBudget(
+    token_counter,
+    prompt_tokens=int(os.environ.get("KB_PROMPT_TOKEN_BUDGET", "2500")),
+    official_share=float(os.environ.get("KB_CONTEXT_OFFICIAL_SHARE", "0.7")),
+)
+# Referencias a las tareas en segundo plano (medición de colas) para que no las recolecte el GC
+_background_tasks: set = set()
 liveavatar_service = LiveAvatarAPIService()
 
 # Per-session locks to prevent concurrent /liveavatar/speak calls
 _session_locks: dict = {}
 _session_lock_times: dict = {}  # tracks last-used timestamp for cleanup
 
-# Cache for knowledge base documents (static content — loaded once at startup)
-_kb_docs_cache: list | None = None
+# Pipeline de voz en curso por sesión — /liveavatar/interrupt lo corta
+_speech_pipelines: Dict[str, SpeechPipeline] = {}
 
 def _get_session_lock(session_id: str) -> asyncio.Lock:
     import time as _time
@@ -131,314 +201,25 @@ HEYGEN_AVATAR_ID = os.environ.get('HEYGEN_AVATAR_ID', '')
 
 from contextlib import asynccontextmanager
 
-# Documentos oficiales de la base de conocimientos — se sincronizan al startup
-_KB_SEED_DOCS = [
-    {
-        "titulo": "Prados de Paraíso - Base de Conocimientos Oficial (Versión Integrada)",
-        "marker": "Es una pregunta muy importante para tener claridad",  # texto único de la pregunta 56 — fuerza update si no está
-        "contenido": """BASE DE CONOCIMIENTOS DEL BOT (VERSIÓN INTEGRADA Y FINAL)
-
-1. ¿Qué es Prados del Paraíso?
-Prados de Paraíso es una marca comercial de Desarrolladora Santa María del Norte SAC, dedicada a desarrollar proyectos inmobiliarios con un enfoque ecológico y sostenible. Busca innovar en el sector, combinando eficiencia ambiental, diseño funcional y calidad de vida. Responde a la demanda de estilos de vida responsables y un desarrollo inmobiliario consciente.
-
-2. ¿Qué proyectos tiene Prados del Paraíso?
-Prados de Paraíso actualmente cuenta con dos proyectos. Uno de ellos ya ha sido entregado con éxito y se llama "Prados de Paraíso – Casa Huerto Ecológico". El segundo proyecto, que se encuentra en desarrollo, es "Prados de Paraíso Villa Eco-Sostenible".
-Ambos proyectos reflejan el compromiso de la marca con un enfoque ecológico y sostenible, ofreciendo oportunidades de inversión segura y con visión de futuro.
-
-3. ¿Dónde se ubica el proyecto Villa Eco-Sostenible?
-El proyecto "Prados de Paraíso Villa Eco-Sostenible" se encuentra ubicado a la altura del kilómetro 137.25 de la Carretera Panamericana Norte. Pertenece al distrito de Santa María, en la provincia de Huaura, departamento de Lima.
-Es una ubicación estratégica que busca combinar la accesibilidad con el entorno natural que caracteriza a nuestros desarrollos.
-
-4. ¿Quién desarrolla el proyecto?
-El proyecto es promovido por Desarrolladora Santa María del Norte S.A.C., una empresa con experiencia en el mercado inmobiliario.
-Además, para garantizar la transparencia y seguridad jurídica en todos los procesos, contamos con el respaldo y asesoramiento legal de DS CASAHIERRO ABOGADOS y tenemos un convenio con la NOTARIA TAMBINI.
-
-5. ¿La empresa es formal?
-Sí, la empresa es formal y cuenta con el respaldo de la marca Prados de Paraíso, que tiene una trayectoria sólida en el desarrollo de proyectos inmobiliarios. Además, se encuentra inscrita en la Partida Electrónica número 15437655 del Registro de Personas Jurídicas de Lima.
-Esto asegura que opera bajo todas las regulaciones legales pertinentes.
-
-6. ¿Desde cuándo existe el proyecto?
-El proyecto "Villa Eco-Sostenible" inició en octubre del dos mil veintitrés.
-Sin embargo, es importante destacar que, aunque el desarrollo del proyecto es reciente, nuestra empresa mantiene la posesión del terreno desde el año mil novecientos noventa y ocho, lo cual nos brinda un respaldo histórico sólido en la zona.
-
-7. ¿Qué es exactamente lo que ofrecen?
-En Prados de Paraíso ofrecemos la transferencia de posesión de lotes. Esto significa que, al adquirir un lote con nosotros, obtienes el derecho de uso, disfrute y control efectivo del terreno.
-Es importante que tengas claro que la condición legal actual del predio es de posesión, no de propiedad titulada inscrita en Registros Públicos a nombre de la empresa. Sin embargo, nuestra posesión es sólida y segura porque:
-La empresa ejerce la posesión del terreno desde mil novecientos noventa y ocho, respaldada por escrituras públicas.
-Contamos con el reconocimiento de la Municipalidad de Santa María a través de las cartillas municipales (Predio Rústico y Hoja Resumen).
-Formalizamos tu adquisición mediante un Contrato de Transferencia de Posesión elevado a Escritura Pública ante notario.
-Adicionalmente, contamos con la Resolución N.º 00202-2026-SOPCFPUR/MDSM, que aprueba el cambio de zonificación, reconociendo el área del proyecto como Zona Residencial de Densidad Media (RDM – R3). Este importante avance permite la ejecución de áreas recreativas, parques y espacios diversos, que forman parte del concepto integral de la comunidad sostenible de Villa Eco-Sostenible.
-En resumen, te ofrecemos una oportunidad de inversión sólida, con respaldo legal, reconocimiento municipal y proyección urbana, dentro de una comunidad que ya cuenta con más de ochocientos clientes satisfechos y que continúa consolidándose como un proyecto sostenible y con visión de crecimiento.
-
-8. ¿Es lo mismo transferencia de posesión que comprar un terreno?
-No, no es exactamente lo mismo, aunque en la práctica ambos te permiten usar el terreno. La diferencia clave es que "comprar la propiedad" significa que te conviertes en el dueño legal absoluto y tu nombre aparece inscrito en los Registros Públicos (SUNARP).
-En cambio, la "transferencia de posesión", que es lo que ofrecemos en Prados de Paraíso, significa que adquieres el uso, disfrute y control del lote. Tienes un respaldo mediante el Contrato de Transferencia de Posesión y una Escritura Pública, lo que te da un derecho real sobre el bien, pero no la titularidad registral de la propiedad.
-
-9. ¿Qué diferencia hay entre posesión y propiedad?
-La propiedad es el derecho legal absoluto sobre un bien, que te otorga la titularidad y se inscribe formalmente en los Registros Públicos. Como propietario, tienes el derecho de usar, disfrutar, disponer y reivindicar el bien.
-Por otro lado, la posesión es el poder de hecho que ejerces sobre un bien, lo que significa que lo usas y disfrutas físicamente, independientemente de si eres el titular registral. Este derecho está reconocido por el Código Civil y se puede transferir mediante un Contrato de Transferencia de Posesión. En resumen, la propiedad es el título legal, mientras que la posesión es el uso y control físico del terreno.
-
-10. ¿Puedo construir en el lote?
-Sí, puedes construir en el lote que adquieras en Prados de Paraíso, siempre y cuando respetes las normativas locales y el Reglamento de Diseño y Construcción. Al adquirir el lote, tendrás el derecho de uso y disfrute exclusivo sobre él. Así que, si tienes un proyecto en mente, ¡adelante con ello!
-
-11. ¿La escritura me hace propietario?
-No, una escritura pública de transferencia de posesión no te convierte en propietario en el sentido registral. Es una distinción importante: la escritura pública en el contexto de Prados de Paraíso formaliza la transferencia de la posesión, dándote un respaldo legal sobre el uso y disfrute del terreno.
-La propiedad es un derecho distinto que otorga la titularidad del bien y es lo que se inscribe en los Registros Públicos (SUNARP). Para que tu nombre aparezca como propietario en SUNARP, se requiere un proceso adicional de saneamiento.
-
-12. ¿La empresa responde por el lote?
-Sí, la empresa responde por el lote en el sentido de que garantiza la transferencia de la posesión del predio. Desarrolladora Santa María del Norte S.A.C. formaliza esta transferencia mediante un Contrato de Transferencia de Posesión, el cual puede elevarse a Escritura Pública a solicitud del cliente, otorgando el derecho de uso y disfrute del lote asignado.
-Es importante aclarar que la empresa garantiza la entrega de la posesión en la condición legal informada (respaldada por documentos históricos), pero no responde por situaciones externas futuras, como desastres naturales o actos de terceros, ni ofrece indemnizaciones económicas por pérdida de posesión ajena a su incumplimiento contractual.
-
-13. ¿Qué planos entregarán a la firma del contrato de transferencia de posesión?
-Al momento de la firma del contrato de transferencia de posesión, se te proporcionarán tres documentos técnicos importantes: el plano de ubicación, la memoria descriptiva y los planos perimétricos.
-Estos documentos son fundamentales porque delimitan físicamente el área sobre la cual ejercerás tu derecho de posesión, permitiéndote identificar con claridad la ubicación y las medidas exactas de tu lote.
-
-14. ¿Cómo se respalda legalmente la posesión o qué documentos se entregan a los clientes?
-La posesión en Prados de Paraíso está respaldada legalmente por varios documentos sólidos. La empresa ejerce una posesión de buena fe desde mil novecientos noventa y ocho, acreditada por escrituras públicas que dan fe de las transferencias de posesión a lo largo del tiempo. Además, la Municipalidad de Santa María reconoce esta posesión de manera indirecta a través de la emisión de cartillas municipales, como el Predio Rústico (PR) y la Hoja Resumen (HR), que demuestran el cumplimiento de las obligaciones tributarias.
-Cuando adquieres un lote, te entregamos el Contrato de Transferencia de Posesión, que es el documento fundamental que formaliza tu derecho de uso y disfrute. Este contrato puede elevarse a Escritura Pública ante notario para mayor seguridad. También te facilitamos las escrituras públicas que respaldan la posesión de la empresa desde mil novecientos noventa y ocho y las cartillas municipales (PR y HR) que demuestran el cumplimiento de las obligaciones tributarias del predio.
-
-14. ¿Cómo se respalda legalmente la posesión o qué documentos se entregan a los clientes?
-La posesión en Prados de Paraíso está respaldada legalmente por varios documentos sólidos. La empresa ejerce una posesión de buena fe desde mil novecientos noventa y ocho, acreditada por escrituras públicas que dan fe de las transferencias de posesión a lo largo del tiempo. Además, la Municipalidad de Santa María reconoce esta posesión de manera indirecta a través de la emisión de cartillas municipales, como el Predio Rústico (PR) y la Hoja Resumen (HR), que demuestran el cumplimiento de las obligaciones tributarias.
-Cuando adquieres un lote, te entregamos el Contrato de Transferencia de Posesión, que es el documento fundamental que formaliza tu derecho de uso y disfrute. Este contrato puede elevarse a Escritura Pública ante notario para mayor seguridad. También te facilitamos las escrituras públicas que respaldan la posesión de la empresa desde mil novecientos noventa y ocho y las cartillas municipales (PR y HR) que demuestran el cumplimiento de las obligaciones tributarias del predio.
-
-15. ¿Cuál es el estado legal del proyecto y el proceso de adquisición de lote?
-Estado Legal del Proyecto: La condición actual del proyecto es de posesión, no de propiedad titulada. Esta posesión está respaldada documentalmente por Escrituras Públicas que datan desde mil novecientos noventa y ocho y cuenta con un reconocimiento municipal indirecto a través de las cartillas de Predio Rústico (PR) y Hoja Resumen (HR), lo que nos permite cumplir con nuestras obligaciones tributarias.
-Adicionalmente, contamos con la Resolución que aprueba el cambio de zonificación, reconociendo el área del proyecto como Zona Residencial de Densidad Media (RDM – R3). Este importante avance permite la ejecución de áreas recreativas, parques y espacios diversos, que forman parte del concepto integral de la comunidad sostenible de Villa Eco-Sostenible.
-Proceso de Adquisición: Para adquirir un lote con nosotros, el proceso se basa en la transferencia de esta posesión y consta de tres pasos principales:
-Firma del Contrato: Se firma un Contrato de Transferencia de Posesión.
-Trámite Notarial: Para tu seguridad jurídica, este contrato se puede elevar a Escritura Pública ante notario, dándole fecha cierta y plena fuerza legal.
-Entrega: Una vez completados los pagos y trámites, se te hace la entrega física del lote para que puedas ejercer tu derecho de uso y disfrute.
-
-16. ¿Qué documentos entrega la empresa al transferir la posesión?
-Para formalizar la transferencia y brindarte seguridad jurídica sobre tu lote en Prados de Paraíso, la empresa te entregará varios documentos importantes. Recibirás el Contrato de Transferencia de Posesión, que es el documento principal que te otorga el derecho de uso y disfrute del lote. Además, se te facilitarán las Escrituras Públicas que respaldan la posesión legítima del predio por parte de la empresa desde mil novecientos noventa y ocho, y las Cartillas Municipales (Predio Rústico y Hoja Resumen) que demuestran el cumplimiento de las obligaciones tributarias.
-
-17. ¿Qué significa una transferencia de posesión?
-La transferencia de posesión significa que se te otorga el derecho de uso y disfrute del lote. Este proceso se formaliza a través de un Contrato de Transferencia de Posesión, que luego se eleva a Escritura Pública ante un notario. En el caso de Prados de Paraíso, esta transferencia te permite disfrutar del lote y ejercer control sobre él, respaldado por la confianza y la seguridad del contrato.
-
-18. ¿Qué derechos tengo como poseedor?
-Como poseedor en Prados de Paraíso, usted tiene el derecho de usar y disfrutar físicamente del lote, lo que incluye ocuparlo, cercarlo y construir en él, siempre sujeto a las normativas locales y al contrato de posesión. Este derecho está respaldado por un Contrato de Transferencia de Posesión, que puede elevarse a Escritura Pública para mayor seguridad jurídica.
-La posesión le otorga el control físico y el poder jurídico sobre el bien, permitiéndole disponer de él como si fuera suyo. Además, el Contrato de Transferencia de Posesión delimita y asigna el derecho de uso y disfrute exclusivo sobre su lote específico. Es importante recordar que, aunque la posesión es un derecho real protegido, es distinta de la propiedad inscrita en Registros Públicos.
-
-19. ¿Puedo perder mi lote?
-Entiendo perfectamente tu preocupación, es una pregunta muy importante y quiero darte tranquilidad al respecto.
-Nuestra empresa mantiene una posesión sólida, respaldada por documentos legales como escrituras públicas que datan desde 1998, además de ejercer una posesión efectiva y de buena fe reconocida por la Municipalidad a través del pago de tributos. Al suscribir tu contrato de transferencia de posesión, adquieres por tracto sucesivo el derecho posesorio que la empresa tiene desde hace décadas, por lo que legalmente no sería posible que pierdas tu lote.
-Además, incluso si un proceso de saneamiento (como una prescripción adquisitiva) no resultara favorable en un primer momento, eso no implica automáticamente la pérdida de la posesión, ya que tú mantienes el derecho de uso y disfrute mientras cumplas con tus obligaciones contractuales.
-
-20. ¿Direfor, siendo el legítimo propietario, me puede quitar mi lote?
-Entiendo tu preocupación, es una pregunta muy válida. Mira, es cierto que el predio figura a nombre de DIREFOR en los Registros Públicos, pero nuestra empresa, Desarrolladora Santa María del Norte S.A.C., mantiene la posesión del predio desde el año 1998.
-Esto es clave porque nuestra posesión es anterior a la Ley 29618 (que habla sobre la imprescriptibilidad de los predios del Estado). Aunque no tenemos un título de propiedad registrado, ejercemos la posesión con el respaldo de escrituras públicas y cartillas municipales, por lo que la presencia de DIREFOR como titular registral no implica que seamos invasores ni representa un riesgo inmediato para tu posesión.
-Nosotros te garantizamos la entrega de la posesión mediante un Contrato de Transferencia de Posesión, lo que te otorga el uso y disfrute del lote.
-
-21. Si llevo un proceso de saneamiento vía prescripción adquisitiva de dominio, y pierdo el proceso, ¿me pueden quitar mi lote o mi posesión?
-Si llevas un proceso de saneamiento vía prescripción adquisitiva de dominio y este no resulta favorable, esto significa que en ese momento y por esa vía, no se logró acreditar tu derecho de propiedad sobre el lote. Sin embargo, la improcedencia o el rechazo de este proceso no implica automáticamente que vayas a perder tu posesión.
-Tú adquiriste la posesión del lote mediante un Contrato de Transferencia de Posesión, lo cual te otorga el derecho de uso y disfrute. Este derecho se mantiene mientras tu posesión no sea cuestionada o despojada por una resolución judicial firme.
-El proceso de prescripción adquisitiva no tiene como objetivo desalojar al poseedor, sino evaluar si se cumplen los requisitos para adquirir la propiedad. Por lo tanto, perder dicho proceso no habilita por sí solo a un tercero a quitarte el lote, ni extingue tu derecho posesorio.
-En resumen, aunque la prescripción adquisitiva no prospere, tú mantienes tu posesión, siempre y cuando continúes ejerciéndola conforme a la ley y cumplas con las obligaciones contractuales que asumiste.
-
-22. ¿La empresa participa en el proceso de formalización o saneamiento?
-Gracias por tu consulta, es muy importante aclararlo. La empresa no realiza directamente el trámite de formalización o saneamiento del título de propiedad, ya que este es un proceso personal que corresponde a cada cliente una vez que el proyecto ha sido entregado y el lote cancelado.
-Lo que sí hacemos es garantizar la entrega de la posesión del lote mediante un Contrato de Transferencia de Posesión y brindarte todo el respaldo documentario necesario para que tú puedas iniciar ese trámite. Te entregaremos copias de las escrituras públicas que acreditan la posesión desde 1998 y la documentación municipal (Predio Rústico y Hoja Resumen) para que, con la ayuda de tu abogado, evalúes la mejor vía de formalización.
-
-23. ¿Existe el riesgo de que DIREFOR inicie una demanda de reivindicación o desalojo?
-Entiendo perfectamente tu preocupación; es una consulta muy razonable al evaluar una inversión de este tipo. En el proyecto Prados de Paraíso, la seguridad jurídica se sustenta en que la empresa ejerce una posesión desde el año mil novecientos noventa y ocho.
-Si bien la empresa no cuenta con una partida registral de propiedad a su nombre, sí ejerce y administra el terreno de manera efectiva y documentada. Esta posesión se encuentra respaldada por escrituras públicas que acreditan nuestra presencia desde mil novecientos noventa y ocho, además de documentación municipal (Predio Rústico y Hoja Resumen) que evidencia el cumplimiento de obligaciones tributarias y el reconocimiento de la posesión por parte de la Municipalidad de Santa María.
-Adicionalmente, contamos con la Resolución que aprueba el cambio de zonificación, reconociendo el área del proyecto como Zona Residencial de Densidad Media (RDM – R3). Este importante avance permite la ejecución de áreas recreativas, parques y espacios diversos, que forman parte del concepto integral de la comunidad sostenible de Villa Eco-Sostenible. Además este reconocimiento municipal representa un respaldo institucional importante, ya que confirma la posesión del predio, brindando mayor formalidad y seguridad jurídica a los futuros adquirentes, respaldando la formalidad de El Proyecto y la protección de su inversión.
-Es importante precisar que una eventual demanda de reivindicación o desalojo no prospera automáticamente cuando existe una posesión antigua, pública y ejercida de buena fe, como en este caso. La solidez de la posesión, el sustento documental y el acompañamiento legal existente reducen significativamente la probabilidad de acciones de este tipo.
-
-24. ¿La posesión que ustedes transfieren me permite defenderme legalmente frente a terceros o solo frente a la empresa?
-La posesión que transferimos en Prados de Paraíso te permite defenderte legalmente no solo frente a nuestra empresa, sino también frente a terceros. Esto se debe a que el Código Civil Peruano reconoce la posesión como un derecho real, lo que te otorga la facultad de usar y disfrutar del bien como si fuera tuyo.
-Al adquirir la posesión mediante un Contrato de Transferencia de Posesión, que se eleva a Escritura Pública, obtienes un respaldo legal sólido. Además, un punto importante es la "suma de plazos posesorios", regulada en el artículo 898 del Código Civil, que te permite sumar tu tiempo de posesión al tiempo que nuestra empresa ha poseído el terreno desde 1998. Esto fortalece aún más tu posición legal.
-
-25. ¿Por qué la empresa no sanea primero el terreno y después lo vende?
-Es una excelente pregunta y es importante entender la estrategia detrás de Prados de Paraíso.
-La razón principal es que la condición legal actual del predio es la posesión, no la propiedad. Esto significa que la empresa ejerce el uso y disfrute del inmueble, una situación que está formalizada y respaldada por documentación, incluyendo escrituras públicas que acreditan la continuidad posesoria desde 1998, y documentación municipal de Santa María que reconoce esta posesión.
-La gerencia de la empresa ha tomado la decisión estratégica de estructurar el proyecto bajo un modelo de transferencia de posesión. Esto se hace para ofrecer una alternativa clara, transparente y comercialmente viable a los interesados, sin prometer ni ofrecer procesos de titulación o saneamiento registral por parte de la empresa. Es fundamental saber que la posesión puede ser transferida legalmente.
-Por lo tanto, la empresa garantiza la entrega de la posesión mediante un Contrato de Transferencia de Posesión, que se formaliza una vez que el adquirente ha pagado el valor total del lote. A partir de ese momento, como nuevo poseedor, puedes evaluar de manera independiente si deseas iniciar un procedimiento de saneamiento o formalización de la titularidad, asumiendo los costos y trámites que esto implique. Para facilitar cualquier evaluación futura, la empresa pone a tu disposición toda la documentación existente, como las escrituras públicas y las constancias municipales relacionadas con la posesión.
-
-26. ¿Existe hoy algún juicio, denuncia o problema legal activo sobre este terreno?
-Basándome en la información legal disponible sobre el proyecto Prados de Paraíso, puedo confirmarte que no existe ningún juicio, denuncia o problema legal activo sobre el terreno. Aunque la partida registral figura a nombre de DIREFOR, una entidad del Estado, esto no implica que haya un conflicto, ya que nuestra posesión está respaldada por escrituras públicas desde mil novecientos noventa y ocho. El proyecto se desarrolla en un marco de transparencia, sin litigios que pongan en riesgo tu adquisición de la posesión.
-
-27. Si yo compro hoy el lote y mañana hay un problema legal con el terreno, ¿qué respaldo real tengo como adquiriente?
-Lo primero que debes saber es que la condición legal del predio que adquieres es la posesión, no la propiedad. Esto significa que nuestra empresa te garantiza la entrega de la posesión del lote, lo que te otorga el derecho de uso y disfrute del mismo. Esta transferencia se formaliza mediante un Contrato de Transferencia de Posesión.
-Tu respaldo como adquirente se basa en este Contrato de Transferencia de Posesión, que te otorga el derecho de uso y disfrute. Además, la posesión de nuestra empresa está documentada y respaldada por escrituras públicas que datan desde mil novecientos noventa y ocho, y la Municipalidad de Santa María reconoce nuestra posesión de manera indirecta a través de la emisión de cartillas municipales.
-
-28. ¿Qué riesgos existen al adquirir el lote por transferencia de posesión?
-Al adquirir un lote mediante transferencia de posesión, el riesgo principal que debes considerar es que no estás adquiriendo la propiedad inscrita en Registros Públicos, sino únicamente el derecho de uso y disfrute del terreno. Esto implica que la obtención del título de propiedad no es automática; dependerá de que tú, como adquirente, inicies y asumas un proceso de saneamiento de manera personal en el futuro.
-Además, es importante tener claro que la empresa no garantiza la titulación final, sino la entrega de una posesión documentada y formalizada mediante contrato. Sin embargo, para tu tranquilidad, esta posesión que te transferimos es sólida, ya que está respaldada por escrituras públicas desde mil novecientos noventa y ocho y cuenta con reconocimiento municipal.
-
-29. ¿La empresa garantiza que no habrá problemas legales en el futuro?
-La empresa no puede garantizar escenarios futuros que estén fuera de su control. Lo que sí garantiza, de manera expresa y contractual, es la entrega de la posesión del lote en la condición legal que se te ha informado.
-Actualmente, la empresa ejerce una posesión que está debidamente respaldada por escrituras públicas que acreditan su ejercicio posesorio, así como por documentación municipal. Esta posesión sólida es la que se te transfiere mediante el Contrato de Transferencia de Posesión.
-
-30. ¿Qué obligaciones asume el adquirente?
-Al adquirir un lote en Prados del Paraíso mediante transferencia de posesión, asumes varias obligaciones importantes que están detalladas en el contrato. Principalmente, te comprometes a pagar el precio pactado por la transferencia, ya sea al contado o siguiendo el cronograma de pagos establecido.
-Además, debes cumplir con las condiciones para que se te entregue la posesión, lo cual incluye la cancelación total del valor del lote. También serás responsable de asumir los trámites notariales y administrativos que origine la Escritura Pública del Contrato de Transferencia, así como cumplir con el reglamento interno del proyecto y las normas sobre el uso del lote.
-
-31. ¿Se paga algún impuesto o tributo por la transferencia de posesión?
-Sí. Con la entrega del lote, el cliente asumirá el pago de los tributos municipales que correspondan, de conformidad con la normativa municipal vigente.
-A partir de ese momento, el cliente deberá gestionar ante la municipalidad el alta como nuevo contribuyente y la baja del anterior, a fin de que figure formalmente como responsable de las obligaciones tributarias del lote adquirido.
-Previamente, la empresa se encargará de realizar la individualización administrativa de las cartillas municipales de cada lote (HR y PR), lo que permitirá que cada predio cuente con su propia identificación tributaria independiente.
-Mientras no se efectúe dicha individualización, los tributos se administran sobre el predio matriz del proyecto.
-
-32. ¿El contrato contempla cláusulas de saneamiento posesorio?
-El contrato de Transferencia de Posesión está diseñado para regular y garantizar la entrega de la posesión del lote, no para llevar a cabo un saneamiento de la propiedad. Esto significa que se enfoca en asegurar su derecho de uso y disfrute sobre el bien.
-
-33. ¿La empresa ha evaluado iniciar el proceso prescripción adquisitiva del proyecto?
-Es una excelente pregunta. La empresa ha evaluado la posibilidad de iniciar un proceso de prescripción adquisitiva para el proyecto. Sin embargo, la decisión de hacerlo es estratégica y considera diversos factores legales, técnicos y comerciales.
-Actualmente, la empresa no ofrece el inicio de un proceso de prescripción adquisitiva como parte del proyecto. Su actividad principal se centra en la transferencia de posesión, no en la comercialización de propiedad ya saneada. Esto significa que la obtención del título de propiedad es un proceso que el adquirente, si lo desea, deberá iniciar y asumir de manera personal.
-
-34. ¿La transferencia de posesión podría considerarse simulación de compraventa?
-Esa es una excelente pregunta que toca un punto legal muy importante. Permíteme aclararte la diferencia para que tengas total tranquilidad.
-La transferencia de posesión y la compraventa de propiedad son actos jurídicos distintos y no deben confundirse. La Transferencia de Posesión (lo que hacemos en Prados de Paraíso) implica ceder el derecho de ejercer el poder de hecho sobre un bien (usarlo y disfrutarlo). Esto es un acto transparente, respaldado por asesoramiento legal y formalizado mediante un contrato que puede elevarse a Escritura Pública. La Compraventa de Propiedad implica transferir el derecho de ser el dueño legal absoluto, lo cual se inscribe en los Registros Públicos.
-Una simulación ocurre cuando las partes fingen celebrar un acto para engañar a terceros o evadir la ley. En nuestro caso, no hay simulación porque el contrato es claro y específico: se transfiere la posesión, no la propiedad saneada. Nosotros somos muy transparentes al informar que lo que adquieres es el derecho de uso y disfrute, respaldado por nuestra cadena de posesión documentada desde 1998, y no un título de propiedad inscrito en SUNARP en este momento.
-
-35. ¿Cómo se gestiona la eventual formalización futura de la posesión?
-La formalización futura de la posesión se gestiona a través de un proceso de saneamiento físico-legal. Este proceso permite al poseedor evaluar la posibilidad de acceder al derecho de propiedad y, si es el caso, inscribirlo en Registros Públicos.
-Es importante saber que este saneamiento no forma parte del servicio que ofrece la empresa, sino que debe ser asumido de manera personal por el adquirente una vez que haya recibido la posesión del lote y cumplido con las condiciones contractuales. Existen vías legales como la prescripción adquisitiva de dominio, que se tramita judicialmente, o vías administrativas, según la normativa. La empresa te brindará el respaldo documental necesario para iniciar este proceso.
-
-36. ¿Qué obligaciones mantiene la empresa luego de la transferencia?
-Una vez realizada la transferencia de la posesión del lote, las obligaciones de la empresa se limitan estrictamente a lo establecido en el contrato. Principalmente, la empresa se compromete a:
-Entregar la posesión del lote en la condición legal que se te informó previamente.
-Proporcionarte toda la documentación posesoria que sustenta la transferencia realizada.
-Cumplir con cualquier obligación contractual que pudiera haber quedado pendiente, si correspondiera.
-
-37. ¿La empresa mantiene la administración sobre áreas recreativas?
-La empresa asume la gestión inicial necesaria para la organización del proyecto. Sin embargo, la administración y el mantenimiento de las áreas recreativas pueden ser asumidos posteriormente por una asociación. Esto se realizará conforme a lo previsto en el reglamento interno y a medida que se consolide el proyecto.
-
-38. ¿Existen contingencias penales asociadas al modelo de negocio?
-De acuerdo con la naturaleza del proyecto y lo establecido contractualmente, no existen contingencias penales inherentes al modelo de negocio de Prados de Paraíso.
-Esto se debe a que:
-Figura Legal Reconocida: El proyecto se basa en la transferencia de posesión, una figura reconocida por el ordenamiento jurídico peruano.
-Respaldo Documental: Nuestra posesión está respaldada por documentación formal y Escrituras Públicas que datan desde 1998.
-Transparencia: Todo el proceso se realiza de manera transparente, con asesoría legal y notarial, diferenciando claramente la posesión de la propiedad.
-
-39. ¿Qué respaldo real tiene el cliente si surge un conflicto?
-Entiendo perfectamente tu inquietud, es fundamental sentir seguridad al realizar una inversión.
-Si llegara a surgir algún conflicto, tu respaldo real se fundamenta en tres pilares principales que brindan solidez a tu adquisición. Primero, la Seguridad Jurídica Histórica: la empresa cuenta con una posesión respaldada por escrituras públicas que datan desde 1998, además de documentación formal que acredita nuestra trayectoria en el terreno. Segundo, el Asesoramiento Legal Especializado: contamos con el respaldo y la asesoría del estudio DS CASAHIERRO ABOGADOS, así como un convenio con la NOTARIA TAMBINI. Tercero, el Compromiso de Documentación: la empresa se compromete a entregarte toda la documentación necesaria para que, si así lo deseas, puedas iniciar tu propio proceso de saneamiento físico-legal.
-
-40. ¿Qué es DIREFOR y por qué figura como propietario?
-DIREFOR es la Dirección de Formalización de la Propiedad Rural, una entidad del Estado. Figura como titular registral del predio matriz debido a un cambio normativo con la Ley número veintinueve mil seiscientos dieciocho, que entró en vigencia en el año dos mil diez.
-Esta ley estableció que los terrenos sin propiedad inscrita pasaran a nombre del Estado. Sin embargo, es importante destacar que esta inscripción no invalida la posesión que nuestra empresa ejerce sobre el predio desde mil novecientos noventa y ocho, la cual está debidamente documentada.
-
-41. ¿Es legal transferir la posesión de un terreno del Estado?
-Sí, la legislación peruana reconoce la posesión como una situación jurídica protegida, que es distinta y diferente al derecho de propiedad. En Prados de Paraíso, lo que se transfiere es la posesión del terreno, no la propiedad. Nuestra empresa ejerce una posesión anterior a la inscripción estatal, debidamente documentada, y transfiere esa situación posesoria mediante un Contrato de Transferencia de Posesión.
-
-42. ¿Qué sucede si se revierte la posesión a favor del Estado?
-Actualmente, no existe ningún procedimiento administrativo o judicial que busque revertir la posesión del predio a favor del Estado. Aunque DIREFOR figura como titular registral del predio matriz por mandato de la Ley número veintinueve mil seiscientos dieciocho, esto no implica automáticamente la pérdida de la posesión existente. Nuestra empresa ejerce esta posesión desde mil novecientos noventa y ocho, y está debidamente documentada, lo que le brinda un respaldo sólido.
-
-43. ¿La municipalidad reconoce oficialmente el proyecto?
-La Municipalidad de Santa María reconoce nuestra posesión de manera indirecta a través de la emisión de cartillas municipales, específicamente el PR (Predio Rústico) y la HR (Hoja Resumen). Adicionalmente, contamos con la Resolución N.º 00202-2026-SOPCFPUR/MDSM, que aprueba el cambio de zonificación, reconociendo el área del proyecto como Zona Residencial de Densidad Media (RDM – R3), lo cual confirma la posesión del predio, brindando mayor formalidad y seguridad jurídica a los adquirentes, respaldando la formalidad del Proyecto y la protección de su inversión.
-
-44. ¿Cómo impacta la ley que prohíbe la prescripción adquisitiva de inmuebles contra el Estado?
-La Ley número veintinueve mil seiscientos dieciocho, promulgada en dos mil diez, prohíbe que los bienes inmuebles de dominio privado estatal sean adquiridos por particulares mediante prescripción adquisitiva. Esto significa que ya no se puede reclamar la propiedad de terrenos estatales solo por haberlos poseído durante mucho tiempo a partir de esa fecha.
-Sin embargo, en el caso de Prados de Paraíso, la empresa cuenta con veintisiete años de posesión, la cual se inició antes de que esta ley entrara en vigor. Por lo tanto, la legitimidad de la posesión transferida a los clientes se mantiene, ya que la ley no invalida la posesión histórica que ya existía. En resumen, la ley protege al Estado de nuevas reclamaciones, pero no afecta las posesiones preexistentes.
-
-45. ¿La empresa acompaña judicialmente al cliente si hay alguna contingencia legal?
-Entiendo tu pregunta. En caso de que enfrentes una contingencia legal o decidas iniciar un proceso de formalización de tu lote, la gestión y representación legal corresponde al cliente. La empresa te proporcionará toda la documentación probatoria disponible para respaldar tu caso y facilitar tu defensa, pero la representación ante un juez debe ser realizada por tu propio abogado.
-
-46. ¿La empresa indemnizará en caso de pérdida de posesión?
-La empresa no asume responsabilidad económica ni ofrece una indemnización específica por la pérdida de la posesión si esta es causada por hechos externos o ajenos al incumplimiento del comprador.
-Lo que la empresa garantiza es la entrega de una posesión documentada y formalizada mediante contrato, respaldada por la documentación histórica que posee desde mil novecientos noventa y ocho. Es decir, su compromiso es entregarte el lote con el respaldo legal de su posesión, pero no cubre contingencias futuras fuera de su control.
-
-47. ¿Se puede individualizar la posesión por cada lote?
-¡Claro que sí! Cuando firmas el Contrato de Transferencia de Posesión, este documento delimita y asigna el derecho de uso y disfrute exclusivo sobre un lote determinado dentro del proyecto. Esto significa que tú tienes el control físico y el derecho a usar y disfrutar ese espacio concreto, cercarlo o construir en él.
-
-48. ¿El adquirente podría ser demandado directamente ante un posible proceso judicial iniciado por el Estado?
-Sí, como adquirente de la posesión, usted sería la parte directamente involucrada en cualquier proceso judicial que el Estado pudiera iniciar. Sin embargo, es importante destacar que la posesión que recibe está respaldada por documentación histórica y escrituras públicas desde mil novecientos noventa y ocho. Esto le brinda una garantía sobre la posesión de su lote, permitiéndole usar y disfrutar su inversión con tranquilidad y confianza.
-
-49. ¿Qué pasa si el proyecto no logra consolidarse?
-Entendemos que esta es una preocupación importante para cualquier inversión. La garantía principal de Prados de Paraíso es la antigüedad de la posesión que se transfiere a nuestros clientes, respaldada por escrituras públicas desde 1998.
-Adicionalmente, contamos con la Resolución que aprueba el cambio de zonificación, reconociendo el área del proyecto como Zona Residencial de Densidad Media (RDM – R3). Este importante avance permite la ejecución de áreas recreativas, parques y espacios diversos, que forman parte del concepto integral de la comunidad sostenible de Villa Eco-Sostenible.
-Si el proyecto no se consolida completamente, por ejemplo, en cuanto a infraestructura o desarrollo planificado, usted seguirá manteniendo la posesión de su lote, con pleno ejercicio de uso y disfrute sobre ese espacio.
-
-50. ¿El contrato me protege frente a cualquier contingencia legal?
-El contrato está diseñado principalmente para regular la transferencia de la posesión y las obligaciones de pago, asegurando que usted reciba la posesión de su lote con el respaldo de documentos históricos. Si bien le brinda seguridad sobre la posesión física y la documentación que acredita su derecho de ocupación, no cubre situaciones externas. Esto incluye litigios con terceros o con el Estado que puedan surgir en el futuro.
-
-51. ¿La empresa responde económicamente frente a la pérdida de la posesión del proyecto?
-La empresa no asume responsabilidad económica por la pérdida de la posesión si esta es causada por hechos externos o ajenos al incumplimiento del comprador. Es decir, la empresa respalda la posesión que te transfiere, pero no te indemnizará económicamente por causas que no sean su incumplimiento contractual.
-
-52. ¿Las cartillas PR y HR están a nombre de mi lote específico?
-No, las cartillas PR (Predio Rústico) y HR (Hoja Resumen) no estarán a nombre de su lote específico de forma individual. Estos tributos municipales se gestionan sobre el predio matriz, es decir, sobre la propiedad principal del proyecto.
-Esto ocurre mientras no exista una individualización administrativa por cada lote. La empresa le entregará estos documentos que demuestran el cumplimiento de las obligaciones tributarias del predio general.
-
-53. ¿Mi lote tendrá su propia cartilla municipal?
-Actualmente las cartillas municipales PR y HR se emiten a nombre de la empresa para el predio en su totalidad.
-La empresa se compromete a realizar el procedimiento de Individualización Administrativa ante la Municipalidad Distrital para tu lote. Esto te permitirá tener una mejor formalización de tu propiedad. Así que puedes estar tranquilo, ya que estamos trabajando para asegurar que cada adquirente tenga la documentación necesaria en el futuro.
-
-54. ¿La empresa tiene Libro de Reclamaciones?
-Sí, la empresa cuenta con un Libro de Reclamaciones.
-Lo tenemos disponible en dos formatos para tu comodidad: Físico: En nuestras oficinas ubicadas en Calle Libertadores ciento cincuenta y cinco, Oficina trescientos dos, distrito de San Isidro. Virtual: Accesible a través de nuestra página web: web: https://pradosdeparaiso.com.pe/.
-
-55. ¿Qué pasa si no estoy conforme con la respuesta de la empresa?
-Entiendo que quieras saber qué opciones tienes si una respuesta no cumple tus expectativas.
-Si no estás conforme con la respuesta inicial que te brindamos, siempre puedes continuar el diálogo a través de nuestros canales internos para solicitar una revisión adicional, una reunión de aclaración o la intervención de un área especializada. Nuestra prioridad es resolver los reclamos de manera directa, pero si tras agotar estas vías internas el resultado no es satisfactorio, mantienes tu derecho de acudir a los organismos de protección al consumidor según la normativa vigente.
-
-56. ¿Cuáles son los plazos de atención de un reclamo?
-Es una pregunta muy importante para tener claridad sobre los tiempos.
-De acuerdo con el Reglamento del Libro de Reclamaciones y su modificatoria, el plazo máximo que tenemos como proveedores para atender un reclamo y brindarte una respuesta es de quince días hábiles improrrogables.
-
-57. ¿La empresa se responsabiliza por daños externos?
-En realidad, la empresa no asume responsabilidad por daños ocasionados por factores externos que estén fuera de su control. Esto incluye situaciones como desastres naturales, actos de terceros, decisiones de autoridades o cualquier otro evento fortuito o de fuerza mayor.
-Nuestra responsabilidad se limita estrictamente a cumplir con las obligaciones que hemos asumido en el contrato, que son principalmente la entrega de la posesión del lote y la documentación correspondiente.
-
-58. Si la empresa Desarrolladora Santa Maria del Norte S.A.C deja de pagar la deuda pendiente con el señor Manuel Ampuero por la transferencia de posesión, ¿Eso podría hacer que yo pierda mi lote o mi derecho de posesión?
-Desde la suscripción de la Escritura Pública por la que el señor Manuel Ampuero transfirió la posesión a favor de Desarrolladora Santa María del Norte (en adelante, la "empresa"), adquirió válidamente la posesión efectiva del terreno.
-En consecuencia, desde esa fecha la empresa ostenta la calidad de poseedora, con plena facultad para transferir dicha posesión a terceros. Esta condición posesoria no se ve afectada por las obligaciones internas o relaciones económicas que puedan existir entre las partes que intervinieron en la transferencia original.
-Así, aun en el supuesto de que la empresa incumpliera algún pago u obligación económica pendiente frente al señor Ampuero, ello no genera la pérdida, restitución ni afectación de la posesión ya transferida. La posesión se mantiene firme, pues fue otorgada formalmente mediante escritura pública y recae sobre la empresa como persona jurídica.
-Por tanto, cualquier relación económica entre las partes originales es independiente y no incide en la situación posesoria del predio, ni en la validez de la posesión que posteriormente se transfiera a los futuros posesionarios.
-En consecuencia, se reafirma que no existe riesgo alguno para el cliente respecto a la estabilidad, continuidad o validez de la posesión que adquirirá.
-
-59. ¿Puedo obtener título de propiedad si pago el precio total del lote?
-Entiendo tu interés en obtener un título de propiedad al realizar el pago total del lote. En el caso de Prados de Paraíso, el proyecto se desarrolla bajo la modalidad de transferencia de posesión, por lo que no se otorga título de propiedad inscrito en Registros Públicos como parte de la compra del lote. Recibirás un contrato de transferencia de posesión que acredita tu derecho de posesión sobre el lote.
-La condición actual del proyecto es de posesión, no de propiedad titulada. Esta posesión está respaldada documentalmente por Escrituras Públicas que datan desde mil novecientos noventa y ocho y cuenta con un reconocimiento municipal indirecto a través de las cartillas de Predio Rústico (PR) y Hoja Resumen (HR), lo que nos permite cumplir con nuestras obligaciones tributarias.
-Si deseas mayor información sobre esta modalidad o sobre el proyecto, estaré encantada de ayudarte.
-""",
-    },
-]
-
-def _seed_knowledge_base():
-    """Sincroniza los documentos oficiales al startup. Actualiza o inserta según título."""
-    try:
-        import sqlite3 as _sqlite3
-        with _sqlite3.connect(_db_path) as conn:
-            cursor = conn.cursor()
-            for doc in _KB_SEED_DOCS:
-                cursor.execute("SELECT id, contenido FROM conocimiento_legal WHERE titulo = ?", (doc["titulo"],))
-                row = cursor.fetchone()
-                needs_update = row is None or doc["marker"] not in row[1]
-                if needs_update:
-                    if row:
-                        cursor.execute("UPDATE conocimiento_legal SET contenido = ? WHERE id = ?",
-                                       (doc["contenido"], row[0]))
-                        logger.info(f"✅ KB actualizado: '{doc['titulo'][:50]}...'")
-                    else:
-                        cursor.execute("INSERT INTO conocimiento_legal (titulo, contenido) VALUES (?, ?)",
-                                       (doc["titulo"], doc["contenido"]))
-                        logger.info(f"✅ KB insertado: '{doc['titulo'][:50]}...'")
-                else:
-                    logger.info(f"✅ KB OK: '{doc['titulo'][:50]}...'")
-            # Eliminar docs obsoletos que ya no forman parte de _KB_SEED_DOCS
-            _current_titles = [d["titulo"] for d in _KB_SEED_DOCS]
-            _obsolete_titles = [
-                'Condiciones Legales de Prados de Paraíso',
-                'Prados de Paraíso - Base de Conocimientos Oficial (Preguntas 1 a 30)',
-                'Prados de Paraíso - Base de Conocimientos Oficial (Preguntas 31 a 58)',
-            ]
-            for old_title in _obsolete_titles:
-                if old_title not in _current_titles:
-                    cursor.execute("DELETE FROM conocimiento_legal WHERE titulo = ?", (old_title,))
-                    logger.info(f"🗑️ KB obsoleto eliminado: '{old_title[:60]}'")
-            conn.commit()
-    except Exception as e:
-        logger.error(f"Error en _seed_knowledge_base: {e}")
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup — asegurar que el documento principal tenga el contenido correcto
-    _seed_knowledge_base()
+    # Startup — asegurar que el documento principal tenga el contenido correcto.
+    # Con bundle el seed ya se aplicó al compilarlo: el worker solo mapea el archivo
+    if not KB_BUNDLE_PATH:
+        seeded_ids = await kb.arun(seed_knowledge_base, sqlite_kb, timeout=60.0)
+        # El seed escribe directo en SQLite — reindexar solo los documentos que cambiaron
+        await kb.arun(sqlite_kb.reindex_documents, seeded_ids, timeout=60.0)
+    await kb_snapshots.reload()
+    kb_snapshots.start_watcher()
+    await asyncio.to_thread(answer_cache.warm)
     logger.info("✅ Application started successfully")
     yield
-    # Shutdown — properly close MongoDB async connection
+    # Shutdown — detener el watcher y el executor, cerrar conexiones SQLite persistentes y MongoDB
+    await kb_snapshots.stop_watcher()
+    kb.shutdown()
+    sharded_kb.close()
+    sqlite_kb.close()
+    answer_cache.close()
     if client:
         logger.info("🛑 Shutting down — closing MongoDB connection...")
         client.close()
@@ -466,49 +247,6 @@ app.add_middleware(
 
 api_router = APIRouter(prefix="/api")
 
-# Información legal de Prados de Paraíso (usada como fallback en endpoints secundarios)
-LEGAL_INFO = """
-PRADOS DE PARAÍSO — Proyecto inmobiliario en Pachacamac, Lima, Perú.
-Respaldado por Notaría Tambini y Casahierro Abogados.
-
-1. CONDICIÓN LEGAL DEL TERRENO:
-- 50% del terreno: Propiedad adquirida mediante compraventa de acciones y derechos, con escrituras públicas desde 1998.
-- 50% restante: Posesión legítima y mediata de buena fe, ejercida continuamente desde 1998.
-- El predio figura a nombre de DIREFOR (entidad estatal), pero la empresa posee legítimamente desde hace más de 25 años.
-
-2. QUÉ RECIBE EL COMPRADOR:
-Contrato de transferencia de POSESIÓN (no título de propiedad en primera instancia).
-Para obtener el título inscrito en SUNARP el propietario gestiona el saneamiento legal al completar el pago total.
-
-3. PREGUNTAS FRECUENTES:
-
-Q: ¿Cuándo entregan el título de propiedad?
-R: Al comprar se entrega contrato de transferencia de posesión. El título SUNARP se obtiene gestionando el saneamiento legal tras completar el pago. El equipo legal acompaña ese proceso.
-
-Q: ¿Tienen partida registral en SUNARP?
-R: No a nombre de la desarrolladora. El predio figura a nombre de DIREFOR. Esto no representa riesgo porque poseemos legítimamente desde 1998, respaldados por escrituras públicas notariales.
-
-Q: ¿Es seguro comprar sin partida registral?
-R: Sí. La posesión legítima de más de 25 años con escrituras públicas desde 1998 es un derecho real protegido por la ley peruana. El respaldo es Notaría Tambini y Casahierro Abogados.
-
-Q: ¿Puedo construir en el terreno con posesión?
-R: Sí. El poseedor legítimo tiene todos los derechos de uso, disfrute y construcción sobre el terreno.
-
-Q: ¿Puedo revender el lote?
-R: Sí, el contrato de posesión es transferible. Se recomienda completar el saneamiento primero para obtener mejor precio.
-
-Q: ¿Tipos de posesión?
-R: Legítima (mediata e inmediata) e Ilegítima (buena fe, mala fe, precaria). Prados de Paraíso: Posesión Legítima Mediata de Buena Fe — la categoría más sólida.
-
-4. PROCESO DE COMPRA:
-1. Separación del lote con pago inicial
-2. Verificación de documentos legales
-3. Firma de contrato de transferencia de posesión
-4. Pago en cuotas según plan acordado
-5. Gestión de saneamiento para título SUNARP al completar pago
-6. Inscripción definitiva en Registros Públicos
-"""
-
 # Models
 class User(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -582,7 +320,17 @@ async def diagnostics():
         "elevenlabs_key_set": bool(ELEVENLABS_API_KEY),
         "llm_test": None,
         "llm_error": None,
+        "kb_executor": kb.metrics(),
+        "kb_snapshot": kb_snapshots.metrics(),
+        "context_cache": context_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "generation": generation_stats.stats(),
+        "prompt": context_budget.stats(),
     }
+    try:
+        result["kb_shards"] = await kb.arun(sharded_kb.stats)
+    except (KnowledgeBaseBusyError, asyncio.TimeoutError) as e:
+        result["kb_shards"] = {"error": repr(e)}
     if LLM_KEY:
         try:
             resp = await litellm.acompletion(
@@ -805,6 +553,99 @@ async def get_analytics(x_admin_key: Optional[str] = None):
         logger.error(f"Error getting analytics: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.post("/admin/kb/reload")
+async def reload_knowledge_base(x_admin_key: Optional[str] = None):
+    """Reconstruye la foto de la KB y la publica sin reiniciar (las sesiones de avatar siguen vivas)."""
+    _admin_key = os.environ.get("ADMIN_API_KEY", "")
+    if _admin_key and x_admin_key != _admin_key:
+        raise HTTPException(status_code=403, detail="Acceso no autorizado")
+    previous = kb_snapshots.metrics().get("version")
+    try:
+        snapshot = await kb_snapshots.reload()
+    except (KnowledgeBaseBusyError, asyncio.TimeoutError) as e:
+        logger.warning(f"KB reload unavailable: {e!r}")
+        raise HTTPException(status_code=503, detail="Base de conocimientos ocupada, reintentá en unos segundos")
+    return {"success": True, "previous_version": previous, **snapshot.info()}
+
+
+def _etag_response(payload: Dict, if_none_match: Optional[str]) -> Response:
+    """JSON con ETag del cuerpo; 304 sin cuerpo si el cliente ya tiene esa versión."""
+    response = JSONResponse(payload)
+    etag = '"' + hashlib.sha1(response.body).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and etag in {tag.strip() for tag in if_none_match.split(",")}:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return response
+
+
+# Sin ADMIN_API_KEY el listado solo muestra extractos: el corpus completo es solo para admins
+KB_PUBLIC_PREVIEW_CHARS = 200
+
+
+def _is_admin(x_admin_key: Optional[str]) -> bool:
+    _admin_key = os.environ.get("ADMIN_API_KEY", "")
+    return not _admin_key or x_admin_key == _admin_key
+
+
+def _kb_shard(shard: Optional[str]) -> SQLiteKnowledgeBase:
+    try:
+        return sharded_kb.shard((shard or sharded_kb.default).strip().lower())
+    except UnknownShardError:
+        raise HTTPException(status_code=404, detail="Shard desconocido")
+
+
+@api_router.get("/kb/documents")
+async def list_kb_documents(
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    preview_chars: int = Query(200, ge=0, le=5000),
+    full: bool = False,
+    shard: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    x_admin_key: Optional[str] = None,
+):
+    """
+    Documentos de la KB paginados por clave: ?after_id=<next_after_id de la página
+    anterior>&limit=N. El contenido llega recortado a preview_chars salvo full=true.
+    full=true requiere la clave de admin; sin ella preview_chars se limita a
+    KB_PUBLIC_PREVIEW_CHARS.
+    """
+    admin = _is_admin(x_admin_key)
+    if full and not admin:
+        raise HTTPException(status_code=403, detail="Acceso no autorizado")
+    if not admin:
+        preview_chars = min(preview_chars, KB_PUBLIC_PREVIEW_CHARS)
+    store = _kb_shard(shard)
+    try:
+        documents, next_after_id = await kb.arun(
+            store.list_documents, after_id, limit, None if full else preview_chars
+        )
+    except (KnowledgeBaseBusyError, asyncio.TimeoutError) as e:
+        logger.warning(f"KB listing unavailable: {e!r}")
+        raise HTTPException(status_code=503, detail="Base de conocimientos ocupada, reintentá en unos segundos")
+    return _etag_response(
+        {"documents": documents, "next_after_id": next_after_id, "limit": limit},
+        if_none_match,
+    )
+
+
+@api_router.get("/kb/documents/{doc_id}")
+async def get_kb_document(doc_id: int, shard: Optional[str] = None, if_none_match: Optional[str] = Header(None),
+                          x_admin_key: Optional[str] = None):
+    """Documento completo de la KB (con ETag). Requiere la clave de admin."""
+    if not _is_admin(x_admin_key):
+        raise HTTPException(status_code=403, detail="Acceso no autorizado")
+    store = _kb_shard(shard)
+    try:
+        document = await kb.arun(store.get_document, doc_id)
+    except (KnowledgeBaseBusyError, asyncio.TimeoutError) as e:
+        logger.warning(f"KB lookup unavailable: {e!r}")
+        raise HTTPException(status_code=503, detail="Base de conocimientos ocupada, reintentá en unos segundos")
+    if document is None:
+        raise HTTPException(status_code=404, detail="Documento no encontrado")
+    return _etag_response(document, if_none_match)
+
 # Export conversation to PDF
 @api_router.get("/conversations/{conversation_id}/export")
 async def export_conversation(conversation_id: str):
@@ -1344,11 +1185,15 @@ Responde de manera profesional y clara.'''
 class ChatRequest(BaseModel):
     message: str
     conversation_id: Optional[str] = None
+    project: Optional[str] = None     # shard de la KB (default: KB_DEFAULT_SHARD)
+    category: Optional[str] = None    # sub-shard "proyecto/categoria"
 
 class SpeakRequest(BaseModel):
     session_id: str
     audio_base64: str          # audio grabado por el frontend (webm/opus)
     conversation_id: Optional[str] = None
+    project: Optional[str] = None
+    category: Optional[str] = None
 
 class InterruptRequest(BaseModel):
     session_id: str
@@ -1357,6 +1202,8 @@ class TextSpeakRequest(BaseModel):
     session_id: str
     text: str
     conversation_id: Optional[str] = None
+    project: Optional[str] = None
+    category: Optional[str] = None
 
 VALERIA_SYSTEM = '''Eres Valeria, asesora legal de Prados de Paraíso, proyecto inmobiliario en Pachacamac, Lima, Perú.
 
@@ -1381,109 +1228,290 @@ DATOS CLAVE DEL PROYECTO (siempre válidos):
 Si no encontrás información específica en la base de conocimientos, respondé con lo que sabés del proyecto en 4 oraciones y ofrecé derivar al equipo legal o de ventas.
 '''
 
-def _truncate_to_sentences(text: str, max_sentences: int = 5, min_sentences: int = 4) -> str:
-    """Corta el texto a un máximo de N oraciones completas (mínimo min_sentences si hay suficientes)."""
-    import re
-    # Dividir por punto seguido de espacio o fin de línea
-    sentences = re.split(r'(?<=[.!?])\s+', text.strip())
-    # Filtrar oraciones vacías o muy cortas (artefactos)
-    sentences = [s.strip() for s in sentences if len(s.strip()) > 10]
-    trimmed = " ".join(sentences[:max_sentences])
-    # Asegurar que termina con punto
-    if trimmed and trimmed[-1] not in ".!?":
-        trimmed += "."
-    return trimmed
-
-
-def _extract_relevant_chunks(doc_content: str, query: str, max_chars: int = 3000) -> str:
-    """Extrae los párrafos/preguntas más relevantes de un documento según la query."""
+def _relevant_blocks(doc_content: str, query: str) -> List[Tuple[str, float]]:
+    """Párrafos/preguntas de un documento sin chunks guardados, en orden, con su relevancia para la query."""
     import re
     # Dividir por bloques (preguntas numeradas o párrafos dobles)
     blocks = re.split(r'\n(?=\d+[\.\)]|\n)', doc_content)
-    query_words = set(w.lower() for w in query.split() if len(w) >= 3)
-
-    scored = []
-    for block in blocks:
-        if not block.strip():
-            continue
-        block_lower = block.lower()
-        score = sum(1 for w in query_words if w in block_lower)
-        scored.append((score, block.strip()))
+    # Términos normalizados una vez; cada bloque se compara sin tildes ("posesión" = "posesion")
+    matcher = KeywordMatcher.from_query(query, min_len=3)
+    return [(re.sub(r'\*+', '', block.strip()), float(matcher.count(block))) for block in blocks if block.strip()]
 
-    # Ordenar por relevancia, luego tomar los mejores hasta max_chars
-    scored.sort(key=lambda x: x[0], reverse=True)
-    result_parts = []
-    total = 0
-    for score, block in scored:
-        if total + len(block) > max_chars:
-            break
-        result_parts.append(block)
-        total += len(block)
 
-    # Si no hay nada relevante, tomar los primeros 3000 chars del doc
-    if not result_parts:
-        return doc_content[:max_chars]
+# El contexto va después de este encabezado en el system prompt
+_CONTEXT_HEADER = "\nINFORMACIÓN DISPONIBLE:\n"
+_NO_CONTEXT = "Usa tu conocimiento general sobre el proyecto."
+_BUSY_DETAIL = "El asistente está temporalmente ocupado. Por favor intentá de nuevo en unos segundos."
 
-    return "\n\n".join(result_parts)
 
-
-async def _build_valeria_response(user_text: str, conversation_id: str) -> str:
-    """STT ya hecho. Búsqueda semántica + LLM → texto de respuesta."""
+def _build_context(snapshot: Union[KBSnapshot, KBBundle], user_text: str) -> str:
+    """Búsqueda sobre la foto de la KB → bloque de contexto para el prompt (CPU: corre en el executor de la KB)."""
     import re
-    global _kb_docs_cache
-
-    # Cache all_docs — content never changes at runtime, no need to re-fetch every call
-    if _kb_docs_cache is None:
-        _kb_docs_cache = sqlite_kb.get_all_documents_full()
-    all_docs = _kb_docs_cache
-    relevant_docs = sqlite_kb.search(query=user_text, top_k=3)
+    relevant_docs = snapshot.search(user_text, 3)
 
-    MAIN_DOC_PREFIX = "Prados de Paraíso - Base de Conocimientos Oficial"
-    context_parts = []
+    # 1. Documentos oficiales — chunks por pregunta pre-procesados, con su score BM25
+    official = []
     seen_ids = set()
-
-    # 1. Documentos oficiales — extraer solo los chunks relevantes (máx 3000 chars c/u)
-    main_docs = [d for d in all_docs if MAIN_DOC_PREFIX in d.get('titulo', '')]
-    for doc in main_docs:
+    for doc in snapshot.official_documents():
         seen_ids.add(doc['id'])
-        chunk = _extract_relevant_chunks(doc['contenido'], user_text, max_chars=5000)
-        clean = re.sub(r'\*+', '', chunk)
-        context_parts.append(f"BASE DE CONOCIMIENTOS OFICIAL ({doc['titulo']}):\n{clean}")
-
-    # 2. Docs relevantes adicionales (no oficiales), truncados a 1500 chars
+        header = f"BASE DE CONOCIMIENTOS OFICIAL ({doc['titulo']}):"
+        # Documento sin chunks guardados — bloques del texto completo
+        scored = snapshot.scored_chunks(doc['id'], user_text) or _relevant_blocks(doc['contenido'], user_text)
+        official.extend(ContextPiece(doc['id'], header, text, score, position)
+                        for position, (text, score) in enumerate(scored))
+
+    # 2. Docs relevantes adicionales (no oficiales) — extracto BM25
+    extra = []
     for doc in relevant_docs:
         if doc['id'] in seen_ids:
             continue
         seen_ids.add(doc['id'])
-        clean = re.sub(r'\*+', '', doc['contenido'])[:1500]
-        context_parts.append(f"Información adicional ({doc['titulo']}):\n{clean}")
+        extra.append(ContextPiece(doc['id'], f"Información adicional ({doc['titulo']}):",
+                                  re.sub(r'\*+', '', doc['snippet']), doc['score']))
 
-    context = "\n\n".join(context_parts) if context_parts else "Usa tu conocimiento general sobre el proyecto."
+    # Todo por presupuesto de tokens: lo más relevante por token primero
+    context = context_budget.build(VALERIA_SYSTEM + _CONTEXT_HEADER, user_text, official, extra)
+    return context or _NO_CONTEXT
 
+
+async def _assemble_context(snapshot: Union[KBSnapshot, KBBundle], user_text: str) -> str:
+    """
+    Búsqueda, scoring de chunks y armado por tokens en un solo trabajo del executor:
+    nada de eso corre en el event loop (SSE y entrega al avatar siguen fluyendo).
+    """
     try:
-        response = await litellm.acompletion(
-            model=f"{LLM_MODEL_PROVIDER}/{LLM_MODEL_NAME}",
+        return await kb.arun(_build_context, snapshot, user_text)
+    except (KnowledgeBaseBusyError, asyncio.TimeoutError) as e:
+        logger.warning(f"Knowledge base unavailable: {e!r}")
+        raise HTTPException(status_code=503, detail=_BUSY_DETAIL)
+
+
+async def _assemble_sharded_context(shards: List[str], user_text: str) -> str:
+    """Fan-out a los shards de la request → chunks de los documentos encontrados, por presupuesto de tokens."""
+    import re
+    try:
+        results = await sharded_kb.asearch(user_text, top_k=5, shards=shards, timeout=kb.timeout)
+    except asyncio.TimeoutError as e:
+        logger.warning(f"Knowledge base shards unavailable: {e!r}")
+        raise HTTPException(
+            status_code=503,
+            detail="El asistente está temporalmente ocupado. Por favor intentá de nuevo en unos segundos."
+        )
+
+    scored_per_doc = await asyncio.gather(*(
+        sharded_kb.ascored_chunks(doc['shard'], doc['id'], user_text, timeout=kb.timeout) for doc in results
+    ), return_exceptions=True)
+    # Chunks de los documentos encontrados; el extracto solo para los que no tienen chunks
+    # (o cuyo shard falló al leerlos)
+    chunks, snippets = [], []
+    for doc, scored in zip(results, scored_per_doc):
+        key, header = (doc['shard'], doc['id']), f"{doc['titulo']} [{doc['shard']}]:"
+        if isinstance(scored, BaseException):
+            logger.warning(f"⚠️ Chunks of doc {doc['id']} unavailable in shard {doc['shard']}: {scored!r}")
+            scored = None
+        if scored:
+            chunks.extend(ContextPiece(key, header, text, score, position)
+                          for position, (text, score) in enumerate(scored))
+        else:
+            snippets.append(ContextPiece(key, header, re.sub(r'\*+', '', doc['snippet']), doc['score']))
+    try:
+        context = await kb.arun(context_budget.build, VALERIA_SYSTEM + _CONTEXT_HEADER, user_text, chunks, snippets)
+    except (KnowledgeBaseBusyError, asyncio.TimeoutError) as e:
+        logger.warning(f"Knowledge base unavailable: {e!r}")
+        raise HTTPException(status_code=503, detail=_BUSY_DETAIL)
+    return context or _NO_CONTEXT
+
+
+def _llm_http_error(e: Exception) -> Optional[HTTPException]:
+    """Rate limit / cuota del proveedor → 503 para el cliente; el resto se propaga tal cual."""
+    err_str = str(e).lower()
+    if "429" in err_str or "quota" in err_str or "rate" in err_str:
+        logger.warning(f"LLM rate limit hit: {e}")
+        return HTTPException(status_code=503, detail=_BUSY_DETAIL)
+    return None
+
+
+async def _prepare_valeria_turn(user_text: str, conversation_id: str, project: Optional[str] = None,
+                                category: Optional[str] = None) -> Tuple[int, str, Optional[str], List[Dict]]:
+    """
+    Todo lo previo al LLM → (versión de KB, alcance, respuesta cacheada, mensajes).
+    Con respuesta cacheada no se busca en la KB y los mensajes vuelven vacíos.
+    Toda la request usa la misma foto de la KB aunque se publique otra en el medio.
+    project/category eligen los shards; sin ellos se usa la KB principal.
+    """
+    try:
+        shards = sharded_kb.route(project, category)
+    except UnknownShardError:
+        raise HTTPException(status_code=404, detail="Proyecto o categoría desconocidos")
+
+    if shards == [sharded_kb.default]:
+        snapshot = kb_snapshots.current
+        version, scope = snapshot.version, ""
+    else:
+        snapshot, scope = None, ",".join(shards)
+        try:
+            version = await kb.arun(sharded_kb.kb_version, shards)
+        except (KnowledgeBaseBusyError, asyncio.TimeoutError) as e:
+            logger.warning(f"Knowledge base unavailable: {e!r}")
+            raise HTTPException(status_code=503, detail=_BUSY_DETAIL)
+
+    # Misma pregunta, misma KB y mismo modelo → misma respuesta, sin búsqueda ni LLM
+    cached = answer_cache.get(user_text, version, LLM_MODEL, scope)
+    if cached is not None:
+        logger.info(f"💾 Cached answer (KB v{version}) for conversation {conversation_id[:8]}")
+        return version, scope, cached, []
+
+    context = context_cache.get(user_text, version, scope)
+    cached_context = context is not None
+    if context is None:
+        if snapshot is not None:
+            context = await _assemble_context(snapshot, user_text)
+        else:
+            context = await _assemble_sharded_context(shards, user_text)
+        context_cache.put(user_text, version, context, scope)
+    system_prompt = VALERIA_SYSTEM + _CONTEXT_HEADER + context
+    prompt = context_budget.record(conversation_id[:8], system_prompt, user_text, cached_context)
+    logger.info(f"KB v{version} ({', '.join(shards)}) used for conversation {conversation_id[:8]} "
+                f"— prompt {prompt['prompt_tokens']} tokens")
+    return version, scope, None, [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_text},
+    ]
+
+
+async def _cache_answer(user_text: str, version: int, answer: str, scope: str) -> None:
+    try:
+        await asyncio.to_thread(answer_cache.put, user_text, version, LLM_MODEL, answer, scope)
+    except sqlite3.Error as e:
+        logger.warning(f"⚠️ Answer cache write failed (non-fatal): {e}")
+
+
+def _count_tokens(text: str) -> int:
+    return token_counter.count(text, cache=False)
+
+
+async def _open_llm_stream(messages: List[Dict]):
+    """Abre la generación en streaming; rate limit / cuota → 503."""
+    try:
+        return await litellm.acompletion(
+            model=LLM_MODEL,
             api_key=LLM_KEY,
-            max_tokens=300,
-            messages=[
-                {"role": "system", "content": VALERIA_SYSTEM + f"\nINFORMACIÓN DISPONIBLE:\n{context}"},
-                {"role": "user", "content": user_text},
-            ],
+            max_tokens=LLM_MAX_TOKENS,
+            messages=messages,
+            stream=True,
         )
-        if not response.choices or not response.choices[0].message.content:
-            raise Exception("LLM returned empty response")
-        raw = response.choices[0].message.content.strip()
     except Exception as e:
-        err_str = str(e).lower()
-        if "429" in err_str or "quota" in err_str or "rate" in err_str:
-            logger.warning(f"LLM rate limit hit: {e}")
-            raise HTTPException(
-                status_code=503,
-                detail="El asistente está temporalmente ocupado. Por favor intentá de nuevo en unos segundos."
-            )
+        http_error = _llm_http_error(e)
+        if http_error is not None:
+            raise http_error
+        raise
+
+
+async def _close_llm_stream(stream) -> None:
+    """Cancela la generación upstream: cerrar el stream corta la conexión HTTP con el proveedor."""
+    for target in (stream, getattr(stream, "completion_stream", None)):
+        close = getattr(target, "aclose", None) or getattr(target, "close", None)
+        if close is None:
+            continue
+        try:
+            result = close()
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            logger.debug(f"Closing LLM stream failed: {e!r}")
+        return
+
+
+async def _measure_tail(chunks, request_id: str, tokens: int, elapsed: float) -> None:
+    """
+    Lee lo que el LLM genera después del tope de oraciones, solo para medir el ahorro.
+    Esa cola se pagó: la request se registra como no cortada (solo aporta a la muestra).
+    """
+    started = time.perf_counter()
+    tail: List[str] = []
+    try:
+        async for chunk in chunks:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                tail.append(delta)
+    except Exception as e:
+        logger.debug(f"Tail measurement ended early [{request_id}]: {e!r}")
+    generation_stats.record(request_id, tokens, elapsed, capped=True, stopped=False,
+                            tail_tokens=_count_tokens("".join(tail)), tail_s=time.perf_counter() - started)
+
+
+async def _capped_deltas(stream, sentences: SentenceAccumulator,
+                         request_id: str) -> AsyncIterator[Tuple[str, List[str]]]:
+    """
+    Deltas del LLM con las oraciones que completa cada uno → (delta, oraciones nuevas);
+    al cerrar el stream llega ("", oración final). Al completar el tope de oraciones se
+    deja de leer y se cancela la request upstream; en la muestra de GenerationStats la
+    cola se sigue leyendo en segundo plano para medir el ahorro.
+    """
+    started = time.perf_counter()
+    received: List[str] = []
+    chunks = stream.__aiter__()
+    try:
+        async for chunk in chunks:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            received.append(delta)
+            yield delta, sentences.feed(delta)
+            if sentences.full:
+                break
+        else:
+            yield "", sentences.finish()
+            generation_stats.record(request_id, _count_tokens("".join(received)), time.perf_counter() - started,
+                                    capped=sentences.full, stopped=False)
+            return
+    except BaseException:
+        # Cliente desconectado, interrupción o error: no dejar la generación corriendo
+        await _close_llm_stream(stream)
+        raise
+
+    elapsed = time.perf_counter() - started
+    tokens = _count_tokens("".join(received))
+    if not LLM_EARLY_STOP:
+        await _measure_tail(chunks, request_id, tokens, elapsed)
+    elif generation_stats.should_sample():
+        task = asyncio.create_task(_measure_tail(chunks, request_id, tokens, elapsed))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+    else:
+        await _close_llm_stream(stream)
+        entry = generation_stats.record(request_id, tokens, elapsed, capped=True, stopped=True)
+        saved = (f" — saved ~{entry['tokens_saved']} tokens / {entry['latency_saved_ms']} ms"
+                 if entry['tokens_saved'] is not None else "")
+        logger.info(f"✂️ Early stop after {tokens} tokens ({elapsed * 1000:.0f} ms){saved} [{request_id}]")
+
+
+async def _build_valeria_response(user_text: str, conversation_id: str, project: Optional[str] = None,
+                                  category: Optional[str] = None) -> Tuple[str, int]:
+    """STT ya hecho. Búsqueda + LLM → (texto de respuesta, versión de la KB usada)."""
+    version, scope, cached, messages = await _prepare_valeria_turn(user_text, conversation_id, project, category)
+    if cached is not None:
+        return cached, version
+
+    stream = await _open_llm_stream(messages)
+    # Máximo 5 oraciones aunque el LLM no respete la regla: al completarlas se corta la generación
+    sentences = SentenceAccumulator(max_sentences=5)
+    deltas = _capped_deltas(stream, sentences, conversation_id[:8])
+    try:
+        async for _ in deltas:
+            pass
+    except Exception as e:
+        http_error = _llm_http_error(e)
+        if http_error is not None:
+            raise http_error
         raise
-    # Garantizar máximo 5 oraciones aunque el LLM no respete la regla
-    return _truncate_to_sentences(raw, max_sentences=5)
+    finally:
+        await deltas.aclose()
+    if not sentences.text:
+        raise Exception("LLM returned empty response")
+    answer = sentences.text
+    await _cache_answer(user_text, version, answer, scope)
+    return answer, version
 
 
 async def _tts_mp3(text: str) -> bytes:
@@ -1491,7 +1519,7 @@ async def _tts_mp3(text: str) -> bytes:
     if not elevenlabs_client:
         raise Exception("ElevenLabs not configured")
 
-    async def _generate() -> bytes:
+    def _generate() -> bytes:
         audio_bytes = b""
         stream = elevenlabs_client.text_to_speech.stream(
             text=text,
@@ -1509,7 +1537,8 @@ async def _tts_mp3(text: str) -> bytes:
             audio_bytes += chunk
         return audio_bytes
 
-    return await asyncio.wait_for(_generate(), timeout=30.0)
+    # El SDK es sincrónico: en un hilo para que las oraciones del pipeline se sinteticen en paralelo
+    return await asyncio.wait_for(asyncio.to_thread(_generate), timeout=30.0)
 
 
 async def _tts_pcm(text: str) -> bytes:
@@ -1517,7 +1546,7 @@ async def _tts_pcm(text: str) -> bytes:
     if not elevenlabs_client:
         raise Exception("ElevenLabs not configured")
 
-    async def _generate() -> bytes:
+    def _generate() -> bytes:
         audio_bytes = b""
         stream = elevenlabs_client.text_to_speech.stream(
             text=text,
@@ -1535,7 +1564,112 @@ async def _tts_pcm(text: str) -> bytes:
             audio_bytes += chunk
         return audio_bytes
 
-    return await asyncio.wait_for(_generate(), timeout=30.0)
+    # El SDK es sincrónico: en un hilo para que las oraciones del pipeline se sinteticen en paralelo
+    return await asyncio.wait_for(asyncio.to_thread(_generate), timeout=30.0)
+
+
+async def _llm_sentences(stream, sentences: SentenceAccumulator, pipeline: SpeechPipeline,
+                         request_id: str) -> AsyncIterator[str]:
+    """Oraciones de la respuesta en streaming a medida que se completan (hasta el tope)."""
+    deltas = _capped_deltas(stream, sentences, request_id)
+    try:
+        async for delta, accepted in deltas:
+            if delta:
+                pipeline.mark("llm_first_token")
+            for sentence in accepted:
+                yield sentence
+    finally:
+        await deltas.aclose()
+    if not sentences.sentences:
+        raise Exception("LLM returned empty response")
+
+
+async def _cached_sentences(text: str, sentences: SentenceAccumulator) -> AsyncIterator[str]:
+    for sentence in sentences.feed(text) + sentences.finish():
+        yield sentence
+
+
+async def _speak_pipelined(session_id: str, user_text: str, conv_id: str, project: Optional[str],
+                           category: Optional[str], started: float, stt_done: Optional[float] = None) -> Dict:
+    """
+    LLM → TTS → avatar en cadena por oración (SpeechPipeline): el avatar empieza a hablar
+    con la primera oración mientras el LLM sigue generando. El browser recibe el MP3 de
+    todas las oraciones entregadas. Una interrupción corta todo y devuelve lo ya hablado.
+    """
+    ws_connected = liveavatar_service.is_connected(session_id)
+    if not ws_connected:
+        logger.warning(f"No WS connection for session {session_id[:8]} — lip-sync unavailable")
+    lip_sync = ws_connected
+
+    async def synthesize(sentence: str) -> Tuple[bytes, Optional[bytes]]:
+        # MP3 (browser) y PCM (lip-sync) de la oración en paralelo
+        if ws_connected:
+            try:
+                mp3_bytes, pcm_bytes = await asyncio.gather(_tts_mp3(sentence), _tts_pcm(sentence))
+                return mp3_bytes, pcm_bytes
+            except Exception as e:
+                logger.warning(f"Parallel TTS failed, falling back to MP3 only: {e}")
+        return await _tts_mp3(sentence), None
+
+    async def deliver(index: int, audio: Tuple[bytes, Optional[bytes]]) -> None:
+        nonlocal lip_sync
+        pcm_bytes = audio[1]
+        if lip_sync and pcm_bytes:
+            try:
+                await liveavatar_service.speak(session_id, pcm_bytes)
+            except Exception as e:
+                # best-effort: sin WS no se reintenta en las oraciones siguientes
+                logger.warning(f"Avatar lip-sync failed (non-fatal): {e}")
+                lip_sync = False
+
+    pipeline = SpeechPipeline(synthesize, deliver, name=session_id[:8], started=started)
+    if stt_done is not None:
+        pipeline.mark("stt_done", at=stt_done)
+    # Registrado antes del primer await: un /liveavatar/interrupt durante la búsqueda en
+    # la KB o la apertura del stream también corta este turno
+    _speech_pipelines[session_id] = pipeline
+    sentences = SentenceAccumulator(max_sentences=5)
+    interrupted = False
+    try:
+        version, scope, cached, messages = await _prepare_valeria_turn(user_text, conv_id, project, category)
+        pipeline.mark("kb_ready")
+        if cached is not None:
+            source = _cached_sentences(cached, sentences)
+        else:
+            if pipeline.interrupted:
+                raise SpeechInterrupted(pipeline.name)
+            stream = await _open_llm_stream(messages)
+            if pipeline.interrupted:
+                # Interrumpido mientras se abría la conexión con el proveedor
+                await _close_llm_stream(stream)
+                raise SpeechInterrupted(pipeline.name)
+            source = _llm_sentences(stream, sentences, pipeline, conv_id[:8])
+        await pipeline.run(source)
+    except SpeechInterrupted:
+        interrupted = True
+        pipeline.mark("done")
+        logger.info(f"⏹️ Speech pipeline interrupted after {len(pipeline.results)} sentence(s) [{session_id[:8]}]")
+    finally:
+        if _speech_pipelines.get(session_id) is pipeline:
+            del _speech_pipelines[session_id]
+
+    if interrupted:
+        ai_response = " ".join(pipeline.sentences[:len(pipeline.results)])
+    else:
+        ai_response = sentences.text
+        if cached is None:
+            await _cache_answer(user_text, version, ai_response, scope)
+    mp3_bytes = b"".join(mp3 for mp3, _ in pipeline.results)
+    timings = pipeline.report()
+    logger.info(f"⏱️ Speech pipeline [{session_id[:8]}]: first avatar audio at {timings['first_avatar_ms']} ms, "
+                f"{len(pipeline.results)} sentence(s), total {timings['total_ms']} ms")
+    return {
+        "ai_response": ai_response,
+        "audio_url":   f"data:audio/mpeg;base64,{base64.b64encode(mp3_bytes).decode('utf-8')}",
+        "kb_version":  version,
+        "interrupted": interrupted,
+        "timings":     timings,
+    }
 
 
 @api_router.get("/liveavatar/config")
@@ -1580,11 +1714,10 @@ async def liveavatar_speak(request: SpeakRequest):
     Flujo completo voice → avatar:
     1. Decodifica audio base64 del frontend
     2. STT: ElevenLabs Scribe transcribe
-    3. LLM: Gemini genera respuesta con base de conocimientos
-    4. TTS: ElevenLabs Karla PCM 24kHz
-    5. Envía audio al avatar vía WebSocket → lip-sync
+    3-5. En cadena por oración: LLM (streaming) → TTS Karla MP3 + PCM 24kHz → avatar
+       vía WebSocket (lip-sync) mientras las oraciones siguientes se siguen generando
 
-    Retorna: transcribed_text, ai_response (para mostrar en historial)
+    Retorna: transcribed_text, ai_response (para mostrar en historial), timings por etapa
     """
     lock = _get_session_lock(request.session_id)
     # asyncio runs on a single thread — lock.locked() + acquire is effectively atomic
@@ -1609,6 +1742,7 @@ async def liveavatar_speak(request: SpeakRequest):
                 raise HTTPException(status_code=400, detail="Audio base64 inválido")
 
             logger.info(f"🎤 Received audio: {len(audio_bytes)} bytes for session {request.session_id[:8]}")
+            started = time.perf_counter()
 
             # Step 1: STT — run in thread pool to avoid blocking the async event loop
             # Pass filename so ElevenLabs can detect the format (webm/opus → ogg is compatible)
@@ -1621,6 +1755,7 @@ async def liveavatar_speak(request: SpeakRequest):
             transcription = await asyncio.to_thread(_do_stt)
             raw_text = transcription.text if hasattr(transcription, "text") else str(transcription)
             user_text = raw_text.strip()[:2000]  # cap transcription length to avoid LLM token overflow
+            stt_done = time.perf_counter()
             logger.info(f"📝 Transcribed: {user_text}")
 
             if not user_text:
@@ -1636,45 +1771,19 @@ async def liveavatar_speak(request: SpeakRequest):
                     detail="No se detectó voz. Hablá más cerca del micrófono y con voz clara."
                 )
 
-            # Step 2: LLM — usar texto sin paréntesis de ruido
-            conv_id     = request.conversation_id or str(uuid.uuid4())
-            ai_response = await _build_valeria_response(text_without_parens, conv_id)
-            logger.info(f"🤖 Response: {ai_response[:80]}...")
-
-            # Step 3: TTS — generate MP3 (browser) and optionally PCM (lip-sync) concurrently
-            ws_connected = liveavatar_service.is_connected(request.session_id)
-            if ws_connected:
-                try:
-                    mp3_bytes, pcm_bytes = await asyncio.gather(
-                        _tts_mp3(ai_response),
-                        _tts_pcm(ai_response),
-                    )
-                except Exception as e:
-                    logger.warning(f"Parallel TTS failed, falling back to MP3 only: {e}")
-                    mp3_bytes = await _tts_mp3(ai_response)
-                    pcm_bytes = None
-            else:
-                mp3_bytes = await _tts_mp3(ai_response)
-                pcm_bytes = None
-                logger.warning(f"No WS connection for session {request.session_id[:8]} — lip-sync unavailable")
-
-            audio_b64 = base64.b64encode(mp3_bytes).decode("utf-8")
-            audio_url = f"data:audio/mpeg;base64,{audio_b64}"
-            logger.info(f"🔊 MP3 audio: {len(mp3_bytes)} bytes")
-
-            # Step 4: Send PCM to avatar for lip-sync (best-effort)
-            if ws_connected and pcm_bytes:
-                try:
-                    await liveavatar_service.speak(request.session_id, pcm_bytes)
-                except Exception as e:
-                    logger.warning(f"Avatar lip-sync failed (non-fatal): {e}")
+            # Steps 2-4: LLM → TTS → avatar en cadena — usar texto sin paréntesis de ruido
+            conv_id = request.conversation_id or str(uuid.uuid4())
+            spoken = await _speak_pipelined(
+                request.session_id, text_without_parens, conv_id, request.project, request.category,
+                started=started, stt_done=stt_done,
+            )
+            logger.info(f"🤖 Response: {spoken['ai_response'][:80]}...")
 
             return {
                 "success":          True,
                 "transcribed_text": user_text,
-                "ai_response":      ai_response,
-                "audio_url":        audio_url,
                 "conversation_id":  conv_id,
+                **spoken,
             }
 
         except HTTPException:
@@ -1688,8 +1797,7 @@ async def liveavatar_speak(request: SpeakRequest):
 async def liveavatar_speak_text(request: TextSpeakRequest):
     """
     Modo texto: usuario escribe → avatar habla.
-    1. LLM genera respuesta
-    2. TTS PCM → avatar lip-sync
+    LLM (streaming) → TTS PCM → avatar lip-sync, en cadena por oración
     """
     lock = _get_session_lock(request.session_id)
     if lock.locked():
@@ -1703,42 +1811,17 @@ async def liveavatar_speak_text(request: TextSpeakRequest):
             user_text = request.text.strip()[:2000]  # cap input length
             if not user_text:
                 raise HTTPException(status_code=400, detail="El texto no puede estar vacío")
-            conv_id     = request.conversation_id or str(uuid.uuid4())
-            ai_response = await _build_valeria_response(user_text, conv_id)
-            logger.info(f"🤖 Text response: {ai_response[:80]}...")
-
-            # TTS — generate MP3 (browser) and optionally PCM (lip-sync) concurrently
-            ws_connected = liveavatar_service.is_connected(request.session_id)
-            if ws_connected:
-                try:
-                    mp3_bytes, pcm_bytes = await asyncio.gather(
-                        _tts_mp3(ai_response),
-                        _tts_pcm(ai_response),
-                    )
-                except Exception as e:
-                    logger.warning(f"Parallel TTS failed, falling back to MP3 only: {e}")
-                    mp3_bytes = await _tts_mp3(ai_response)
-                    pcm_bytes = None
-            else:
-                mp3_bytes = await _tts_mp3(ai_response)
-                pcm_bytes = None
-                logger.warning(f"No WS for text-speak session {request.session_id[:8]}")
-
-            audio_b64 = base64.b64encode(mp3_bytes).decode("utf-8")
-            audio_url = f"data:audio/mpeg;base64,{audio_b64}"
-
-            # Send PCM to avatar for lip-sync (best-effort)
-            if ws_connected and pcm_bytes:
-                try:
-                    await liveavatar_service.speak(request.session_id, pcm_bytes)
-                except Exception as e:
-                    logger.warning(f"Avatar lip-sync failed (non-fatal): {e}")
+            conv_id = request.conversation_id or str(uuid.uuid4())
+            spoken = await _speak_pipelined(
+                request.session_id, user_text, conv_id, request.project, request.category,
+                started=time.perf_counter(),
+            )
+            logger.info(f"🤖 Text response: {spoken['ai_response'][:80]}...")
 
             return {
                 "success":         True,
-                "ai_response":     ai_response,
-                "audio_url":       audio_url,
                 "conversation_id": conv_id,
+                **spoken,
             }
 
         except HTTPException:
@@ -1754,6 +1837,10 @@ async def liveavatar_interrupt(request: InterruptRequest):
     try:
         if not liveavatar_service:
             raise HTTPException(status_code=503, detail="LiveAvatar service not initialized")
+        # Cortar primero la generación en curso: si no, las oraciones pendientes seguirían llegando
+        pipeline = _speech_pipelines.get(request.session_id)
+        if pipeline is not None:
+            pipeline.cancel()
         await liveavatar_service.interrupt(request.session_id)
         return {"success": True}
     except Exception as e:
@@ -1789,13 +1876,16 @@ async def chat_with_knowledge_base(request: ChatRequest):
             raise HTTPException(status_code=400, detail="Message cannot be empty")
 
         conv_id     = request.conversation_id or str(uuid.uuid4())
-        ai_response = await _build_valeria_response(user_message, conv_id)
+        ai_response, kb_version = await _build_valeria_response(
+            user_message, conv_id, request.project, request.category
+        )
         logger.info(f"✅ Chat response: {ai_response[:100]}...")
 
         return {
             "message":         user_message,
             "response":        ai_response,
             "conversation_id": conv_id,
+            "kb_version":      kb_version,
         }
 
     except HTTPException:
@@ -1804,6 +1894,83 @@ async def chat_with_knowledge_base(request: ChatRequest):
         logger.error(f"Error in /chat: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error processing chat: {str(e)}")
 
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@api_router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Igual que /chat pero en Server-Sent Events, para mostrar la respuesta mientras se genera:
+    - event: delta  {"text"}  fragmentos del LLM a medida que llegan, hasta la 5ª oración
+    - event: done   {"response", "conversation_id", "kb_version", "cached"}  texto final
+      (el mismo que devolvería /chat; los fragmentos cortos descartados no están)
+    - event: error  {"detail"}  si el LLM falla con el stream ya empezado
+    """
+    user_message = request.message.strip()
+    if not user_message:
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
+    conv_id = request.conversation_id or str(uuid.uuid4())
+
+    version, scope, cached, messages = await _prepare_valeria_turn(
+        user_message, conv_id, request.project, request.category
+    )
+    stream = None
+    if cached is None:
+        # Se abre antes de responder: un rate limit todavía puede devolverse como 503
+        try:
+            stream = await _open_llm_stream(messages)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error in /chat/stream: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail=f"Error processing chat: {str(e)}")
+
+    def _done(answer: str) -> str:
+        return _sse("done", {
+            "response":        answer,
+            "conversation_id": conv_id,
+            "kb_version":      version,
+            "cached":          cached is not None,
+        })
+
+    async def events():
+        if cached is not None:
+            yield _sse("delta", {"text": cached})
+            yield _done(cached)
+            return
+        sentences = SentenceAccumulator(max_sentences=5)
+        unsent = ""       # texto crudo recibido y todavía no reenviado
+        forwarded = 0
+        deltas = _capped_deltas(stream, sentences, conv_id[:8])
+        try:
+            async for delta, _ in deltas:
+                unsent += delta
+                # De la última oración aceptada en adelante no se reenvía nada
+                allowed = sentences.forwardable() - forwarded
+                if allowed > 0:
+                    yield _sse("delta", {"text": unsent[:allowed]})
+                    forwarded += allowed
+                    unsent = unsent[allowed:]
+            if not sentences.text:
+                raise Exception("LLM returned empty response")
+        except Exception as e:
+            logger.error(f"Error in /chat/stream: {e}", exc_info=True)
+            yield _sse("error", {"detail": f"Error processing chat: {str(e)}"})
+            return
+        finally:
+            await deltas.aclose()
+        answer = sentences.text
+        logger.info(f"✅ Streamed chat response: {answer[:100]}...")
+        await _cache_answer(user_message, version, answer, scope)
+        yield _done(answer)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # ============================================================================
 # END LIVE AVATAR ENDPOINTS
 # ============================================================================
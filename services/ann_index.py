@@ -0,0 +1,229 @@
+"""
+ANN Index (IVF)
+Índice aproximado de vecinos más cercanos en NumPy puro: k-means esférico sobre
+los embeddings normalizados + listas invertidas. Una consulta solo compara contra
+los vectores de las nprobe listas cuyos centroides están más cerca.
+"""
+import hashlib
+import logging
+import math
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+
+def ids_fingerprint(ids: Iterable[str]) -> str:
+    """Hash de los ids de documento en orden de fila: cambia si se agrega, borra o reordena alguno."""
+    digest = hashlib.sha256()
+    for doc_id in ids:
+        digest.update(str(doc_id).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class IVFIndex:
+    """
+    Inverted File index para similitud coseno (vectores L2-normalizados).
+
+    - nlist:  cantidad de centroides/listas (regla práctica: ~4·√n)
+    - nprobe: listas visitadas por consulta (más = mejor recall, más latencia)
+    """
+
+    def __init__(self, dim: int, nlist: int = 64, nprobe: int = 8, seed: int = 0):
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        # Por lista: bloques agregados desde el último compact (add incremental barato)
+        self._pending_ids: List[List[np.ndarray]] = []
+        self._pending_vecs: List[List[np.ndarray]] = []
+        self._list_ids: List[np.ndarray] = []
+        self._list_vecs: List[np.ndarray] = []
+        self._dirty = False
+        self._lock = threading.Lock()   # add() en el loop vs save() en un hilo
+        self.ntotal = 0
+        # ids_fingerprint de los documentos indexados (fila i ↔ id i); se persiste con el índice
+        self.fingerprint = ""
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    # ──────────────────────────────────────────────
+    # Entrenamiento
+    # ──────────────────────────────────────────────
+    def train(self, vectors: np.ndarray, iterations: int = 20, sample_size: int = 50_000) -> None:
+        """K-means esférico (asignación por producto punto) sobre una muestra."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        rng = np.random.default_rng(self.seed)
+        if len(vectors) > sample_size:
+            vectors = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+        nlist = min(self.nlist, len(vectors))
+        if nlist == 0:
+            raise ValueError("Cannot train IVF index without vectors")
+
+        centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = self._assign(vectors, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, vectors)
+            counts = np.bincount(assign, minlength=nlist)
+            empty = counts == 0
+            if empty.any():
+                # Re-sembrar listas vacías con puntos al azar para no perder capacidad
+                sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = sums / norms
+
+        self.nlist = nlist
+        self.centroids = centroids.astype(np.float32)
+        self._pending_ids = [[] for _ in range(nlist)]
+        self._pending_vecs = [[] for _ in range(nlist)]
+        self._list_ids = [np.empty(0, dtype=np.int64) for _ in range(nlist)]
+        self._list_vecs = [np.empty((0, self.dim), dtype=np.float32) for _ in range(nlist)]
+        self.ntotal = 0
+        self._dirty = False
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, batch: int = 8192) -> np.ndarray:
+        """Centroide más cercano de cada vector, por lotes para acotar memoria."""
+        out = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), batch):
+            out[start:start + batch] = np.argmax(vectors[start:start + batch] @ centroids.T, axis=1)
+        return out
+
+    # ──────────────────────────────────────────────
+    # Altas y compactación
+    # ──────────────────────────────────────────────
+    def add(self, vectors: np.ndarray, ids: np.ndarray) -> None:
+        """Agrega vectores (ya normalizados) con sus ids externos."""
+        if not self.is_trained:
+            raise RuntimeError("IVF index must be trained before add()")
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.int64))
+        assign = self._assign(vectors, self.centroids)
+        with self._lock:
+            for list_no in np.unique(assign):
+                mask = assign == list_no
+                self._pending_ids[list_no].append(ids[mask])
+                self._pending_vecs[list_no].append(vectors[mask])
+            self.ntotal += len(ids)
+            self._dirty = True
+
+    def _compact(self) -> None:
+        if not self._dirty:
+            return
+        with self._lock:
+            self._compact_locked()
+
+    def _compact_locked(self) -> None:
+        for list_no in range(self.nlist):
+            if self._pending_ids[list_no]:
+                self._list_ids[list_no] = np.concatenate([self._list_ids[list_no], *self._pending_ids[list_no]])
+                self._list_vecs[list_no] = np.concatenate([self._list_vecs[list_no], *self._pending_vecs[list_no]])
+                self._pending_ids[list_no] = []
+                self._pending_vecs[list_no] = []
+        self._dirty = False
+
+    # ──────────────────────────────────────────────
+    # Búsqueda
+    # ──────────────────────────────────────────────
+    def search(self, query: np.ndarray, k: int, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Devuelve (ids, scores) de los k vecinos aproximados, score descendente."""
+        if not self.is_trained or self.ntotal == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        self._compact()
+        query = np.asarray(query, dtype=np.float32)
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+
+        cand_ids = np.concatenate([self._list_ids[i] for i in probe])
+        if len(cand_ids) == 0:
+            return cand_ids, np.empty(0, dtype=np.float32)
+        cand_vecs = np.concatenate([self._list_vecs[i] for i in probe])
+        scores = cand_vecs @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return cand_ids[top], scores[top]
+
+    # ──────────────────────────────────────────────
+    # Persistencia
+    # ──────────────────────────────────────────────
+    def save(self, path: str) -> None:
+        """Guarda centroides y listas en un .npz (escritura atómica vía archivo temporal)."""
+        if not self.is_trained:
+            raise RuntimeError("Cannot save an untrained IVF index")
+        with self._lock:
+            self._compact_locked()
+            list_ids, list_vecs = list(self._list_ids), list(self._list_vecs)
+        sizes = np.array([len(ids) for ids in list_ids], dtype=np.int64)
+        target = Path(path)
+        tmp = target.with_name(target.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                format_version=np.int64(FORMAT_VERSION),
+                params=np.array([self.dim, self.nlist, self.nprobe, self.seed], dtype=np.int64),
+                centroids=self.centroids,
+                sizes=sizes,
+                ids=np.concatenate(list_ids),
+                vectors=np.concatenate(list_vecs),
+                fingerprint=np.array(self.fingerprint),
+            )
+        tmp.replace(target)
+        logger.info(f"✅ IVF index saved: {int(sizes.sum())} vectors, {self.nlist} lists → {path}")
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        with np.load(path) as data:
+            if int(data["format_version"]) != FORMAT_VERSION:
+                raise ValueError(f"Unsupported IVF index format in {path}")
+            dim, nlist, nprobe, seed = (int(x) for x in data["params"])
+            index = cls(dim, nlist=nlist, nprobe=nprobe, seed=seed)
+            index.centroids = data["centroids"]
+            offsets = np.concatenate([[0], np.cumsum(data["sizes"])])
+            ids, vectors = data["ids"], data["vectors"]
+            # Índices guardados antes del fingerprint quedan vacíos → se consideran desactualizados
+            index.fingerprint = str(data["fingerprint"]) if "fingerprint" in data.files else ""
+        index._list_ids = [ids[offsets[i]:offsets[i + 1]] for i in range(nlist)]
+        index._list_vecs = [vectors[offsets[i]:offsets[i + 1]] for i in range(nlist)]
+        index._pending_ids = [[] for _ in range(nlist)]
+        index._pending_vecs = [[] for _ in range(nlist)]
+        index.ntotal = len(ids)
+        logger.info(f"✅ IVF index loaded: {index.ntotal} vectors, {nlist} lists ← {path}")
+        return index
+
+    @classmethod
+    def load_or_build(cls, path: Optional[str], vectors: np.ndarray, fingerprint: str,
+                      nprobe: int = 8) -> "IVFIndex":
+        """
+        Índice de `vectors` (fila i = id i): el persistido en `path` si su fingerprint
+        coincide con el de los documentos actuales; si no, se entrena de nuevo y se guarda.
+        """
+        n, dim = vectors.shape
+        if path and Path(path).exists():
+            try:
+                index = cls.load(path)
+                if index.fingerprint == fingerprint and index.ntotal == n and index.dim == dim:
+                    index.nprobe = nprobe
+                    return index
+                logger.info(f"IVF index at {path} is stale (documents changed since it was saved) — rebuilding")
+            except Exception as e:
+                logger.warning(f"Could not load IVF index from {path}: {e}")
+
+        index = cls(dim, nlist=max(1, int(4 * math.sqrt(n))), nprobe=nprobe)
+        index.train(vectors)
+        index.add(vectors, np.arange(n))
+        index.fingerprint = fingerprint
+        if path:
+            index.save(path)
+        return index
@@ -0,0 +1,303 @@
+"""
+Answer Cache
+Respuestas del LLM cacheadas por (pregunta normalizada, versión de la KB, modelo, alcance).
+Un acierto evita la llamada al LLM completa. Dos tiers de búsqueda:
+
+- exacto:  misma pregunta normalizada (sin tildes, signos ni saludos)
+- similar: opcional — Jaccard de términos contra las preguntas cacheadas con la misma
+           versión/modelo/alcance (p.ej. "cuánto cuesta el lote" ≈ "cuanto cuesta un lote")
+
+Persistido en SQLite con TTL y expulsión LRU; al arrancar se carga desde disco, así un
+reinicio o un worker nuevo no empiezan en frío. Las lecturas son solo en memoria.
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, NamedTuple, Optional, Set, Tuple
+
+from services.bm25_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Solo se descartan saludos y cortesías: a diferencia del cache de contexto, "no"/"si"
+# o "antes"/"despues" cambian la respuesta y tienen que formar parte de la clave
+FILLER_WORDS = frozenset("""
+    hola buenas buenos dias tardes noches gracias muchas favor porfa valeria
+""".split())
+
+MAX_QUESTION_CHARS = 500
+
+
+def normalize_question(question: str) -> str:
+    """'¡Hola Valeria! ¿Qué es la Posesión?' → 'que es la posesion'."""
+    return " ".join(t for t in tokenize(question[:MAX_QUESTION_CHARS]) if t not in FILLER_WORDS)
+
+
+class _Entry(NamedTuple):
+    question: str            # pregunta normalizada
+    kb_version: int
+    model: str
+    scope: str
+    answer: str
+    created: float           # epoch (time.time) — sobrevive a reinicios
+    terms: FrozenSet[str]
+
+
+class AnswerCache:
+    """
+    - db_path:              archivo SQLite (None = solo memoria)
+    - max_items:            entradas en memoria y en disco; se descarta la de uso más antiguo
+    - ttl_seconds:          vida de cada respuesta (0 = sin vencimiento)
+    - similarity_threshold: Jaccard mínimo del tier similar (0 = solo coincidencia exacta)
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_items: int = 2000, ttl_seconds: float = 86400.0,
+                 similarity_threshold: float = 0.0):
+        self.db_path = db_path
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # término → claves que lo contienen (candidatos del tier similar)
+        self._postings: Dict[str, Set[str]] = {}
+        # clave → (último uso, aciertos nuevos) pendientes de bajar a SQLite
+        self._touched: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()      # estructuras en memoria (lo único que toca get)
+        self._db_lock = threading.Lock()   # conexión SQLite: las escrituras no frenan las lecturas
+        self._conn: Optional[sqlite3.Connection] = None
+        self._exact_hits = 0
+        self._similar_hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evicted = 0
+        if db_path:
+            self._init_disk()
+
+    def _init_disk(self) -> None:
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS respuestas (
+                clave TEXT PRIMARY KEY,
+                pregunta TEXT NOT NULL,
+                kb_version INTEGER NOT NULL,
+                modelo TEXT NOT NULL,
+                scope TEXT NOT NULL,
+                respuesta TEXT NOT NULL,
+                creado REAL NOT NULL,
+                usado REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_respuestas_usado ON respuestas(usado)')
+        logger.info(f"✅ Answer cache ready at {self.db_path}")
+
+    @staticmethod
+    def key(question: str, kb_version: int, model: str, scope: str = "") -> str:
+        """Hash de la pregunta normalizada + versión + modelo + alcance."""
+        return hashlib.sha256(f"{question}\0{kb_version}\0{model}\0{scope}".encode("utf-8")).hexdigest()
+
+    # ──────────────────────────────────────────────
+    # Lectura (solo memoria)
+    # ──────────────────────────────────────────────
+    def get(self, question: str, kb_version: int, model: str, scope: str = "") -> Optional[str]:
+        normalized = normalize_question(question)
+        if not normalized:
+            return None
+        key = self.key(normalized, kb_version, model, scope)
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is not None:
+                self._exact_hits += 1
+            elif self.similarity_threshold > 0:
+                key = self._similar_key(frozenset(normalized.split()), kb_version, model, scope)
+                entry = self._entries[key] if key is not None else None
+                if entry is not None:
+                    self._similar_hits += 1
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            _, hits = self._touched.get(key, (0.0, 0))
+            self._touched[key] = (time.time(), hits + 1)
+            return entry.answer
+
+    def _expired_entry(self, entry: _Entry, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - entry.created > self.ttl_seconds
+
+    def _live_entry(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None and self._expired_entry(entry, time.time()):
+            self._drop(key)
+            self._expired += 1
+            return None
+        return entry
+
+    def _similar_key(self, terms: FrozenSet[str], kb_version: int, model: str, scope: str) -> Optional[str]:
+        """Clave de la pregunta cacheada más parecida sobre el umbral (mismo version/modelo/alcance)."""
+        candidates: Set[str] = set()
+        for term in terms:
+            candidates |= self._postings.get(term, set())
+        best, best_score = None, self.similarity_threshold
+        for key in candidates:
+            entry = self._entries[key]
+            if entry.kb_version != kb_version or entry.model != model or entry.scope != scope:
+                continue
+            score = len(terms & entry.terms) / len(terms | entry.terms)
+            if score >= best_score and (best is None or score > best_score):
+                best, best_score = key, score
+        if best is not None and self._live_entry(best) is None:
+            return None
+        return best
+
+    # ──────────────────────────────────────────────
+    # Escritura
+    # ──────────────────────────────────────────────
+    def put(self, question: str, kb_version: int, model: str, answer: str, scope: str = "") -> None:
+        """Guarda en memoria y en SQLite (bloqueante: desde async usar asyncio.to_thread)."""
+        normalized = normalize_question(question)
+        if not normalized or not answer:
+            return   # pregunta sin términos útiles — no se cachea
+        key = self.key(normalized, kb_version, model, scope)
+        now = time.time()
+        entry = _Entry(normalized, kb_version, model, scope, answer, now, frozenset(normalized.split()))
+        row = (key, normalized, kb_version, model, scope, answer, now, now)
+        with self._lock:
+            self._add(key, entry)
+            evicted = self._evict_memory()
+            touched, self._touched = self._touched, {}
+        with self._db_lock:
+            if self._conn is None:
+                return
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute('''
+                    INSERT OR REPLACE INTO respuestas
+                        (clave, pregunta, kb_version, modelo, scope, respuesta, creado, usado, hits)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)
+                ''', row)
+                if evicted:
+                    self._conn.executemany('DELETE FROM respuestas WHERE clave = ?', ((k,) for k in evicted))
+                self._flush_touched(touched)
+                self._evict_disk()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                self._restore_touched(touched)
+                raise
+
+    def _add(self, key: str, entry: _Entry) -> None:
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = entry
+        for term in entry.terms:
+            self._postings.setdefault(term, set()).add(key)
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._touched.pop(key, None)
+        for term in entry.terms:
+            keys = self._postings.get(term)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[term]
+
+    def _evict_memory(self) -> list:
+        evicted = []
+        while len(self._entries) > self.max_items:
+            key = next(iter(self._entries))
+            self._drop(key)
+            evicted.append(key)
+            self._evicted += 1
+        return evicted
+
+    def _flush_touched(self, touched: Dict[str, Tuple[float, int]]) -> None:
+        if touched:
+            self._conn.executemany(
+                'UPDATE respuestas SET usado = ?, hits = hits + ? WHERE clave = ?',
+                ((used, hits, key) for key, (used, hits) in touched.items()),
+            )
+
+    def _restore_touched(self, touched: Dict[str, Tuple[float, int]]) -> None:
+        """Devuelve a pendientes los usos que no llegaron a disco (sumados a los nuevos)."""
+        with self._lock:
+            for key, (used, hits) in touched.items():
+                if key in self._entries:
+                    newer_used, newer_hits = self._touched.get(key, (used, 0))
+                    self._touched[key] = (max(used, newer_used), hits + newer_hits)
+
+    def _evict_disk(self) -> None:
+        count = self._conn.execute('SELECT COUNT(*) FROM respuestas').fetchone()[0]
+        excess = count - self.max_items
+        if excess > 0:
+            self._conn.execute('''
+                DELETE FROM respuestas WHERE clave IN (
+                    SELECT clave FROM respuestas ORDER BY usado LIMIT ?
+                )
+            ''', (excess,))
+
+    # ──────────────────────────────────────────────
+    # Arranque / ciclo de vida
+    # ──────────────────────────────────────────────
+    def warm(self) -> int:
+        """Borra lo vencido en disco y carga en memoria las max_items de uso más reciente."""
+        if self._conn is None:
+            return 0
+        started = time.perf_counter()
+        expired = 0
+        with self._db_lock:
+            if self.ttl_seconds:
+                cursor = self._conn.execute('DELETE FROM respuestas WHERE creado < ?',
+                                            (time.time() - self.ttl_seconds,))
+                expired = max(cursor.rowcount, 0)
+            rows = self._conn.execute('''
+                SELECT clave, pregunta, kb_version, modelo, scope, respuesta, creado
+                FROM respuestas ORDER BY usado DESC LIMIT ?
+            ''', (self.max_items,)).fetchall()
+        with self._lock:
+            self._expired += expired
+            # Del menos al más reciente: el orden del OrderedDict queda como el LRU
+            for key, question, kb_version, model, scope, answer, created in reversed(rows):
+                self._add(key, _Entry(question, kb_version, model, scope, answer, created,
+                                      frozenset(question.split())))
+            loaded = len(self._entries)
+        logger.info(f"✅ Answer cache warmed: {loaded} answers in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return loaded
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._postings.clear()
+            self._touched.clear()
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.execute('DELETE FROM respuestas')
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits = self._exact_hits + self._similar_hits
+            lookups = hits + self._misses
+            return {
+                "items": len(self._entries),
+                "exact_hits": self._exact_hits,
+                "similar_hits": self._similar_hits,
+                "misses": self._misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "expired": self._expired,
+                "evicted": self._evicted,
+                "similarity_threshold": self.similarity_threshold,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        with self._db_lock:
+            if self._conn is not None:
+                self._flush_touched(touched)
+                self._conn.close()
+                self._conn = None
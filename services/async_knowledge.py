@@ -0,0 +1,176 @@
+"""
+Async Knowledge Base
+Fachada asíncrona sobre SQLiteKnowledgeBase: cada operación corre en un executor
+dedicado y acotado, así una consulta lenta nunca bloquea el event loop.
+"""
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from services.sqlite_knowledge import SQLiteKnowledgeBase
+
+logger = logging.getLogger(__name__)
+
+
+class KnowledgeBaseBusyError(Exception):
+    """La cola del executor está llena — el llamador debe reintentar más tarde."""
+
+
+class AsyncKnowledgeBase:
+    """
+    Ejecuta las operaciones de SQLiteKnowledgeBase en un ThreadPoolExecutor propio.
+
+    - max_workers: hilos del executor (cada uno con su conexión de lectura SQLite)
+    - max_queue:   trabajos en espera admitidos antes de rechazar con KnowledgeBaseBusyError
+    - timeout:     segundos máximos que el llamador espera cada operación
+    """
+
+    def __init__(
+        self,
+        kb: SQLiteKnowledgeBase,
+        max_workers: int = 4,
+        max_queue: int = 64,
+        timeout: float = 5.0,
+    ):
+        self.kb = kb
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kb")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._max_queued = 0
+        self._completed = 0
+        self._errors = 0
+        self._timeouts = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._run_total = 0.0
+        logger.info(f"✅ Async KnowledgeBase ready (workers={max_workers}, queue={max_queue})")
+
+    # ──────────────────────────────────────────────
+    # Executor
+    # ──────────────────────────────────────────────
+    def _release(self, slot: List[bool]) -> None:
+        """Libera el lugar en la cola una sola vez: al arrancar el trabajo o al terminar/cancelarse su future."""
+        with self._lock:
+            if slot[0]:
+                slot[0] = False
+                self._queued -= 1
+
+    def _call(self, fn: Callable, submitted: float, slot: List[bool]) -> Any:
+        started = time.perf_counter()
+        self._release(slot)
+        with self._lock:
+            self._running += 1
+            self._wait_total += started - submitted
+        try:
+            result = fn()
+            with self._lock:
+                self._completed += 1
+            return result
+        except Exception:
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._run_total += time.perf_counter() - started
+
+    async def arun(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Ejecuta fn(*args, **kwargs) en el executor, con límite de cola y timeout."""
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                raise KnowledgeBaseBusyError(f"Knowledge base queue full ({self._queued} pending)")
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+
+        # Un trabajo cancelado mientras espera en la cola (timeout, cliente desconectado) nunca
+        # llega a _call: el done callback del future libera su lugar igual
+        slot = [True]
+        job = functools.partial(self._call, functools.partial(fn, *args, **kwargs), time.perf_counter(), slot)
+        try:
+            submitted = self._executor.submit(job)
+        except Exception:
+            self._release(slot)
+            raise
+        submitted.add_done_callback(lambda _: self._release(slot))
+        future = asyncio.wrap_future(submitted)
+        try:
+            return await asyncio.wait_for(future, self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            # El hilo sigue hasta terminar la consulta; solo el llamador deja de esperar
+            with self._lock:
+                self._timeouts += 1
+            logger.warning(f"KB operation {getattr(fn, '__name__', fn)} timed out")
+            raise
+
+    def metrics(self) -> Dict[str, Any]:
+        """Profundidad de cola y contadores para /diagnostics."""
+        with self._lock:
+            finished = self._completed + self._errors
+            return {
+                "workers": self.max_workers,
+                "queued": self._queued,
+                "running": self._running,
+                "max_queued": self._max_queued,
+                "completed": self._completed,
+                "errors": self._errors,
+                "timeouts": self._timeouts,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._wait_total / finished * 1000, 2) if finished else 0.0,
+                "avg_run_ms": round(self._run_total / finished * 1000, 2) if finished else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        logger.info("✅ Async KnowledgeBase executor stopped")
+
+    # ──────────────────────────────────────────────
+    # API asíncrona
+    # ──────────────────────────────────────────────
+    async def asearch(self, query: str, top_k: int = 3) -> List[Dict]:
+        return await self.arun(self.kb.search, query, top_k)
+
+    async def aadd_document(self, titulo: str, contenido: str, metadata: Optional[Dict] = None,
+                            chunked: bool = False, on_duplicate: str = "skip",
+                            near_duplicates: bool = False) -> int:
+        return await self.arun(self.kb.add_document, titulo, contenido, metadata, chunked, on_duplicate,
+                               near_duplicates)
+
+    async def aadd_documents(self, documents: List[Dict], batch_size: int = 1000,
+                             on_duplicate: str = "skip", report=None, near_duplicates: bool = False) -> List[int]:
+        return await self.arun(self.kb.add_documents, documents, batch_size, on_duplicate, report,
+                               near_duplicates)
+
+    async def asemantic_search(self, query_vector, top_k: int = 3) -> List[Dict]:
+        return await self.arun(self.kb.semantic_search, query_vector, top_k)
+
+    async def aset_embeddings(self, items, dtype: Optional[str] = None) -> int:
+        return await self.arun(self.kb.set_embeddings, items, dtype)
+
+    async def alist_documents(self, after_id: int = 0, limit: int = 50,
+                              preview_chars: Optional[int] = 200):
+        return await self.arun(self.kb.list_documents, after_id, limit, preview_chars)
+
+    async def aget_all_documents_full(self) -> List[Dict]:
+        return await self.arun(self.kb.get_all_documents_full)
+
+    async def aget_all_documents(self) -> List[Dict]:
+        return await self.arun(self.kb.get_all_documents)
+
+    async def acount_documents(self) -> int:
+        return await self.arun(self.kb.count_documents)
+
+    async def aclear_database(self) -> None:
+        return await self.arun(self.kb.clear_database)
+
+    async def arefresh_index(self) -> None:
+        return await self.arun(self.kb.refresh_index)
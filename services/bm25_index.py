@@ -0,0 +1,143 @@
+"""
+BM25 Inverted Index
+Índice invertido en memoria (término → postings) para la búsqueda por palabras clave
+"""
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+_TOKEN_RE = re.compile(r'\w+')
+_COMBINING_RE = re.compile('[\u0300-\u036f]')
+
+
+def fold_accents(text: str) -> str:
+    """Minúsculas y sin tildes: 'Posesión' → 'posesion' (la ñ también pasa a n)."""
+    lowered = text.lower()
+    if lowered.isascii():
+        return lowered
+    return _COMBINING_RE.sub('', unicodedata.normalize('NFKD', lowered))
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokens normalizados de al menos 2 caracteres."""
+    return [t for t in _TOKEN_RE.findall(fold_accents(text)) if len(t) >= 2]
+
+
+def score_postings(postings: Iterable[Tuple[Sequence[int], Sequence[int]]], lengths: Sequence[int],
+                   n_docs: int, avg_len: float, k1: float = 1.2, b: float = 0.75,
+                   alive: Optional[Sequence[int]] = None) -> Dict[int, float]:
+    """
+    Acumula BM25 por número interno de documento. `postings` trae, por término de la
+    consulta, los arrays paralelos (números de documento, frecuencias). Lo comparten
+    BM25Index y el bundle mapeado con mmap (services/kb_bundle.py).
+    """
+    scores: Dict[int, float] = {}
+    for slots, tfs in postings:
+        # df incluye tombstones hasta la próxima reconstrucción — aproximación aceptable
+        df = len(slots)
+        idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+        for slot, tf in zip(slots, tfs):
+            if alive is not None and not alive[slot]:
+                continue
+            norm = k1 * (1.0 - b + b * lengths[slot] / avg_len)
+            scores[slot] = scores.get(slot, 0.0) + idf * tf * (k1 + 1.0) / (tf + norm)
+    return scores
+
+
+class BM25Index:
+    """
+    Índice invertido compacto con scoring BM25.
+
+    Cada documento recibe un número interno secuencial (posición en los arrays).
+    Por término se guardan dos arrays paralelos: números de documento y frecuencias.
+    Las bajas se marcan con tombstone y se compactan al reconstruir.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._doc_ids = array('q')      # número interno → id en SQLite
+        self._doc_lengths = array('I')  # número interno → cantidad de tokens
+        self._alive = bytearray()       # número interno → 1 vivo / 0 borrado
+        self._slot_by_id: Dict[int, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._slot_by_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
+
+    def add(self, doc_id: int, text: str) -> None:
+        """Indexa (o reindexa) un documento."""
+        tokens = tokenize(text)
+        with self._lock:
+            self._add_locked(doc_id, tokens)
+
+    def add_many(self, docs: Iterable[Tuple[int, str]]) -> None:
+        """Indexa un lote tomando el lock una sola vez."""
+        tokenized = [(doc_id, tokenize(text)) for doc_id, text in docs]
+        with self._lock:
+            for doc_id, tokens in tokenized:
+                self._add_locked(doc_id, tokens)
+
+    def _add_locked(self, doc_id: int, tokens: List[str]) -> None:
+        if doc_id in self._slot_by_id:
+            self._remove_locked(doc_id)
+        slot = len(self._doc_ids)
+        self._doc_ids.append(doc_id)
+        self._doc_lengths.append(len(tokens))
+        self._alive.append(1)
+        self._slot_by_id[doc_id] = slot
+        self._total_length += len(tokens)
+
+        freqs: Dict[str, int] = {}
+        for t in tokens:
+            freqs[t] = freqs.get(t, 0) + 1
+        for term, tf in freqs.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = (array('I'), array('I'))
+                self._postings[term] = postings
+            postings[0].append(slot)
+            postings[1].append(tf)
+
+    def remove(self, doc_id: int) -> None:
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: int) -> None:
+        slot = self._slot_by_id.pop(doc_id, None)
+        if slot is None:
+            return
+        self._alive[slot] = 0
+        self._total_length -= self._doc_lengths[slot]
+
+    def search(self, query: str, top_k: int = 3) -> List[Tuple[int, float]]:
+        """
+        Devuelve [(doc_id, score)] ordenado por score descendente.
+        Solo recorre los postings de los términos de la consulta.
+        """
+        # Cap query length — mismo límite que _keyword_score
+        terms = set(tokenize(query[:500]))
+        n_docs = len(self._slot_by_id)
+        if not terms or n_docs == 0:
+            return []
+
+        avg_len = self._total_length / n_docs if n_docs else 1.0
+        postings = (self._postings[t] for t in terms if t in self._postings)
+        scores = score_postings(postings, self._doc_lengths, n_docs, avg_len,
+                                self.k1, self.b, alive=self._alive)
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [(self._doc_ids[slot], score) for slot, score in best]
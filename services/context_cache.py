@@ -0,0 +1,94 @@
+"""
+Context Cache
+Cache LRU + TTL del bloque de contexto armado para el LLM. La clave es la consulta
+normalizada (minúsculas, sin tildes, sin stopwords) más la versión de la KB (y el
+alcance: shards consultados), así las variantes de una misma pregunta frecuente
+reutilizan la búsqueda y el armado.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from services.bm25_index import tokenize
+
+# Stopwords del español (ya sin tildes, como las deja tokenize)
+SPANISH_STOPWORDS = frozenset("""
+    a al algo algun alguna algunas alguno algunos ante antes como con contra cual cuales
+    cuando de del desde donde durante e el ella ellas ellos en entre era es esa esas ese
+    eso esos esta estan estas este esto estos fue ha hay la las le les lo los mas me mi
+    mis muy ni no nos o os otra otro para pero por porque que se sea ser si sin sobre su
+    sus te tiene tu tus un una uno unos y ya yo usted ustedes puedo puede quiero quisiera
+    hola buenas buenos dias tardes noches favor gracias seria saber
+""".split())
+
+
+def normalize_query(query: str) -> str:
+    """'¿Qué es la Posesión legítima?' → 'posesion legitima'."""
+    return " ".join(t for t in tokenize(query[:500]) if t not in SPANISH_STOPWORDS)
+
+
+class ContextCache:
+    """
+    - max_items:   entradas máximas; al superarlo se descarta la de uso más antiguo
+    - ttl_seconds: vida de cada entrada (0 = sin vencimiento)
+    """
+
+    def __init__(self, max_items: int = 512, ttl_seconds: float = 600.0):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, int, str], Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evicted = 0
+
+    @staticmethod
+    def key(query: str, kb_version: int, scope: str = "") -> Tuple[str, int, str]:
+        return normalize_query(query), kb_version, scope
+
+    def get(self, query: str, kb_version: int, scope: str = "") -> Optional[str]:
+        key = self.key(query, kb_version, scope)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds and now - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                self._expired += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def put(self, query: str, kb_version: int, context: str, scope: str = "") -> None:
+        key = self.key(query, kb_version, scope)
+        if not key[0]:
+            return   # consulta sin términos útiles — no se cachea
+        with self._lock:
+            self._entries[key] = (time.monotonic(), context)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+                self._evicted += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "items": len(self._entries),
+                "max_items": self.max_items,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "expired": self._expired,
+                "evicted": self._evicted,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,170 @@
+"""
+Deduplicación de documentos
+Huella del contenido normalizado (duplicados exactos aunque cambien espacios,
+mayúsculas, tildes o asteriscos de markdown) y MinHash sobre shingles de palabras
+con LSH por bandas para los casi duplicados. numpy es opcional: solo acelera el
+cálculo de las firmas (mismo resultado con y sin numpy).
+"""
+import hashlib
+import os
+import random
+import re
+import struct
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from services.bm25_index import fold_accents, tokenize
+
+try:
+    import numpy as np
+except ImportError:   # sin numpy las firmas se calculan en Python puro
+    np = None
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_MERSENNE_61 = (1 << 61) - 1
+
+NUM_PERM = 64             # valores de 32 bits por firma (256 bytes en SQLite)
+LSH_BANDS = 8             # 8 bandas × 8 filas: ~99% de los pares con similitud 0.9 son candidatos
+SHINGLE_SIZE = 3          # shingles de 3 palabras
+NEAR_DUP_MIN_TOKENS = 10  # textos más cortos solo se comparan por huella exacta
+
+# Similitud Jaccard estimada a partir de la cual dos documentos se consideran el mismo
+NEAR_DUP_THRESHOLD = float(os.getenv("KB_NEAR_DUP_THRESHOLD", "0.9"))
+
+
+def normalize_content(text: str) -> str:
+    """Texto canónico para la huella: sin markdown, minúsculas, sin tildes y espacios colapsados."""
+    return _WHITESPACE_RE.sub(' ', fold_accents(text.replace('*', ''))).strip()
+
+
+def fingerprint(text: str) -> str:
+    """sha256 del contenido normalizado."""
+    return hashlib.sha256(normalize_content(text).encode('utf-8')).hexdigest()
+
+
+def _shingle_hashes(tokens: Sequence[str], size: int = SHINGLE_SIZE) -> set:
+    if len(tokens) <= size:
+        grams = [' '.join(tokens)]
+    else:
+        grams = (' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1))
+    return {int.from_bytes(hashlib.blake2b(g.encode('utf-8'), digest_size=4).digest(), 'little') for g in grams}
+
+
+def _permutations(seed: int = 1) -> List[Tuple[int, int]]:
+    # a, b y los hashes de 32 bits: a·x + b entra en un uint64 (camino numpy)
+    rng = random.Random(seed)
+    return [(rng.randrange(1, 1 << 32), rng.randrange(0, 1 << 32)) for _ in range(NUM_PERM)]
+
+
+_SIGNATURE = struct.Struct(f"<{NUM_PERM}I")
+_PERMUTATIONS = _permutations()
+if np is not None:
+    _PERM_A = np.array([a for a, _ in _PERMUTATIONS], dtype=np.uint64)[:, None]
+    _PERM_B = np.array([b for _, b in _PERMUTATIONS], dtype=np.uint64)[:, None]
+
+
+def minhash(text: str) -> Optional[bytes]:
+    """
+    Firma MinHash empaquetada (familia (a·x + b) mod 2^61 − 1, 32 bits por valor),
+    o None si el texto es demasiado corto para compararlo por similitud.
+    """
+    tokens = tokenize(text)
+    if len(tokens) < NEAR_DUP_MIN_TOKENS:
+        return None
+    hashes = _shingle_hashes(tokens)
+    if np is not None:
+        x = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))[None, :]
+        values = ((_PERM_A * x + _PERM_B) % np.uint64(_MERSENNE_61)).min(axis=1) & np.uint64(0xFFFFFFFF)
+        return values.astype('<u4').tobytes()
+    p = _MERSENNE_61
+    return _SIGNATURE.pack(*(min((a * h + b) % p for h in hashes) & 0xFFFFFFFF for a, b in _PERMUTATIONS))
+
+
+def similarity(a: bytes, b: bytes) -> float:
+    """Jaccard estimado: fracción de posiciones iguales entre dos firmas."""
+    return sum(1 for x, y in zip(_SIGNATURE.unpack(a), _SIGNATURE.unpack(b)) if x == y) / NUM_PERM
+
+
+def valid_signature(blob: Optional[bytes]) -> bool:
+    """False para firmas vacías (texto corto) o de otra configuración de NUM_PERM."""
+    return blob is not None and len(blob) == _SIGNATURE.size
+
+
+class NearDuplicateIndex:
+    """
+    LSH por bandas: dos firmas son candidatas si coinciden en alguna banda completa;
+    después se confirma con la similitud estimada sobre la firma entera.
+    """
+
+    def __init__(self, threshold: float = NEAR_DUP_THRESHOLD, bands: int = LSH_BANDS):
+        self.threshold = threshold
+        self.bands = bands
+        # Por banda: hash de los bytes de la banda → ids (una colisión solo suma un candidato)
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[int, bytes] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, signature: bytes):
+        width = len(signature) // self.bands
+        for band in range(self.bands):
+            yield band, hash(signature[band * width:(band + 1) * width])
+
+    def add(self, doc_id: int, signature: bytes) -> None:
+        self._signatures[doc_id] = signature
+        for band, key in self._band_keys(signature):
+            self._buckets[band].setdefault(key, []).append(doc_id)
+
+    def query(self, signature: bytes) -> Optional[Tuple[int, float]]:
+        """(doc_id, similitud) del candidato más parecido sobre el umbral, o None."""
+        candidates = set()
+        for band, key in self._band_keys(signature):
+            candidates.update(self._buckets[band].get(key, ()))
+        best = None
+        for doc_id in candidates:
+            score = similarity(signature, self._signatures[doc_id])
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (doc_id, score)
+        return best
+
+
+@dataclass
+class DedupReport:
+    """
+    Resultado de una ingesta con deduplicación.
+
+    - exact: (titulo descartado, id existente)
+    - near:  (titulo descartado, id existente, similitud estimada) — solo con near_duplicates=True
+    - similar: (titulo insertado, id existente, similitud estimada) — casi duplicados que
+               se insertaron igual (por defecto solo se informan: pueden diferir en algo sustancial)
+    - merged: ids existentes cuya metadata absorbió la de un duplicado (modo "merge")
+    """
+    inserted: int = 0
+    exact: List[Tuple[str, int]] = field(default_factory=list)
+    near: List[Tuple[str, int, float]] = field(default_factory=list)
+    similar: List[Tuple[str, int, float]] = field(default_factory=list)
+    merged: List[int] = field(default_factory=list)
+
+    @property
+    def dropped(self) -> int:
+        return len(self.exact) + len(self.near)
+
+    def summary(self) -> Dict:
+        return {
+            "inserted": self.inserted,
+            "dropped": self.dropped,
+            "exact_duplicates": len(self.exact),
+            "near_duplicates": len(self.near),
+            "similar_inserted": len(self.similar),
+            "merged": len(set(self.merged)),
+        }
+
+    def lines(self) -> List[str]:
+        """Detalle legible de lo descartado y de lo insertado que se parece a algo existente."""
+        out = [f"= '{titulo[:60]}' → duplicado exacto de ID {doc_id}" for titulo, doc_id in self.exact]
+        out += [f"≈ '{titulo[:60]}' → casi duplicado de ID {doc_id} ({score:.0%})"
+                for titulo, doc_id, score in self.near]
+        out += [f"~ '{titulo[:60]}' → insertado, similar a ID {doc_id} ({score:.0%}) — revisar"
+                for titulo, doc_id, score in self.similar]
+        return out
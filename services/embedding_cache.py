@@ -0,0 +1,184 @@
+"""
+Embedding Cache
+Cache de embeddings por hash de contenido: LRU en memoria + tier persistente en SQLite.
+Las preguntas repetidas y los documentos re-ingestados no vuelven a pasar por el modelo.
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    - max_memory_items: entradas en el LRU en memoria
+    - max_disk_items:   entradas en SQLite; al superarlo se borran las de uso más antiguo
+    - db_path:          None = solo memoria
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        db_path: Optional[str] = None,
+        max_memory_items: int = 10_000,
+        max_disk_items: int = 200_000,
+    ):
+        self.model_name = model_name
+        self.db_path = db_path
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # clave → último uso pendiente de bajar a SQLite (las lecturas no escriben en disco)
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        if db_path:
+            self._init_disk()
+
+    def _init_disk(self) -> None:
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                clave TEXT PRIMARY KEY,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_embedding_cache_used ON embedding_cache(last_used)')
+        logger.info(f"✅ Embedding cache ready at {self.db_path}")
+
+    def key(self, text: str) -> str:
+        """Hash del contenido + modelo: cambiar de modelo invalida el cache."""
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    # ──────────────────────────────────────────────
+    # Lectura
+    # ──────────────────────────────────────────────
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        keys = [self.key(t) for t in texts]
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+        with self._lock:
+            for i, k in enumerate(keys):
+                vec = self._memory.get(k)
+                if vec is not None:
+                    self._memory.move_to_end(k)
+                    self._memory_hits += 1
+                    results[i] = vec
+                else:
+                    missing.setdefault(k, []).append(i)
+
+            if missing and self._conn is not None:
+                found = self._read_disk(list(missing))
+                for k, vec in found.items():
+                    for i in missing.pop(k):
+                        results[i] = vec
+                        self._disk_hits += 1
+                    self._remember(k, vec)
+            self._misses += sum(len(idx) for idx in missing.values())
+        return results
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        return self.get_many([text])[0]
+
+    def _read_disk(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        # Lotes de 500 para no superar el límite de parámetros de SQLite
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f'SELECT clave, vector FROM embedding_cache WHERE clave IN ({placeholders})', batch
+            ).fetchall()
+            for k, blob in rows:
+                found[k] = np.frombuffer(blob, dtype=np.float32)
+        now = time.time()
+        for k in found:
+            self._touched[k] = now
+        return found
+
+    # ──────────────────────────────────────────────
+    # Escritura
+    # ──────────────────────────────────────────────
+    def put_many(self, texts: Sequence[str], vectors: Sequence[np.ndarray]) -> None:
+        now = time.time()
+        rows = []
+        with self._lock:
+            for text, vec in zip(texts, vectors):
+                vec = np.asarray(vec, dtype=np.float32)
+                k = self.key(text)
+                self._remember(k, vec)
+                rows.append((k, vec.shape[0], vec.tobytes(), now))
+            if self._conn is None or not rows:
+                return
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO embedding_cache (clave, dim, vector, last_used) VALUES (?, ?, ?, ?)',
+                    rows
+                )
+                self._flush_touched()
+                self._evict_disk()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._touched.clear()
+
+    def put(self, text: str, vector: np.ndarray) -> None:
+        self.put_many([text], [vector])
+
+    def _remember(self, k: str, vec: np.ndarray) -> None:
+        self._memory[k] = vec
+        self._memory.move_to_end(k)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _flush_touched(self) -> None:
+        if self._touched:
+            self._conn.executemany(
+                'UPDATE embedding_cache SET last_used = ? WHERE clave = ?',
+                ((used, k) for k, used in self._touched.items()),
+            )
+
+    def _evict_disk(self) -> None:
+        count = self._conn.execute('SELECT COUNT(*) FROM embedding_cache').fetchone()[0]
+        excess = count - self.max_disk_items
+        if excess > 0:
+            self._conn.execute('''
+                DELETE FROM embedding_cache WHERE clave IN (
+                    SELECT clave FROM embedding_cache ORDER BY last_used LIMIT ?
+                )
+            ''', (excess,))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._memory_hits + self._disk_hits + self._misses
+            return {
+                "memory_items": len(self._memory),
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round((self._memory_hits + self._disk_hits) / lookups, 3) if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._flush_touched()
+                self._touched.clear()
+                self._conn.close()
+                self._conn = None
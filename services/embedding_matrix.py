@@ -0,0 +1,201 @@
+"""
+Embedding Matrix
+Embeddings guardados como BLOB binario en SQLite (float32, o int8 con factor de escala)
+y matriz en memoria armada sin parseo JSON: np.frombuffer sobre los BLOBs, o mmap de
+un archivo sidecar .npy cuando ya está al día con la base.
+"""
+import logging
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DTYPES = ("float32", "int8")
+
+# Cabecera de 4 bytes: el payload float32 queda alineado a 4 bytes dentro del BLOB.
+# int8: cabecera + escala float32 + dim bytes
+_HEADER_F32 = b"F32\0"
+_HEADER_I8 = b"I8\0\0"
+_HEADER_SIZE = 4
+
+SIDECAR_FORMAT_VERSION = 1
+SEARCH_BLOCK_ROWS = 65_536   # filas int8 que se convierten a float32 por vez
+
+
+def pack_embedding(vector, dtype: str = "float32") -> bytes:
+    """L2-normaliza y empaqueta un embedding para la columna embedding."""
+    vec = np.asarray(vector, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(vec))
+    if norm > 0:
+        vec = vec / norm
+    if dtype == "float32":
+        return _HEADER_F32 + vec.astype("<f4").tobytes()
+    if dtype == "int8":
+        peak = float(np.abs(vec).max()) if vec.size else 0.0
+        scale = peak / 127.0 if peak > 0 else 1.0
+        quantized = np.clip(np.rint(vec / scale), -127, 127).astype(np.int8)
+        return _HEADER_I8 + np.float32(scale).astype("<f4").tobytes() + quantized.tobytes()
+    raise ValueError(f"Unknown embedding dtype: {dtype}")
+
+
+def unpack_embedding(blob: bytes) -> np.ndarray:
+    """Inverso de pack_embedding (float32, ya normalizado)."""
+    header = bytes(blob[:_HEADER_SIZE])
+    if header == _HEADER_F32:
+        return np.frombuffer(blob, dtype="<f4", offset=_HEADER_SIZE)
+    if header == _HEADER_I8:
+        scale = np.frombuffer(blob, dtype="<f4", count=1, offset=_HEADER_SIZE)[0]
+        return np.frombuffer(blob, dtype=np.int8, offset=_HEADER_SIZE + 4).astype(np.float32) * scale
+    raise ValueError("Unknown embedding blob format")
+
+
+class EmbeddingMatrix:
+    """
+    Matriz de embeddings normalizados (fila i ↔ ids[i]).
+
+    - vectors: float32 (n, dim), o int8 (n, dim) con scales (n,) — un cuarto de memoria
+    - version: versión de embeddings de la base con la que se armó (para el sidecar)
+    """
+
+    def __init__(self, ids: np.ndarray, vectors: np.ndarray, scales: Optional[np.ndarray] = None,
+                 version: int = 0):
+        self.ids = ids
+        self.vectors = vectors
+        self.scales = scales
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1] if self.vectors.ndim == 2 else 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.vectors.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    @classmethod
+    def from_blobs(cls, rows: Iterable[Tuple[int, bytes]], version: int = 0) -> "EmbeddingMatrix":
+        """
+        Arma la matriz desde filas (id, blob). Si todas son int8 se conserva int8;
+        si no, todo pasa a float32. Los payloads se concatenan y se leen con un
+        único np.frombuffer.
+        """
+        rows = [(doc_id, blob) for doc_id, blob in rows if blob]
+        if not rows:
+            return cls(np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32), version=version)
+
+        headers = {bytes(blob[:_HEADER_SIZE]) for _, blob in rows}
+        if headers == {_HEADER_I8}:
+            dim = len(rows[0][1]) - _HEADER_SIZE - 4
+            rows = cls._same_length(rows, _HEADER_SIZE + 4 + dim)
+            scales = np.frombuffer(
+                b"".join(blob[_HEADER_SIZE:_HEADER_SIZE + 4] for _, blob in rows), dtype="<f4"
+            ).astype(np.float32)
+            vectors = np.frombuffer(
+                b"".join(blob[_HEADER_SIZE + 4:] for _, blob in rows), dtype=np.int8
+            ).reshape(len(rows), dim)
+            ids = np.fromiter((doc_id for doc_id, _ in rows), dtype=np.int64, count=len(rows))
+            return cls(ids, vectors, scales, version=version)
+
+        if headers == {_HEADER_F32}:
+            dim = (len(rows[0][1]) - _HEADER_SIZE) // 4
+            rows = cls._same_length(rows, _HEADER_SIZE + 4 * dim)
+            vectors = np.frombuffer(
+                b"".join(blob[_HEADER_SIZE:] for _, blob in rows), dtype="<f4"
+            ).reshape(len(rows), dim)
+        else:
+            # Formatos mezclados (p.ej. se cambió KB_EMBEDDING_DTYPE): todo a float32
+            unpacked = [(doc_id, unpack_embedding(blob)) for doc_id, blob in rows]
+            dim = len(unpacked[0][1])
+            unpacked = [(doc_id, vec) for doc_id, vec in unpacked if len(vec) == dim]
+            rows = unpacked
+            vectors = np.stack([vec for _, vec in unpacked]).astype(np.float32)
+        ids = np.fromiter((doc_id for doc_id, _ in rows), dtype=np.int64, count=len(rows))
+        return cls(ids, vectors, version=version)
+
+    @staticmethod
+    def _same_length(rows: List[Tuple[int, bytes]], size: int) -> List[Tuple[int, bytes]]:
+        kept = [(doc_id, blob) for doc_id, blob in rows if len(blob) == size]
+        if len(kept) != len(rows):
+            logger.warning(f"⚠️ Skipping {len(rows) - len(kept)} embeddings with a different dimension")
+        return kept
+
+    # ──────────────────────────────────────────────
+    # Búsqueda
+    # ──────────────────────────────────────────────
+    def search(self, query, top_k: int = 3) -> List[Tuple[int, float]]:
+        """[(doc_id, coseno)] por score descendente."""
+        n = len(self.ids)
+        if n == 0:
+            return []
+        q = np.asarray(query, dtype=np.float32).ravel()
+        if q.shape[0] != self.dim:
+            raise ValueError(f"Query dimension {q.shape[0]} != matrix dimension {self.dim}")
+        norm = float(np.linalg.norm(q))
+        if norm > 0:
+            q = q / norm
+
+        if self.scales is None:
+            scores = self.vectors @ q
+        else:
+            # int8: se convierte por bloques para no duplicar toda la matriz en float32
+            scores = np.empty(n, dtype=np.float32)
+            for start in range(0, n, SEARCH_BLOCK_ROWS):
+                block = self.vectors[start:start + SEARCH_BLOCK_ROWS]
+                scores[start:start + len(block)] = block.astype(np.float32) @ q
+            scores *= self.scales
+
+        k = min(top_k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self.ids[i]), float(scores[i])) for i in top]
+
+    # ──────────────────────────────────────────────
+    # Sidecar (vectores en .npy para mmap + ids/escalas en .npz)
+    # ──────────────────────────────────────────────
+    @staticmethod
+    def _sidecar_paths(base: str) -> Tuple[Path, Path]:
+        return Path(base + ".npy"), Path(base + ".meta.npz")
+
+    def save(self, base: str) -> None:
+        """Escribe el sidecar de forma atómica (archivos temporales + replace)."""
+        vectors_path, meta_path = self._sidecar_paths(base)
+        tmp_vectors = vectors_path.with_name(vectors_path.name + ".tmp")
+        tmp_meta = meta_path.with_name(meta_path.name + ".tmp")
+        with open(tmp_vectors, "wb") as f:
+            np.save(f, np.ascontiguousarray(self.vectors))
+        with open(tmp_meta, "wb") as f:
+            np.savez(
+                f,
+                format_version=np.int64(SIDECAR_FORMAT_VERSION),
+                version=np.int64(self.version),
+                ids=self.ids,
+                scales=self.scales if self.scales is not None else np.empty(0, dtype=np.float32),
+            )
+        # Primero los vectores: si el proceso muere en el medio, la versión del
+        # .meta viejo ya no coincide con la base y el sidecar se reconstruye
+        tmp_vectors.replace(vectors_path)
+        tmp_meta.replace(meta_path)
+        logger.info(f"✅ Embedding sidecar saved: {len(self)} vectors → {vectors_path}")
+
+    @classmethod
+    def load(cls, base: str, version: int) -> Optional["EmbeddingMatrix"]:
+        """Abre el sidecar con mmap si corresponde a `version`; si no, None."""
+        vectors_path, meta_path = cls._sidecar_paths(base)
+        if not vectors_path.exists() or not meta_path.exists():
+            return None
+        with np.load(meta_path) as meta:
+            if int(meta["format_version"]) != SIDECAR_FORMAT_VERSION or int(meta["version"]) != version:
+                return None
+            ids = meta["ids"]
+            scales = meta["scales"]
+        vectors = np.load(vectors_path, mmap_mode="r")
+        if len(vectors) != len(ids):
+            return None
+        matrix = cls(ids, vectors, scales if vectors.dtype == np.int8 else None, version=version)
+        logger.info(f"✅ Embedding sidecar mapped: {len(matrix)} vectors ← {vectors_path}")
+        return matrix
@@ -0,0 +1,145 @@
+"""
+Embedding Model
+Holder perezoso del SentenceTransformer: el modelo se carga en el primer uso (o con
+warm_up() en segundo plano) y la inferencia corre en un hilo dedicado. Las consultas
+concurrentes que llegan dentro de unos milisegundos se codifican juntas (micro-batching).
+"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingModel:
+    """
+    - max_batch:   textos máximos por llamada al modelo al juntar consultas
+    - max_wait_ms: ventana de espera para juntar consultas concurrentes
+    - batch_size:  batch_size interno de SentenceTransformer.encode
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        max_batch: int = 64,
+        max_wait_ms: float = 5.0,
+        batch_size: int = 32,
+    ):
+        self.model_name = model_name
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.batch_size = batch_size
+        self._model = None
+        self._load_lock = threading.Lock()
+        # Un solo hilo: el modelo nunca corre concurrentemente consigo mismo
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._load_seconds: Optional[float] = None
+        self._batches = 0
+        self._texts = 0
+
+    # ──────────────────────────────────────────────
+    # Carga
+    # ──────────────────────────────────────────────
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self):
+        """Carga el modelo una sola vez (thread-safe). Bloqueante."""
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+
+                    started = time.perf_counter()
+                    self._model = SentenceTransformer(self.model_name)
+                    self._load_seconds = time.perf_counter() - started
+                    logger.info(f"✅ Embedding model {self.model_name} loaded in {self._load_seconds:.1f}s")
+        return self._model
+
+    def warm_up(self) -> "asyncio.Future":
+        """Carga el modelo en el hilo de inferencia sin bloquear al llamador."""
+        return asyncio.get_running_loop().run_in_executor(self._executor, self.load)
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Codificación síncrona (carga el modelo si hace falta)."""
+        model = self.load()
+        return np.asarray(
+            model.encode(list(texts), batch_size=self.batch_size, convert_to_numpy=True),
+            dtype=np.float32,
+        )
+
+    # ──────────────────────────────────────────────
+    # Micro-batching
+    # ──────────────────────────────────────────────
+    async def aencode(self, texts: Sequence[str]) -> np.ndarray:
+        """Encola los textos y espera sus embeddings, shape (len(texts), dim)."""
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        loop = asyncio.get_running_loop()
+        if self._batcher is None or self._batcher.done() or self._batcher.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._batcher = loop.create_task(self._batch_loop())
+        future = loop.create_future()
+        await self._queue.put((texts, future))
+        return await future
+
+    async def _batch_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            first = await queue.get()
+            batch: List[Tuple[List[str], asyncio.Future]] = [first]
+            pending = len(first[0])
+            deadline = loop.time() + self.max_wait
+            while pending < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                pending += len(item[0])
+
+            texts = [t for item_texts, _ in batch for t in item_texts]
+            try:
+                vectors = await loop.run_in_executor(self._executor, self.encode, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self._batches += 1
+            self._texts += len(texts)
+            offset = 0
+            for item_texts, future in batch:
+                if not future.done():
+                    future.set_result(vectors[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+    def stats(self) -> Dict:
+        return {
+            "model": self.model_name,
+            "loaded": self.is_loaded,
+            "load_seconds": round(self._load_seconds, 2) if self._load_seconds is not None else None,
+            "batches": self._batches,
+            "texts": self._texts,
+            "avg_batch_size": round(self._texts / self._batches, 2) if self._batches else 0.0,
+        }
+
+    def close(self) -> None:
+        if self._batcher is not None:
+            self._batcher.cancel()
+            self._batcher = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
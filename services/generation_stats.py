@@ -0,0 +1,96 @@
+"""
+Generation Stats
+Efecto del corte temprano de la generación: cuando la respuesta en streaming completa
+el tope de oraciones se cancela la request al LLM, y acá se contabiliza lo ahorrado.
+
+Lo que el LLM habría seguido generando no se ve al cortar, así que se mide en una
+muestra (sample_rate): en esas requests la cola posterior al tope se sigue leyendo en
+segundo plano (sin demorar la respuesta) y su largo y duración estiman el ahorro de
+las demás. Esas requests de la muestra no se cortan: se registran con stopped=False y
+no suman ahorro propio. Con el corte desactivado todas las requests que llegan al
+tope se miden.
+"""
+import random
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+class GenerationStats:
+    """
+    - max_tokens:  max_tokens pedido al LLM (cota superior de lo ahorrable por request)
+    - sample_rate: fracción de requests cortadas cuya cola se mide igual
+    - recent:      registros por request que se conservan para /diagnostics
+    """
+
+    def __init__(self, max_tokens: int, sample_rate: float = 0.02, recent: int = 50):
+        self.max_tokens = max_tokens
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self._recent: Deque[Dict] = deque(maxlen=recent)
+        self._requests = 0
+        self._capped = 0          # requests que llegaron al tope de oraciones
+        self._stopped = 0         # ... y se cortaron antes de que el LLM terminara
+        self._tokens_used = 0
+        self._samples = 0
+        self._tail_tokens = 0     # tokens medidos después del tope (muestra)
+        self._tail_seconds = 0.0
+        self._tokens_saved = 0.0
+        self._latency_saved = 0.0
+
+    def should_sample(self) -> bool:
+        return random.random() < self.sample_rate
+
+    def record(self, request_id: str, tokens: int, elapsed_s: float, capped: bool, stopped: bool,
+               tail_tokens: Optional[int] = None, tail_s: Optional[float] = None) -> Dict:
+        """
+        Registra una generación → registro de la request con el ahorro (medido si se
+        leyó la cola, si no estimado con la media de la muestra; None sin muestra aún).
+        """
+        with self._lock:
+            self._requests += 1
+            self._tokens_used += tokens
+            self._capped += capped
+            if tail_tokens is not None:
+                self._samples += 1
+                self._tail_tokens += tail_tokens
+                self._tail_seconds += tail_s or 0.0
+            tokens_saved = latency_saved = None
+            if stopped:
+                self._stopped += 1
+                if tail_tokens is not None:
+                    tokens_saved, latency_saved = float(tail_tokens), tail_s or 0.0
+                elif self._samples:
+                    tokens_saved = self._tail_tokens / self._samples
+                    latency_saved = self._tail_seconds / self._samples
+                if tokens_saved is not None:
+                    self._tokens_saved += tokens_saved
+                    self._latency_saved += latency_saved
+            entry = {
+                "request": request_id,
+                "tokens": tokens,
+                "generation_ms": round(elapsed_s * 1000, 1),
+                "capped": capped,
+                "stopped": stopped,
+                "sampled": tail_tokens is not None,
+                "tokens_saved": round(tokens_saved, 1) if tokens_saved is not None else None,
+                "latency_saved_ms": round(latency_saved * 1000, 1) if latency_saved is not None else None,
+                "budget_tokens_saved": max(0, self.max_tokens - tokens) if stopped else 0,
+            }
+            self._recent.append(entry)
+            return entry
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "capped": self._capped,
+                "early_stopped": self._stopped,
+                "avg_tokens": round(self._tokens_used / self._requests, 1) if self._requests else 0.0,
+                "samples": self._samples,
+                "avg_tail_tokens": round(self._tail_tokens / self._samples, 1) if self._samples else None,
+                "avg_tail_ms": round(self._tail_seconds / self._samples * 1000, 1) if self._samples else None,
+                "tokens_saved": round(self._tokens_saved),
+                "latency_saved_ms": round(self._latency_saved * 1000),
+                "recent": list(self._recent),
+            }
@@ -0,0 +1,435 @@
+"""
+KB Bundle
+Base de conocimientos compilada offline (build_kb_bundle.py) en un único archivo
+versionado: tabla de documentos y chunks, postings BM25 por término y, opcional,
+la matriz de embeddings. Los workers lo abren con mmap de solo lectura: abrirlo no
+depende del tamaño de la KB y las páginas las comparte el page cache entre procesos.
+
+Formato:
+    MAGIC (8) | formato u32 | largo del header u32 | header JSON | secciones
+Cada sección es un array binario (typecode de `array`) alineado a 64 bytes; las
+tablas de strings son offsets 'Q' (n + 1) más un blob UTF-8.
+"""
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from collections.abc import Mapping
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from services.bm25_index import score_postings, tokenize
+from services.sqlite_knowledge import OFFICIAL_DOC_PREFIX, SQLiteKnowledgeBase
+
+try:
+    import numpy as np
+    from services.embedding_matrix import EmbeddingMatrix
+except ImportError:   # numpy es opcional: el bundle funciona sin embeddings
+    np = None
+    EmbeddingMatrix = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"KBBUNDLE"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+BM25_K1 = 1.2
+BM25_B = 0.75
+_PREAMBLE = struct.Struct("<8sII")
+
+
+def _pad(size: int) -> int:
+    return -size % ALIGNMENT
+
+
+def _string_table(values: Sequence[str]) -> Tuple[array, bytes]:
+    offsets = array('Q', [0])
+    parts = []
+    total = 0
+    for value in values:
+        encoded = value.encode('utf-8')
+        parts.append(encoded)
+        total += len(encoded)
+        offsets.append(total)
+    return offsets, b"".join(parts)
+
+
+def _postings_sections(prefix: str, texts: Sequence[str]) -> Tuple[Dict[str, Tuple], array]:
+    """Índice invertido de `texts` (slot = posición) listo para escribir."""
+    lengths = array('I')
+    by_term: Dict[str, Tuple[array, array]] = {}
+    for slot, text in enumerate(texts):
+        tokens = tokenize(text)
+        lengths.append(len(tokens))
+        freqs: Dict[str, int] = {}
+        for t in tokens:
+            freqs[t] = freqs.get(t, 0) + 1
+        for term, tf in freqs.items():
+            postings = by_term.get(term)
+            if postings is None:
+                postings = by_term[term] = (array('I'), array('I'))
+            postings[0].append(slot)
+            postings[1].append(tf)
+
+    # Orden por bytes UTF-8: es el que usa la búsqueda binaria al leer
+    terms = sorted(by_term, key=lambda t: t.encode('utf-8'))
+    term_offsets, term_blob = _string_table(terms)
+    post_offsets = array('Q', [0])
+    slots = array('I')
+    tfs = array('I')
+    for term in terms:
+        term_slots, term_tfs = by_term[term]
+        slots.extend(term_slots)
+        tfs.extend(term_tfs)
+        post_offsets.append(len(slots))
+    sections = {
+        f"{prefix}_term_offsets": term_offsets,
+        f"{prefix}_term_blob": term_blob,
+        f"{prefix}_post_offsets": post_offsets,
+        f"{prefix}_post_slots": slots,
+        f"{prefix}_post_tfs": tfs,
+        f"{prefix}_lengths": lengths,
+    }
+    return sections, lengths
+
+
+def write_bundle(path: str, kb: SQLiteKnowledgeBase, include_embeddings: bool = False) -> Dict:
+    """
+    Compila el estado actual de `kb` (una transacción de lectura) en `path`.
+    Se escribe en un temporal y se reemplaza al final: los workers que tienen el
+    bundle anterior mapeado lo siguen leyendo hasta recargar.
+    """
+    started = time.perf_counter()
+    version, doc_rows, chunk_rows = kb.export_state()
+
+    doc_ids = array('q', (doc_id for doc_id, _, _ in doc_rows))
+    slot_by_id = {doc_id: slot for slot, doc_id in enumerate(doc_ids)}
+    titulo_offsets, titulo_blob = _string_table([titulo for _, titulo, _ in doc_rows])
+    contenido_offsets, contenido_blob = _string_table([contenido for _, _, contenido in doc_rows])
+    doc_sections, doc_lengths = _postings_sections(
+        "doc", [f"{titulo} {contenido}" for _, titulo, contenido in doc_rows]
+    )
+
+    # Chunks agrupados por documento (en orden) para que cada documento ocupe un rango
+    chunk_rows = sorted(
+        (row for row in chunk_rows if row[1] in slot_by_id),
+        key=lambda row: (slot_by_id[row[1]], row[2], row[0]),
+    )
+    chunk_ids = array('q', (row[0] for row in chunk_rows))
+    texto_offsets, texto_blob = _string_table([row[3] for row in chunk_rows])
+    chunk_sections, chunk_lengths = _postings_sections("chunk", [row[4] for row in chunk_rows])
+    # Por documento: [inicio, fin) en la tabla de chunks y suma de largos (BM25 por documento)
+    doc_chunks = array('Q', [0] * (3 * len(doc_ids)))
+    for position, row in enumerate(chunk_rows):
+        slot = slot_by_id[row[1]]
+        if doc_chunks[3 * slot + 1] == 0:
+            doc_chunks[3 * slot] = position
+        doc_chunks[3 * slot + 1] = position + 1
+        doc_chunks[3 * slot + 2] += chunk_lengths[position]
+
+    sections: Dict[str, object] = {
+        "doc_ids": doc_ids,
+        "titulo_offsets": titulo_offsets,
+        "titulo_blob": titulo_blob,
+        "contenido_offsets": contenido_offsets,
+        "contenido_blob": contenido_blob,
+        **doc_sections,
+        "chunk_ids": chunk_ids,
+        "texto_offsets": texto_offsets,
+        "texto_blob": texto_blob,
+        **chunk_sections,
+        "doc_chunks": doc_chunks,
+    }
+
+    embeddings = None
+    if include_embeddings:
+        matrix = kb.load_embedding_matrix()
+        if matrix is None or len(matrix) == 0:
+            logger.warning("⚠️ Bundle: no embeddings available, skipping the embedding matrix")
+        else:
+            embeddings = {
+                "rows": len(matrix),
+                "dim": matrix.dim,
+                "dtype": "int8" if matrix.scales is not None else "float32",
+                "version": matrix.version,
+            }
+            sections["emb_ids"] = np.ascontiguousarray(matrix.ids, dtype=np.int64).tobytes()
+            sections["emb_vectors"] = np.ascontiguousarray(matrix.vectors).tobytes()
+            if matrix.scales is not None:
+                sections["emb_scales"] = np.ascontiguousarray(matrix.scales, dtype=np.float32).tobytes()
+
+    layout = {}
+    offset = 0
+    for name, data in sections.items():
+        raw = data.tobytes() if isinstance(data, array) else data
+        sections[name] = raw
+        layout[name] = [offset, len(raw), data.typecode if isinstance(data, array) else 'B']
+        offset += len(raw) + _pad(len(raw))
+
+    header = {
+        "format": FORMAT_VERSION,
+        "version": version,
+        "built_at": time.time(),
+        "byteorder": sys.byteorder,
+        "documents": len(doc_ids),
+        "chunks": len(chunk_ids),
+        "official_slots": [slot for slot, (_, titulo, _) in enumerate(doc_rows) if OFFICIAL_DOC_PREFIX in titulo],
+        "doc_avg_len": sum(doc_lengths) / len(doc_lengths) if doc_lengths else 1.0,
+        "bm25": {"k1": BM25_K1, "b": BM25_B},
+        "embeddings": embeddings,
+        "sections": layout,
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    data_start = _PREAMBLE.size + len(header_bytes)
+    data_start += _pad(data_start)
+
+    target = Path(path)
+    tmp = target.with_name(target.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * (data_start - f.tell()))
+        for raw in sections.values():
+            f.write(raw)
+            f.write(b"\0" * _pad(len(raw)))
+        f.flush()
+        os.fsync(f.fileno())
+    tmp.replace(target)
+
+    info = {
+        "path": str(target),
+        "version": version,
+        "documents": len(doc_ids),
+        "chunks": len(chunk_ids),
+        "terms": len(doc_sections["doc_term_offsets"]) - 1,
+        "embeddings": embeddings["rows"] if embeddings else 0,
+        "bytes": target.stat().st_size,
+        "build_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    logger.info(f"✅ KB bundle v{version} written: {info['documents']} docs, "
+                f"{info['chunks']} chunks, {info['bytes']:,} bytes → {target}")
+    return info
+
+
+class _Postings:
+    """Diccionario de términos ordenado + postings, sin construir nada al abrir."""
+
+    def __init__(self, bundle: "KBBundle", prefix: str):
+        self._term_offsets = bundle._section(f"{prefix}_term_offsets")
+        self._term_blob = bundle._section(f"{prefix}_term_blob")
+        self._post_offsets = bundle._section(f"{prefix}_post_offsets")
+        self.slots = bundle._section(f"{prefix}_post_slots")
+        self.tfs = bundle._section(f"{prefix}_post_tfs")
+        self.lengths = bundle._section(f"{prefix}_lengths")
+
+    def lookup(self, term: str) -> Optional[Tuple[int, int]]:
+        """Rango [inicio, fin) del término en slots/tfs (búsqueda binaria, O(log V))."""
+        key = term.encode('utf-8')
+        offsets, blob = self._term_offsets, self._term_blob
+        lo, hi = 0, len(offsets) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if bytes(blob[offsets[mid]:offsets[mid + 1]]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(offsets) - 1 and bytes(blob[offsets[lo]:offsets[lo + 1]]) == key:
+            return self._post_offsets[lo], self._post_offsets[lo + 1]
+        return None
+
+
+class _BundleDocuments(Mapping):
+    """doc_id → {'id', 'titulo', 'contenido'} decodificado bajo demanda."""
+
+    def __init__(self, bundle: "KBBundle"):
+        self._bundle = bundle
+
+    def __getitem__(self, doc_id: int) -> Mapping:
+        slot = self._bundle._slot(doc_id)
+        if slot is None:
+            raise KeyError(doc_id)
+        return self._bundle._document(slot)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._bundle._doc_ids)
+
+    def __len__(self) -> int:
+        return len(self._bundle._doc_ids)
+
+
+class KBBundle:
+    """
+    Bundle abierto con mmap. Misma interfaz de lectura que KBSnapshot (version,
+    documents, official_documents, search, scored_chunks, info), así que
+    KBSnapshotManager publica uno u otro indistintamente.
+    """
+
+    def __init__(self, path: str, mapped: mmap.mmap, header: Dict, data_start: int):
+        self.path = path
+        self.version: int = header["version"]
+        self.built_at: float = header["built_at"]
+        self._mmap = mapped
+        self._header = header
+        self._view = memoryview(mapped)[data_start:]
+        self._doc_ids = self._section("doc_ids")
+        self._titulo = (self._section("titulo_offsets"), self._section("titulo_blob"))
+        self._contenido = (self._section("contenido_offsets"), self._section("contenido_blob"))
+        self._texto = (self._section("texto_offsets"), self._section("texto_blob"))
+        self._chunk_ids = self._section("chunk_ids")
+        self._doc_chunks = self._section("doc_chunks")
+        self._doc_postings = _Postings(self, "doc")
+        self._chunk_postings = _Postings(self, "chunk")
+        self.documents: Mapping[int, Mapping] = _BundleDocuments(self)
+        self.official_ids: Tuple[int, ...] = tuple(self._doc_ids[s] for s in header["official_slots"])
+        self.embeddings = self._embedding_matrix()
+
+    @classmethod
+    def open(cls, path: str) -> "KBBundle":
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, file_format, header_len = _PREAMBLE.unpack_from(mapped, 0)
+        if magic != MAGIC or file_format != FORMAT_VERSION:
+            mapped.close()
+            raise ValueError(f"{path} is not a KB bundle (format {FORMAT_VERSION})")
+        header = json.loads(mapped[_PREAMBLE.size:_PREAMBLE.size + header_len].decode('utf-8'))
+        if header["byteorder"] != sys.byteorder:
+            mapped.close()
+            raise ValueError(f"{path} was built on a {header['byteorder']}-endian machine")
+        data_start = _PREAMBLE.size + header_len
+        data_start += _pad(data_start)
+        bundle = cls(path, mapped, header, data_start)
+        logger.info(f"✅ KB bundle v{bundle.version} mapped: {header['documents']} docs, "
+                    f"{header['chunks']} chunks ← {path}")
+        return bundle
+
+    def _section(self, name: str) -> memoryview:
+        offset, length, typecode = self._header["sections"][name]
+        view = self._view[offset:offset + length]
+        return view if typecode == 'B' else view.cast(typecode)
+
+    @staticmethod
+    def _string(table: Tuple[memoryview, memoryview], slot: int) -> str:
+        offsets, blob = table
+        return str(blob[offsets[slot]:offsets[slot + 1]], 'utf-8')
+
+    def _slot(self, doc_id: int) -> Optional[int]:
+        """Los doc_ids están ordenados (export_state ORDER BY id)."""
+        ids = self._doc_ids
+        lo, hi = 0, len(ids)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if ids[mid] < doc_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(ids) and ids[lo] == doc_id else None
+
+    def _document(self, slot: int) -> Mapping:
+        return MappingProxyType({
+            'id': self._doc_ids[slot],
+            'titulo': self._string(self._titulo, slot),
+            'contenido': self._string(self._contenido, slot),
+        })
+
+    def _embedding_matrix(self) -> Optional["EmbeddingMatrix"]:
+        meta = self._header.get("embeddings")
+        if not meta or EmbeddingMatrix is None:
+            return None
+        ids = np.frombuffer(self._section("emb_ids"), dtype=np.int64)
+        vectors = np.frombuffer(self._section("emb_vectors"), dtype=meta["dtype"]).reshape(meta["rows"], meta["dim"])
+        scales = np.frombuffer(self._section("emb_scales"), dtype=np.float32) if meta["dtype"] == "int8" else None
+        return EmbeddingMatrix(ids, vectors, scales, version=meta["version"])
+
+    # ──────────────────────────────────────────────
+    # Lectura (interfaz de KBSnapshot)
+    # ──────────────────────────────────────────────
+    def official_documents(self) -> List[Mapping]:
+        return [self._document(slot) for slot in self._header["official_slots"]]
+
+    def search(self, query: str, top_k: int = 3) -> List[Dict]:
+        """Top-k BM25 con extracto — mismo formato que SQLiteKnowledgeBase.search."""
+        terms = tokenize(query[:500])
+        n_docs = len(self._doc_ids)
+        if not terms or n_docs == 0:
+            return []
+        index = self._doc_postings
+        postings = []
+        for term in set(terms):
+            found = index.lookup(term)
+            if found is not None:
+                postings.append((index.slots[found[0]:found[1]], index.tfs[found[0]:found[1]]))
+        bm25 = self._header["bm25"]
+        scores = score_postings(postings, index.lengths, n_docs, self._header["doc_avg_len"],
+                                bm25["k1"], bm25["b"])
+
+        results = []
+        for slot, score in sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]:
+            doc = self._document(slot)
+            results.append({
+                'id': doc['id'],
+                'titulo': doc['titulo'],
+                'snippet': SQLiteKnowledgeBase._excerpt(doc['contenido'], terms),
+                'score': score,
+            })
+        return results
+
+    def _chunk_scores(self, doc_id: int, query: str) -> Tuple[List[Tuple[int, str]], Dict[int, float], int]:
+        """
+        (chunks del documento en orden, score BM25 por slot de chunk, primer slot) con las
+        estadísticas del documento. Los postings están ordenados por slot y los chunks de
+        un documento son un rango contiguo, así que cada término se recorta con búsqueda binaria.
+        """
+        slot = self._slot(doc_id)
+        if slot is None:
+            return [], {}, 0
+        start, end, total_length = self._doc_chunks[3 * slot:3 * slot + 3]
+        n_chunks = end - start
+        if n_chunks <= 0:
+            return [], {}, start
+
+        ordered = [(self._chunk_ids[c], self._string(self._texto, c)) for c in range(start, end)]
+        terms = set(tokenize(query[:500]))
+        index = self._chunk_postings
+        postings = []
+        for term in terms:
+            found = index.lookup(term)
+            if found is None:
+                continue
+            lo = self._bisect(index.slots, start, *found)
+            hi = self._bisect(index.slots, end, lo, found[1])
+            if lo < hi:
+                postings.append((index.slots[lo:hi], index.tfs[lo:hi]))
+        bm25 = self._header["bm25"]
+        scores = score_postings(postings, index.lengths, n_chunks, total_length / n_chunks,
+                                bm25["k1"], bm25["b"])
+        return ordered, scores, start
+
+    def scored_chunks(self, doc_id: int, query: str) -> List[Tuple[str, float]]:
+        """Equivalente a KBSnapshot.scored_chunks."""
+        ordered, scores, start = self._chunk_scores(doc_id, query)
+        return [(texto, scores.get(start + i, 0.0)) for i, (_, texto) in enumerate(ordered)]
+
+    @staticmethod
+    def _bisect(values: memoryview, target: int, lo: int, hi: int) -> int:
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if values[mid] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def info(self) -> Dict:
+        return {
+            "version": self.version,
+            "built_at": self.built_at,
+            "documents": self._header["documents"],
+            "chunks": self._header["chunks"],
+            "bundle": self.path,
+            "embeddings": len(self.embeddings) if self.embeddings is not None else 0,
+        }
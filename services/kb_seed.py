@@ -0,0 +1,389 @@
+"""
+KB Seed
+Contenido oficial de la base de conocimientos (documentos seed y LEGAL_INFO) y su
+sincronización con SQLite. Lo usan server.py al iniciar y build_kb_bundle.py.
+"""
+import logging
+from typing import List
+
+from services.sqlite_knowledge import SQLiteKnowledgeBase, content_hash
+
+logger = logging.getLogger(__name__)
+
+# Información legal de Prados de Paraíso (usada como fallback en endpoints secundarios)
+LEGAL_INFO = """
+PRADOS DE PARAÍSO — Proyecto inmobiliario en Pachacamac, Lima, Perú.
+Respaldado por Notaría Tambini y Casahierro Abogados.
+
+1. CONDICIÓN LEGAL DEL TERRENO:
+- 50% del terreno: Propiedad adquirida mediante compraventa de acciones y derechos, con escrituras públicas desde 1998.
+- 50% restante: Posesión legítima y mediata de buena fe, ejercida continuamente desde 1998.
+- El predio figura a nombre de DIREFOR (entidad estatal), pero la empresa posee legítimamente desde hace más de 25 años.
+
+2. QUÉ RECIBE EL COMPRADOR:
+Contrato de transferencia de POSESIÓN (no título de propiedad en primera instancia).
+Para obtener el título inscrito en SUNARP el propietario gestiona el saneamiento legal al completar el pago total.
+
+3. PREGUNTAS FRECUENTES:
+
+Q: ¿Cuándo entregan el título de propiedad?
+R: Al comprar se entrega contrato de transferencia de posesión. El título SUNARP se obtiene gestionando el saneamiento legal tras completar el pago. El equipo legal acompaña ese proceso.
+
+Q: ¿Tienen partida registral en SUNARP?
+R: No a nombre de la desarrolladora. El predio figura a nombre de DIREFOR. Esto no representa riesgo porque poseemos legítimamente desde 1998, respaldados por escrituras públicas notariales.
+
+Q: ¿Es seguro comprar sin partida registral?
+R: Sí. La posesión legítima de más de 25 años con escrituras públicas desde 1998 es un derecho real protegido por la ley peruana. El respaldo es Notaría Tambini y Casahierro Abogados.
+
+Q: ¿Puedo construir en el terreno con posesión?
+R: Sí. El poseedor legítimo tiene todos los derechos de uso, disfrute y construcción sobre el terreno.
+
+Q: ¿Puedo revender el lote?
+R: Sí, el contrato de posesión es transferible. Se recomienda completar el saneamiento primero para obtener mejor precio.
+
+Q: ¿Tipos de posesión?
+R: Legítima (mediata e inmediata) e Ilegítima (buena fe, mala fe, precaria). Prados de Paraíso: Posesión Legítima Mediata de Buena Fe — la categoría más sólida.
+
+4. PROCESO DE COMPRA:
+1. Separación del lote con pago inicial
+2. Verificación de documentos legales
+3. Firma de contrato de transferencia de posesión
+4. Pago en cuotas según plan acordado
+5. Gestión de saneamiento para título SUNARP al completar pago
+6. Inscripción definitiva en Registros Públicos
+"""
+
+# Documentos oficiales de la base de conocimientos — se sincronizan al startup
+KB_SEED_DOCS = [
+    {
+        "titulo": "Prados de Paraíso - Base de Conocimientos Oficial (Versión Integrada)",
+        "contenido": """BASE DE CONOCIMIENTOS DEL BOT (VERSIÓN INTEGRADA Y FINAL)
+
+1. ¿Qué es Prados del Paraíso?
+Prados de Paraíso es una marca comercial de Desarrolladora Santa María del Norte SAC, dedicada a desarrollar proyectos inmobiliarios con un enfoque ecológico y sostenible. Busca innovar en el sector, combinando eficiencia ambiental, diseño funcional y calidad de vida. Responde a la demanda de estilos de vida responsables y un desarrollo inmobiliario consciente.
+
+2. ¿Qué proyectos tiene Prados del Paraíso?
+Prados de Paraíso actualmente cuenta con dos proyectos. Uno de ellos ya ha sido entregado con éxito y se llama "Prados de Paraíso – Casa Huerto Ecológico". El segundo proyecto, que se encuentra en desarrollo, es "Prados de Paraíso Villa Eco-Sostenible".
+Ambos proyectos reflejan el compromiso de la marca con un enfoque ecológico y sostenible, ofreciendo oportunidades de inversión segura y con visión de futuro.
+
+3. ¿Dónde se ubica el proyecto Villa Eco-Sostenible?
+El proyecto "Prados de Paraíso Villa Eco-Sostenible" se encuentra ubicado a la altura del kilómetro 137.25 de la Carretera Panamericana Norte. Pertenece al distrito de Santa María, en la provincia de Huaura, departamento de Lima.
+Es una ubicación estratégica que busca combinar la accesibilidad con el entorno natural que caracteriza a nuestros desarrollos.
+
+4. ¿Quién desarrolla el proyecto?
+El proyecto es promovido por Desarrolladora Santa María del Norte S.A.C., una empresa con experiencia en el mercado inmobiliario.
+Además, para garantizar la transparencia y seguridad jurídica en todos los procesos, contamos con el respaldo y asesoramiento legal de DS CASAHIERRO ABOGADOS y tenemos un convenio con la NOTARIA TAMBINI.
+
+5. ¿La empresa es formal?
+Sí, la empresa es formal y cuenta con el respaldo de la marca Prados de Paraíso, que tiene una trayectoria sólida en el desarrollo de proyectos inmobiliarios. Además, se encuentra inscrita en la Partida Electrónica número 15437655 del Registro de Personas Jurídicas de Lima.
+Esto asegura que opera bajo todas las regulaciones legales pertinentes.
+
+6. ¿Desde cuándo existe el proyecto?
+El proyecto "Villa Eco-Sostenible" inició en octubre del dos mil veintitrés.
+Sin embargo, es importante destacar que, aunque el desarrollo del proyecto es reciente, nuestra empresa mantiene la posesión del terreno desde el año mil novecientos noventa y ocho, lo cual nos brinda un respaldo histórico sólido en la zona.
+
+7. ¿Qué es exactamente lo que ofrecen?
+En Prados de Paraíso ofrecemos la transferencia de posesión de lotes. Esto significa que, al adquirir un lote con nosotros, obtienes el derecho de uso, disfrute y control efectivo del terreno.
+Es importante que tengas claro que la condición legal actual del predio es de posesión, no de propiedad titulada inscrita en Registros Públicos a nombre de la empresa. Sin embargo, nuestra posesión es sólida y segura porque:
+La empresa ejerce la posesión del terreno desde mil novecientos noventa y ocho, respaldada por escrituras públicas.
+Contamos con el reconocimiento de la Municipalidad de Santa María a través de las cartillas municipales (Predio Rústico y Hoja Resumen).
+Formalizamos tu adquisición mediante un Contrato de Transferencia de Posesión elevado a Escritura Pública ante notario.
+Adicionalmente, contamos con la Resolución N.º 00202-2026-SOPCFPUR/MDSM, que aprueba el cambio de zonificación, reconociendo el área del proyecto como Zona Residencial de Densidad Media (RDM – R3). Este importante avance permite la ejecución de áreas recreativas, parques y espacios diversos, que forman parte del concepto integral de la comunidad sostenible de Villa Eco-Sostenible.
+En resumen, te ofrecemos una oportunidad de inversión sólida, con respaldo legal, reconocimiento municipal y proyección urbana, dentro de una comunidad que ya cuenta con más de ochocientos clientes satisfechos y que continúa consolidándose como un proyecto sostenible y con visión de crecimiento.
+
+8. ¿Es lo mismo transferencia de posesión que comprar un terreno?
+No, no es exactamente lo mismo, aunque en la práctica ambos te permiten usar el terreno. La diferencia clave es que "comprar la propiedad" significa que te conviertes en el dueño legal absoluto y tu nombre aparece inscrito en los Registros Públicos (SUNARP).
+En cambio, la "transferencia de posesión", que es lo que ofrecemos en Prados de Paraíso, significa que adquieres el uso, disfrute y control del lote. Tienes un respaldo mediante el Contrato de Transferencia de Posesión y una Escritura Pública, lo que te da un derecho real sobre el bien, pero no la titularidad registral de la propiedad.
+
+9. ¿Qué diferencia hay entre posesión y propiedad?
+La propiedad es el derecho legal absoluto sobre un bien, que te otorga la titularidad y se inscribe formalmente en los Registros Públicos. Como propietario, tienes el derecho de usar, disfrutar, disponer y reivindicar el bien.
+Por otro lado, la posesión es el poder de hecho que ejerces sobre un bien, lo que significa que lo usas y disfrutas físicamente, independientemente de si eres el titular registral. Este derecho está reconocido por el Código Civil y se puede transferir mediante un Contrato de Transferencia de Posesión. En resumen, la propiedad es el título legal, mientras que la posesión es el uso y control físico del terreno.
+
+10. ¿Puedo construir en el lote?
+Sí, puedes construir en el lote que adquieras en Prados de Paraíso, siempre y cuando respetes las normativas locales y el Reglamento de Diseño y Construcción. Al adquirir el lote, tendrás el derecho de uso y disfrute exclusivo sobre él. Así que, si tienes un proyecto en mente, ¡adelante con ello!
+
+11. ¿La escritura me hace propietario?
+No, una escritura pública de transferencia de posesión no te convierte en propietario en el sentido registral. Es una distinción importante: la escritura pública en el contexto de Prados de Paraíso formaliza la transferencia de la posesión, dándote un respaldo legal sobre el uso y disfrute del terreno.
+La propiedad es un derecho distinto que otorga la titularidad del bien y es lo que se inscribe en los Registros Públicos (SUNARP). Para que tu nombre aparezca como propietario en SUNARP, se requiere un proceso adicional de saneamiento.
+
+12. ¿La empresa responde por el lote?
+Sí, la empresa responde por el lote en el sentido de que garantiza la transferencia de la posesión del predio. Desarrolladora Santa María del Norte S.A.C. formaliza esta transferencia mediante un Contrato de Transferencia de Posesión, el cual puede elevarse a Escritura Pública a solicitud del cliente, otorgando el derecho de uso y disfrute del lote asignado.
+Es importante aclarar que la empresa garantiza la entrega de la posesión en la condición legal informada (respaldada por documentos históricos), pero no responde por situaciones externas futuras, como desastres naturales o actos de terceros, ni ofrece indemnizaciones económicas por pérdida de posesión ajena a su incumplimiento contractual.
+
+13. ¿Qué planos entregarán a la firma del contrato de transferencia de posesión?
+Al momento de la firma del contrato de transferencia de posesión, se te proporcionarán tres documentos técnicos importantes: el plano de ubicación, la memoria descriptiva y los planos perimétricos.
+Estos documentos son fundamentales porque delimitan físicamente el área sobre la cual ejercerás tu derecho de posesión, permitiéndote identificar con claridad la ubicación y las medidas exactas de tu lote.
+
+14. ¿Cómo se respalda legalmente la posesión o qué documentos se entregan a los clientes?
+La posesión en Prados de Paraíso está respaldada legalmente por varios documentos sólidos. La empresa ejerce una posesión de buena fe desde mil novecientos noventa y ocho, acreditada por escrituras públicas que dan fe de las transferencias de posesión a lo largo del tiempo. Además, la Municipalidad de Santa María reconoce esta posesión de manera indirecta a través de la emisión de cartillas municipales, como el Predio Rústico (PR) y la Hoja Resumen (HR), que demuestran el cumplimiento de las obligaciones tributarias.
+Cuando adquieres un lote, te entregamos el Contrato de Transferencia de Posesión, que es el documento fundamental que formaliza tu derecho de uso y disfrute. Este contrato puede elevarse a Escritura Pública ante notario para mayor seguridad. También te facilitamos las escrituras públicas que respaldan la posesión de la empresa desde mil novecientos noventa y ocho y las cartillas municipales (PR y HR) que demuestran el cumplimiento de las obligaciones tributarias del predio.
+
+14. ¿Cómo se respalda legalmente la posesión o qué documentos se entregan a los clientes?
+La posesión en Prados de Paraíso está respaldada legalmente por varios documentos sólidos. La empresa ejerce una posesión de buena fe desde mil novecientos noventa y ocho, acreditada por escrituras públicas que dan fe de las transferencias de posesión a lo largo del tiempo. Además, la Municipalidad de Santa María reconoce esta posesión de manera indirecta a través de la emisión de cartillas municipales, como el Predio Rústico (PR) y la Hoja Resumen (HR), que demuestran el cumplimiento de las obligaciones tributarias.
+Cuando adquieres un lote, te entregamos el Contrato de Transferencia de Posesión, que es el documento fundamental que formaliza tu derecho de uso y disfrute. Este contrato puede elevarse a Escritura Pública ante notario para mayor seguridad. También te facilitamos las escrituras públicas que respaldan la posesión de la empresa desde mil novecientos noventa y ocho y las cartillas municipales (PR y HR) que demuestran el cumplimiento de las obligaciones tributarias del predio.
+
+15. ¿Cuál es el estado legal del proyecto y el proceso de adquisición de lote?
+Estado Legal del Proyecto: La condición actual del proyecto es de posesión, no de propiedad titulada. Esta posesión está respaldada documentalmente por Escrituras Públicas que datan desde mil novecientos noventa y ocho y cuenta con un reconocimiento municipal indirecto a través de las cartillas de Predio Rústico (PR) y Hoja Resumen (HR), lo que nos permite cumplir con nuestras obligaciones tributarias.
+Adicionalmente, contamos con la Resolución que aprueba el cambio de zonificación, reconociendo el área del proyecto como Zona Residencial de Densidad Media (RDM – R3). Este importante avance permite la ejecución de áreas recreativas, parques y espacios diversos, que forman parte del concepto integral de la comunidad sostenible de Villa Eco-Sostenible.
+Proceso de Adquisición: Para adquirir un lote con nosotros, el proceso se basa en la transferencia de esta posesión y consta de tres pasos principales:
+Firma del Contrato: Se firma un Contrato de Transferencia de Posesión.
+Trámite Notarial: Para tu seguridad jurídica, este contrato se puede elevar a Escritura Pública ante notario, dándole fecha cierta y plena fuerza legal.
+Entrega: Una vez completados los pagos y trámites, se te hace la entrega física del lote para que puedas ejercer tu derecho de uso y disfrute.
+
+16. ¿Qué documentos entrega la empresa al transferir la posesión?
+Para formalizar la transferencia y brindarte seguridad jurídica sobre tu lote en Prados de Paraíso, la empresa te entregará varios documentos importantes. Recibirás el Contrato de Transferencia de Posesión, que es el documento principal que te otorga el derecho de uso y disfrute del lote. Además, se te facilitarán las Escrituras Públicas que respaldan la posesión legítima del predio por parte de la empresa desde mil novecientos noventa y ocho, y las Cartillas Municipales (Predio Rústico y Hoja Resumen) que demuestran el cumplimiento de las obligaciones tributarias.
+
+17. ¿Qué significa una transferencia de posesión?
+La transferencia de posesión significa que se te otorga el derecho de uso y disfrute del lote. Este proceso se formaliza a través de un Contrato de Transferencia de Posesión, que luego se eleva a Escritura Pública ante un notario. En el caso de Prados de Paraíso, esta transferencia te permite disfrutar del lote y ejercer control sobre él, respaldado por la confianza y la seguridad del contrato.
+
+18. ¿Qué derechos tengo como poseedor?
+Como poseedor en Prados de Paraíso, usted tiene el derecho de usar y disfrutar físicamente del lote, lo que incluye ocuparlo, cercarlo y construir en él, siempre sujeto a las normativas locales y al contrato de posesión. Este derecho está respaldado por un Contrato de Transferencia de Posesión, que puede elevarse a Escritura Pública para mayor seguridad jurídica.
+La posesión le otorga el control físico y el poder jurídico sobre el bien, permitiéndole disponer de él como si fuera suyo. Además, el Contrato de Transferencia de Posesión delimita y asigna el derecho de uso y disfrute exclusivo sobre su lote específico. Es importante recordar que, aunque la posesión es un derecho real protegido, es distinta de la propiedad inscrita en Registros Públicos.
+
+19. ¿Puedo perder mi lote?
+Entiendo perfectamente tu preocupación, es una pregunta muy importante y quiero darte tranquilidad al respecto.
+Nuestra empresa mantiene una posesión sólida, respaldada por documentos legales como escrituras públicas que datan desde 1998, además de ejercer una posesión efectiva y de buena fe reconocida por la Municipalidad a través del pago de tributos. Al suscribir tu contrato de transferencia de posesión, adquieres por tracto sucesivo el derecho posesorio que la empresa tiene desde hace décadas, por lo que legalmente no sería posible que pierdas tu lote.
+Además, incluso si un proceso de saneamiento (como una prescripción adquisitiva) no resultara favorable en un primer momento, eso no implica automáticamente la pérdida de la posesión, ya que tú mantienes el derecho de uso y disfrute mientras cumplas con tus obligaciones contractuales.
+
+20. ¿Direfor, siendo el legítimo propietario, me puede quitar mi lote?
+Entiendo tu preocupación, es una pregunta muy válida. Mira, es cierto que el predio figura a nombre de DIREFOR en los Registros Públicos, pero nuestra empresa, Desarrolladora Santa María del Norte S.A.C., mantiene la posesión del predio desde el año 1998.
+Esto es clave porque nuestra posesión es anterior a la Ley 29618 (que habla sobre la imprescriptibilidad de los predios del Estado). Aunque no tenemos un título de propiedad registrado, ejercemos la posesión con el respaldo de escrituras públicas y cartillas municipales, por lo que la presencia de DIREFOR como titular registral no implica que seamos invasores ni representa un riesgo inmediato para tu posesión.
+Nosotros te garantizamos la entrega de la posesión mediante un Contrato de Transferencia de Posesión, lo que te otorga el uso y disfrute del lote.
+
+21. Si llevo un proceso de saneamiento vía prescripción adquisitiva de dominio, y pierdo el proceso, ¿me pueden quitar mi lote o mi posesión?
+Si llevas un proceso de saneamiento vía prescripción adquisitiva de dominio y este no resulta favorable, esto significa que en ese momento y por esa vía, no se logró acreditar tu derecho de propiedad sobre el lote. Sin embargo, la improcedencia o el rechazo de este proceso no implica automáticamente que vayas a perder tu posesión.
+Tú adquiriste la posesión del lote mediante un Contrato de Transferencia de Posesión, lo cual te otorga el derecho de uso y disfrute. Este derecho se mantiene mientras tu posesión no sea cuestionada o despojada por una resolución judicial firme.
+El proceso de prescripción adquisitiva no tiene como objetivo desalojar al poseedor, sino evaluar si se cumplen los requisitos para adquirir la propiedad. Por lo tanto, perder dicho proceso no habilita por sí solo a un tercero a quitarte el lote, ni extingue tu derecho posesorio.
+En resumen, aunque la prescripción adquisitiva no prospere, tú mantienes tu posesión, siempre y cuando continúes ejerciéndola conforme a la ley y cumplas con las obligaciones contractuales que asumiste.
+
+22. ¿La empresa participa en el proceso de formalización o saneamiento?
+Gracias por tu consulta, es muy importante aclararlo. La empresa no realiza directamente el trámite de formalización o saneamiento del título de propiedad, ya que este es un proceso personal que corresponde a cada cliente una vez que el proyecto ha sido entregado y el lote cancelado.
+Lo que sí hacemos es garantizar la entrega de la posesión del lote mediante un Contrato de Transferencia de Posesión y brindarte todo el respaldo documentario necesario para que tú puedas iniciar ese trámite. Te entregaremos copias de las escrituras públicas que acreditan la posesión desde 1998 y la documentación municipal (Predio Rústico y Hoja Resumen) para que, con la ayuda de tu abogado, evalúes la mejor vía de formalización.
+
+23. ¿Existe el riesgo de que DIREFOR inicie una demanda de reivindicación o desalojo?
+Entiendo perfectamente tu preocupación; es una consulta muy razonable al evaluar una inversión de este tipo. En el proyecto Prados de Paraíso, la seguridad jurídica se sustenta en que la empresa ejerce una posesión desde el año mil novecientos noventa y ocho.
+Si bien la empresa no cuenta con una partida registral de propiedad a su nombre, sí ejerce y administra el terreno de manera efectiva y documentada. Esta posesión se encuentra respaldada por escrituras públicas que acreditan nuestra presencia desde mil novecientos noventa y ocho, además de documentación municipal (Predio Rústico y Hoja Resumen) que evidencia el cumplimiento de obligaciones tributarias y el reconocimiento de la posesión por parte de la Municipalidad de Santa María.
+Adicionalmente, contamos con la Resolución que aprueba el cambio de zonificación, reconociendo el área del proyecto como Zona Residencial de Densidad Media (RDM – R3). Este importante avance permite la ejecución de áreas recreativas, parques y espacios diversos, que forman parte del concepto integral de la comunidad sostenible de Villa Eco-Sostenible. Además este reconocimiento municipal representa un respaldo institucional importante, ya que confirma la posesión del predio, brindando mayor formalidad y seguridad jurídica a los futuros adquirentes, respaldando la formalidad de El Proyecto y la protección de su inversión.
+Es importante precisar que una eventual demanda de reivindicación o desalojo no prospera automáticamente cuando existe una posesión antigua, pública y ejercida de buena fe, como en este caso. La solidez de la posesión, el sustento documental y el acompañamiento legal existente reducen significativamente la probabilidad de acciones de este tipo.
+
+24. ¿La posesión que ustedes transfieren me permite defenderme legalmente frente a terceros o solo frente a la empresa?
+La posesión que transferimos en Prados de Paraíso te permite defenderte legalmente no solo frente a nuestra empresa, sino también frente a terceros. Esto se debe a que el Código Civil Peruano reconoce la posesión como un derecho real, lo que te otorga la facultad de usar y disfrutar del bien como si fuera tuyo.
+Al adquirir la posesión mediante un Contrato de Transferencia de Posesión, que se eleva a Escritura Pública, obtienes un respaldo legal sólido. Además, un punto importante es la "suma de plazos posesorios", regulada en el artículo 898 del Código Civil, que te permite sumar tu tiempo de posesión al tiempo que nuestra empresa ha poseído el terreno desde 1998. Esto fortalece aún más tu posición legal.
+
+25. ¿Por qué la empresa no sanea primero el terreno y después lo vende?
+Es una excelente pregunta y es importante entender la estrategia detrás de Prados de Paraíso.
+La razón principal es que la condición legal actual del predio es la posesión, no la propiedad. Esto significa que la empresa ejerce el uso y disfrute del inmueble, una situación que está formalizada y respaldada por documentación, incluyendo escrituras públicas que acreditan la continuidad posesoria desde 1998, y documentación municipal de Santa María que reconoce esta posesión.
+La gerencia de la empresa ha tomado la decisión estratégica de estructurar el proyecto bajo un modelo de transferencia de posesión. Esto se hace para ofrecer una alternativa clara, transparente y comercialmente viable a los interesados, sin prometer ni ofrecer procesos de titulación o saneamiento registral por parte de la empresa. Es fundamental saber que la posesión puede ser transferida legalmente.
+Por lo tanto, la empresa garantiza la entrega de la posesión mediante un Contrato de Transferencia de Posesión, que se formaliza una vez que el adquirente ha pagado el valor total del lote. A partir de ese momento, como nuevo poseedor, puedes evaluar de manera independiente si deseas iniciar un procedimiento de saneamiento o formalización de la titularidad, asumiendo los costos y trámites que esto implique. Para facilitar cualquier evaluación futura, la empresa pone a tu disposición toda la documentación existente, como las escrituras públicas y las constancias municipales relacionadas con la posesión.
+
+26. ¿Existe hoy algún juicio, denuncia o problema legal activo sobre este terreno?
+Basándome en la información legal disponible sobre el proyecto Prados de Paraíso, puedo confirmarte que no existe ningún juicio, denuncia o problema legal activo sobre el terreno. Aunque la partida registral figura a nombre de DIREFOR, una entidad del Estado, esto no implica que haya un conflicto, ya que nuestra posesión está respaldada por escrituras públicas desde mil novecientos noventa y ocho. El proyecto se desarrolla en un marco de transparencia, sin litigios que pongan en riesgo tu adquisición de la posesión.
+
+27. Si yo compro hoy el lote y mañana hay un problema legal con el terreno, ¿qué respaldo real tengo como adquiriente?
+Lo primero que debes saber es que la condición legal del predio que adquieres es la posesión, no la propiedad. Esto significa que nuestra empresa te garantiza la entrega de la posesión del lote, lo que te otorga el derecho de uso y disfrute del mismo. Esta transferencia se formaliza mediante un Contrato de Transferencia de Posesión.
+Tu respaldo como adquirente se basa en este Contrato de Transferencia de Posesión, que te otorga el derecho de uso y disfrute. Además, la posesión de nuestra empresa está documentada y respaldada por escrituras públicas que datan desde mil novecientos noventa y ocho, y la Municipalidad de Santa María reconoce nuestra posesión de manera indirecta a través de la emisión de cartillas municipales.
+
+28. ¿Qué riesgos existen al adquirir el lote por transferencia de posesión?
+Al adquirir un lote mediante transferencia de posesión, el riesgo principal que debes considerar es que no estás adquiriendo la propiedad inscrita en Registros Públicos, sino únicamente el derecho de uso y disfrute del terreno. Esto implica que la obtención del título de propiedad no es automática; dependerá de que tú, como adquirente, inicies y asumas un proceso de saneamiento de manera personal en el futuro.
+Además, es importante tener claro que la empresa no garantiza la titulación final, sino la entrega de una posesión documentada y formalizada mediante contrato. Sin embargo, para tu tranquilidad, esta posesión que te transferimos es sólida, ya que está respaldada por escrituras públicas desde mil novecientos noventa y ocho y cuenta con reconocimiento municipal.
+
+29. ¿La empresa garantiza que no habrá problemas legales en el futuro?
+La empresa no puede garantizar escenarios futuros que estén fuera de su control. Lo que sí garantiza, de manera expresa y contractual, es la entrega de la posesión del lote en la condición legal que se te ha informado.
+Actualmente, la empresa ejerce una posesión que está debidamente respaldada por escrituras públicas que acreditan su ejercicio posesorio, así como por documentación municipal. Esta posesión sólida es la que se te transfiere mediante el Contrato de Transferencia de Posesión.
+
+30. ¿Qué obligaciones asume el adquirente?
+Al adquirir un lote en Prados del Paraíso mediante transferencia de posesión, asumes varias obligaciones importantes que están detalladas en el contrato. Principalmente, te comprometes a pagar el precio pactado por la transferencia, ya sea al contado o siguiendo el cronograma de pagos establecido.
+Además, debes cumplir con las condiciones para que se te entregue la posesión, lo cual incluye la cancelación total del valor del lote. También serás responsable de asumir los trámites notariales y administrativos que origine la Escritura Pública del Contrato de Transferencia, así como cumplir con el reglamento interno del proyecto y las normas sobre el uso del lote.
+
+31. ¿Se paga algún impuesto o tributo por la transferencia de posesión?
+Sí. Con la entrega del lote, el cliente asumirá el pago de los tributos municipales que correspondan, de conformidad con la normativa municipal vigente.
+A partir de ese momento, el cliente deberá gestionar ante la municipalidad el alta como nuevo contribuyente y la baja del anterior, a fin de que figure formalmente como responsable de las obligaciones tributarias del lote adquirido.
+Previamente, la empresa se encargará de realizar la individualización administrativa de las cartillas municipales de cada lote (HR y PR), lo que permitirá que cada predio cuente con su propia identificación tributaria independiente.
+Mientras no se efectúe dicha individualización, los tributos se administran sobre el predio matriz del proyecto.
+
+32. ¿El contrato contempla cláusulas de saneamiento posesorio?
+El contrato de Transferencia de Posesión está diseñado para regular y garantizar la entrega de la posesión del lote, no para llevar a cabo un saneamiento de la propiedad. Esto significa que se enfoca en asegurar su derecho de uso y disfrute sobre el bien.
+
+33. ¿La empresa ha evaluado iniciar el proceso prescripción adquisitiva del proyecto?
+Es una excelente pregunta. La empresa ha evaluado la posibilidad de iniciar un proceso de prescripción adquisitiva para el proyecto. Sin embargo, la decisión de hacerlo es estratégica y considera diversos factores legales, técnicos y comerciales.
+Actualmente, la empresa no ofrece el inicio de un proceso de prescripción adquisitiva como parte del proyecto. Su actividad principal se centra en la transferencia de posesión, no en la comercialización de propiedad ya saneada. Esto significa que la obtención del título de propiedad es un proceso que el adquirente, si lo desea, deberá iniciar y asumir de manera personal.
+
+34. ¿La transferencia de posesión podría considerarse simulación de compraventa?
+Esa es una excelente pregunta que toca un punto legal muy importante. Permíteme aclararte la diferencia para que tengas total tranquilidad.
+La transferencia de posesión y la compraventa de propiedad son actos jurídicos distintos y no deben confundirse. La Transferencia de Posesión (lo que hacemos en Prados de Paraíso) implica ceder el derecho de ejercer el poder de hecho sobre un bien (usarlo y disfrutarlo). Esto es un acto transparente, respaldado por asesoramiento legal y formalizado mediante un contrato que puede elevarse a Escritura Pública. La Compraventa de Propiedad implica transferir el derecho de ser el dueño legal absoluto, lo cual se inscribe en los Registros Públicos.
+Una simulación ocurre cuando las partes fingen celebrar un acto para engañar a terceros o evadir la ley. En nuestro caso, no hay simulación porque el contrato es claro y específico: se transfiere la posesión, no la propiedad saneada. Nosotros somos muy transparentes al informar que lo que adquieres es el derecho de uso y disfrute, respaldado por nuestra cadena de posesión documentada desde 1998, y no un título de propiedad inscrito en SUNARP en este momento.
+
+35. ¿Cómo se gestiona la eventual formalización futura de la posesión?
+La formalización futura de la posesión se gestiona a través de un proceso de saneamiento físico-legal. Este proceso permite al poseedor evaluar la posibilidad de acceder al derecho de propiedad y, si es el caso, inscribirlo en Registros Públicos.
+Es importante saber que este saneamiento no forma parte del servicio que ofrece la empresa, sino que debe ser asumido de manera personal por el adquirente una vez que haya recibido la posesión del lote y cumplido con las condiciones contractuales. Existen vías legales como la prescripción adquisitiva de dominio, que se tramita judicialmente, o vías administrativas, según la normativa. La empresa te brindará el respaldo documental necesario para iniciar este proceso.
+
+36. ¿Qué obligaciones mantiene la empresa luego de la transferencia?
+Una vez realizada la transferencia de la posesión del lote, las obligaciones de la empresa se limitan estrictamente a lo establecido en el contrato. Principalmente, la empresa se compromete a:
+Entregar la posesión del lote en la condición legal que se te informó previamente.
+Proporcionarte toda la documentación posesoria que sustenta la transferencia realizada.
+Cumplir con cualquier obligación contractual que pudiera haber quedado pendiente, si correspondiera.
+
+37. ¿La empresa mantiene la administración sobre áreas recreativas?
+La empresa asume la gestión inicial necesaria para la organización del proyecto. Sin embargo, la administración y el mantenimiento de las áreas recreativas pueden ser asumidos posteriormente por una asociación. Esto se realizará conforme a lo previsto en el reglamento interno y a medida que se consolide el proyecto.
+
+38. ¿Existen contingencias penales asociadas al modelo de negocio?
+De acuerdo con la naturaleza del proyecto y lo establecido contractualmente, no existen contingencias penales inherentes al modelo de negocio de Prados de Paraíso.
+Esto se debe a que:
+Figura Legal Reconocida: El proyecto se basa en la transferencia de posesión, una figura reconocida por el ordenamiento jurídico peruano.
+Respaldo Documental: Nuestra posesión está respaldada por documentación formal y Escrituras Públicas que datan desde 1998.
+Transparencia: Todo el proceso se realiza de manera transparente, con asesoría legal y notarial, diferenciando claramente la posesión de la propiedad.
+
+39. ¿Qué respaldo real tiene el cliente si surge un conflicto?
+Entiendo perfectamente tu inquietud, es fundamental sentir seguridad al realizar una inversión.
+Si llegara a surgir algún conflicto, tu respaldo real se fundamenta en tres pilares principales que brindan solidez a tu adquisición. Primero, la Seguridad Jurídica Histórica: la empresa cuenta con una posesión respaldada por escrituras públicas que datan desde 1998, además de documentación formal que acredita nuestra trayectoria en el terreno. Segundo, el Asesoramiento Legal Especializado: contamos con el respaldo y la asesoría del estudio DS CASAHIERRO ABOGADOS, así como un convenio con la NOTARIA TAMBINI. Tercero, el Compromiso de Documentación: la empresa se compromete a entregarte toda la documentación necesaria para que, si así lo deseas, puedas iniciar tu propio proceso de saneamiento físico-legal.
+
+40. ¿Qué es DIREFOR y por qué figura como propietario?
+DIREFOR es la Dirección de Formalización de la Propiedad Rural, una entidad del Estado. Figura como titular registral del predio matriz debido a un cambio normativo con la Ley número veintinueve mil seiscientos dieciocho, que entró en vigencia en el año dos mil diez.
+Esta ley estableció que los terrenos sin propiedad inscrita pasaran a nombre del Estado. Sin embargo, es importante destacar que esta inscripción no invalida la posesión que nuestra empresa ejerce sobre el predio desde mil novecientos noventa y ocho, la cual está debidamente documentada.
+
+41. ¿Es legal transferir la posesión de un terreno del Estado?
+Sí, la legislación peruana reconoce la posesión como una situación jurídica protegida, que es distinta y diferente al derecho de propiedad. En Prados de Paraíso, lo que se transfiere es la posesión del terreno, no la propiedad. Nuestra empresa ejerce una posesión anterior a la inscripción estatal, debidamente documentada, y transfiere esa situación posesoria mediante un Contrato de Transferencia de Posesión.
+
+42. ¿Qué sucede si se revierte la posesión a favor del Estado?
+Actualmente, no existe ningún procedimiento administrativo o judicial que busque revertir la posesión del predio a favor del Estado. Aunque DIREFOR figura como titular registral del predio matriz por mandato de la Ley número veintinueve mil seiscientos dieciocho, esto no implica automáticamente la pérdida de la posesión existente. Nuestra empresa ejerce esta posesión desde mil novecientos noventa y ocho, y está debidamente documentada, lo que le brinda un respaldo sólido.
+
+43. ¿La municipalidad reconoce oficialmente el proyecto?
+La Municipalidad de Santa María reconoce nuestra posesión de manera indirecta a través de la emisión de cartillas municipales, específicamente el PR (Predio Rústico) y la HR (Hoja Resumen). Adicionalmente, contamos con la Resolución N.º 00202-2026-SOPCFPUR/MDSM, que aprueba el cambio de zonificación, reconociendo el área del proyecto como Zona Residencial de Densidad Media (RDM – R3), lo cual confirma la posesión del predio, brindando mayor formalidad y seguridad jurídica a los adquirentes, respaldando la formalidad del Proyecto y la protección de su inversión.
+
+44. ¿Cómo impacta la ley que prohíbe la prescripción adquisitiva de inmuebles contra el Estado?
+La Ley número veintinueve mil seiscientos dieciocho, promulgada en dos mil diez, prohíbe que los bienes inmuebles de dominio privado estatal sean adquiridos por particulares mediante prescripción adquisitiva. Esto significa que ya no se puede reclamar la propiedad de terrenos estatales solo por haberlos poseído durante mucho tiempo a partir de esa fecha.
+Sin embargo, en el caso de Prados de Paraíso, la empresa cuenta con veintisiete años de posesión, la cual se inició antes de que esta ley entrara en vigor. Por lo tanto, la legitimidad de la posesión transferida a los clientes se mantiene, ya que la ley no invalida la posesión histórica que ya existía. En resumen, la ley protege al Estado de nuevas reclamaciones, pero no afecta las posesiones preexistentes.
+
+45. ¿La empresa acompaña judicialmente al cliente si hay alguna contingencia legal?
+Entiendo tu pregunta. En caso de que enfrentes una contingencia legal o decidas iniciar un proceso de formalización de tu lote, la gestión y representación legal corresponde al cliente. La empresa te proporcionará toda la documentación probatoria disponible para respaldar tu caso y facilitar tu defensa, pero la representación ante un juez debe ser realizada por tu propio abogado.
+
+46. ¿La empresa indemnizará en caso de pérdida de posesión?
+La empresa no asume responsabilidad económica ni ofrece una indemnización específica por la pérdida de la posesión si esta es causada por hechos externos o ajenos al incumplimiento del comprador.
+Lo que la empresa garantiza es la entrega de una posesión documentada y formalizada mediante contrato, respaldada por la documentación histórica que posee desde mil novecientos noventa y ocho. Es decir, su compromiso es entregarte el lote con el respaldo legal de su posesión, pero no cubre contingencias futuras fuera de su control.
+
+47. ¿Se puede individualizar la posesión por cada lote?
+¡Claro que sí! Cuando firmas el Contrato de Transferencia de Posesión, este documento delimita y asigna el derecho de uso y disfrute exclusivo sobre un lote determinado dentro del proyecto. Esto significa que tú tienes el control físico y el derecho a usar y disfrutar ese espacio concreto, cercarlo o construir en él.
+
+48. ¿El adquirente podría ser demandado directamente ante un posible proceso judicial iniciado por el Estado?
+Sí, como adquirente de la posesión, usted sería la parte directamente involucrada en cualquier proceso judicial que el Estado pudiera iniciar. Sin embargo, es importante destacar que la posesión que recibe está respaldada por documentación histórica y escrituras públicas desde mil novecientos noventa y ocho. Esto le brinda una garantía sobre la posesión de su lote, permitiéndole usar y disfrutar su inversión con tranquilidad y confianza.
+
+49. ¿Qué pasa si el proyecto no logra consolidarse?
+Entendemos que esta es una preocupación importante para cualquier inversión. La garantía principal de Prados de Paraíso es la antigüedad de la posesión que se transfiere a nuestros clientes, respaldada por escrituras públicas desde 1998.
+Adicionalmente, contamos con la Resolución que aprueba el cambio de zonificación, reconociendo el área del proyecto como Zona Residencial de Densidad Media (RDM – R3). Este importante avance permite la ejecución de áreas recreativas, parques y espacios diversos, que forman parte del concepto integral de la comunidad sostenible de Villa Eco-Sostenible.
+Si el proyecto no se consolida completamente, por ejemplo, en cuanto a infraestructura o desarrollo planificado, usted seguirá manteniendo la posesión de su lote, con pleno ejercicio de uso y disfrute sobre ese espacio.
+
+50. ¿El contrato me protege frente a cualquier contingencia legal?
+El contrato está diseñado principalmente para regular la transferencia de la posesión y las obligaciones de pago, asegurando que usted reciba la posesión de su lote con el respaldo de documentos históricos. Si bien le brinda seguridad sobre la posesión física y la documentación que acredita su derecho de ocupación, no cubre situaciones externas. Esto incluye litigios con terceros o con el Estado que puedan surgir en el futuro.
+
+51. ¿La empresa responde económicamente frente a la pérdida de la posesión del proyecto?
+La empresa no asume responsabilidad económica por la pérdida de la posesión si esta es causada por hechos externos o ajenos al incumplimiento del comprador. Es decir, la empresa respalda la posesión que te transfiere, pero no te indemnizará económicamente por causas que no sean su incumplimiento contractual.
+
+52. ¿Las cartillas PR y HR están a nombre de mi lote específico?
+No, las cartillas PR (Predio Rústico) y HR (Hoja Resumen) no estarán a nombre de su lote específico de forma individual. Estos tributos municipales se gestionan sobre el predio matriz, es decir, sobre la propiedad principal del proyecto.
+Esto ocurre mientras no exista una individualización administrativa por cada lote. La empresa le entregará estos documentos que demuestran el cumplimiento de las obligaciones tributarias del predio general.
+
+53. ¿Mi lote tendrá su propia cartilla municipal?
+Actualmente las cartillas municipales PR y HR se emiten a nombre de la empresa para el predio en su totalidad.
+La empresa se compromete a realizar el procedimiento de Individualización Administrativa ante la Municipalidad Distrital para tu lote. Esto te permitirá tener una mejor formalización de tu propiedad. Así que puedes estar tranquilo, ya que estamos trabajando para asegurar que cada adquirente tenga la documentación necesaria en el futuro.
+
+54. ¿La empresa tiene Libro de Reclamaciones?
+Sí, la empresa cuenta con un Libro de Reclamaciones.
+Lo tenemos disponible en dos formatos para tu comodidad: Físico: En nuestras oficinas ubicadas en Calle Libertadores ciento cincuenta y cinco, Oficina trescientos dos, distrito de San Isidro. Virtual: Accesible a través de nuestra página web: web: https://pradosdeparaiso.com.pe/.
+
+55. ¿Qué pasa si no estoy conforme con la respuesta de la empresa?
+Entiendo que quieras saber qué opciones tienes si una respuesta no cumple tus expectativas.
+Si no estás conforme con la respuesta inicial que te brindamos, siempre puedes continuar el diálogo a través de nuestros canales internos para solicitar una revisión adicional, una reunión de aclaración o la intervención de un área especializada. Nuestra prioridad es resolver los reclamos de manera directa, pero si tras agotar estas vías internas el resultado no es satisfactorio, mantienes tu derecho de acudir a los organismos de protección al consumidor según la normativa vigente.
+
+56. ¿Cuáles son los plazos de atención de un reclamo?
+Es una pregunta muy importante para tener claridad sobre los tiempos.
+De acuerdo con el Reglamento del Libro de Reclamaciones y su modificatoria, el plazo máximo que tenemos como proveedores para atender un reclamo y brindarte una respuesta es de quince días hábiles improrrogables.
+
+57. ¿La empresa se responsabiliza por daños externos?
+En realidad, la empresa no asume responsabilidad por daños ocasionados por factores externos que estén fuera de su control. Esto incluye situaciones como desastres naturales, actos de terceros, decisiones de autoridades o cualquier otro evento fortuito o de fuerza mayor.
+Nuestra responsabilidad se limita estrictamente a cumplir con las obligaciones que hemos asumido en el contrato, que son principalmente la entrega de la posesión del lote y la documentación correspondiente.
+
+58. Si la empresa Desarrolladora Santa Maria del Norte S.A.C deja de pagar la deuda pendiente con el señor Manuel Ampuero por la transferencia de posesión, ¿Eso podría hacer que yo pierda mi lote o mi derecho de posesión?
+Desde la suscripción de la Escritura Pública por la que el señor Manuel Ampuero transfirió la posesión a favor de Desarrolladora Santa María del Norte (en adelante, la "empresa"), adquirió válidamente la posesión efectiva del terreno.
+En consecuencia, desde esa fecha la empresa ostenta la calidad de poseedora, con plena facultad para transferir dicha posesión a terceros. Esta condición posesoria no se ve afectada por las obligaciones internas o relaciones económicas que puedan existir entre las partes que intervinieron en la transferencia original.
+Así, aun en el supuesto de que la empresa incumpliera algún pago u obligación económica pendiente frente al señor Ampuero, ello no genera la pérdida, restitución ni afectación de la posesión ya transferida. La posesión se mantiene firme, pues fue otorgada formalmente mediante escritura pública y recae sobre la empresa como persona jurídica.
+Por tanto, cualquier relación económica entre las partes originales es independiente y no incide en la situación posesoria del predio, ni en la validez de la posesión que posteriormente se transfiera a los futuros posesionarios.
+En consecuencia, se reafirma que no existe riesgo alguno para el cliente respecto a la estabilidad, continuidad o validez de la posesión que adquirirá.
+
+59. ¿Puedo obtener título de propiedad si pago el precio total del lote?
+Entiendo tu interés en obtener un título de propiedad al realizar el pago total del lote. En el caso de Prados de Paraíso, el proyecto se desarrolla bajo la modalidad de transferencia de posesión, por lo que no se otorga título de propiedad inscrito en Registros Públicos como parte de la compra del lote. Recibirás un contrato de transferencia de posesión que acredita tu derecho de posesión sobre el lote.
+La condición actual del proyecto es de posesión, no de propiedad titulada. Esta posesión está respaldada documentalmente por Escrituras Públicas que datan desde mil novecientos noventa y ocho y cuenta con un reconocimiento municipal indirecto a través de las cartillas de Predio Rústico (PR) y Hoja Resumen (HR), lo que nos permite cumplir con nuestras obligaciones tributarias.
+Si deseas mayor información sobre esta modalidad o sobre el proyecto, estaré encantada de ayudarte.
+""",
+    },
+]
+
+# Títulos de versiones anteriores que ya no forman parte de KB_SEED_DOCS
+OBSOLETE_TITLES = [
+    'Condiciones Legales de Prados de Paraíso',
+    'Prados de Paraíso - Base de Conocimientos Oficial (Preguntas 1 a 30)',
+    'Prados de Paraíso - Base de Conocimientos Oficial (Preguntas 31 a 58)',
+]
+
+
+def seed_knowledge_base(sqlite_kb: SQLiteKnowledgeBase) -> List[int]:
+    """
+    Sincroniza los documentos oficiales al startup comparando content_hash (sin leer
+    los documentos completos). Solo reescribe — y vuelve a generar los chunks de — los
+    documentos que cambiaron, todo en una transacción. Devuelve los ids tocados.
+    """
+    touched: List[int] = []
+    try:
+        with sqlite_kb.write_transaction() as cursor:
+            titles = [d["titulo"] for d in KB_SEED_DOCS]
+            cursor.execute(
+                f"SELECT titulo, id, content_hash FROM conocimiento_legal WHERE titulo IN ({','.join('?' * len(titles))})",
+                titles,
+            )
+            existing = {titulo: (doc_id, digest) for titulo, doc_id, digest in cursor.fetchall()}
+            ids = [doc_id for doc_id, _ in existing.values()]
+            cursor.execute(
+                f"SELECT DISTINCT documento_id FROM conocimiento_chunks WHERE documento_id IN ({','.join('?' * len(ids))})",
+                ids,
+            )
+            with_chunks = {row[0] for row in cursor.fetchall()}
+
+            for doc in KB_SEED_DOCS:
+                digest = content_hash(doc["contenido"])
+                row = existing.get(doc["titulo"])
+                if row is None:
+                    cursor.execute(
+                        "INSERT INTO conocimiento_legal (titulo, contenido, content_hash) VALUES (?, ?, ?)",
+                        (doc["titulo"], doc["contenido"], digest),
+                    )
+                    doc_id = cursor.lastrowid
+                    logger.info(f"✅ KB insertado: '{doc['titulo'][:50]}...'")
+                elif row[1] != digest:
+                    doc_id = row[0]
+                    cursor.execute(
+                        "UPDATE conocimiento_legal SET contenido = ?, content_hash = ? WHERE id = ?",
+                        (doc["contenido"], digest, doc_id),
+                    )
+                    logger.info(f"✅ KB actualizado: '{doc['titulo'][:50]}...'")
+                else:
+                    logger.info(f"✅ KB OK: '{doc['titulo'][:50]}...'")
+                    # prados.db anterior a conocimiento_chunks — generar los chunks una vez
+                    if row[0] not in with_chunks:
+                        sqlite_kb.store_chunks(row[0], doc["contenido"], cursor=cursor)
+                    continue
+                sqlite_kb.store_chunks(doc_id, doc["contenido"], cursor=cursor)
+                touched.append(doc_id)
+
+            # Eliminar docs obsoletos que ya no forman parte de KB_SEED_DOCS
+            for old_title in OBSOLETE_TITLES:
+                if old_title in titles:
+                    continue
+                cursor.execute("SELECT id FROM conocimiento_legal WHERE titulo = ?", (old_title,))
+                obsolete_ids = [row[0] for row in cursor.fetchall()]
+                if obsolete_ids:
+                    cursor.execute("DELETE FROM conocimiento_legal WHERE titulo = ?", (old_title,))
+                    touched.extend(obsolete_ids)
+                    logger.info(f"🗑️ KB obsoleto eliminado: '{old_title[:60]}'")
+    except Exception as e:
+        logger.error(f"Error en seed_knowledge_base: {e}")
+        return []
+    return touched
@@ -0,0 +1,194 @@
+"""
+KB Snapshot
+Foto inmutable y versionada de la base de conocimientos (documentos, chunks e índices
+BM25) para servir consultas sin tocar SQLite. Una recarga arma la foto nueva en el
+executor y la publica con un swap atómico: las requests en curso terminan sobre la
+versión que tomaron al empezar.
+"""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple, Union
+
+from services.async_knowledge import AsyncKnowledgeBase
+from services.bm25_index import BM25Index, tokenize
+from services.kb_bundle import KBBundle
+from services.sqlite_knowledge import OFFICIAL_DOC_PREFIX, SQLiteKnowledgeBase
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class KBSnapshot:
+    """
+    - version:   kb_version de SQLite al momento de la lectura
+    - documents: doc_id → {'id', 'titulo', 'contenido'} (solo lectura)
+    - chunks:    doc_id → ((chunk_id, texto), ...) en orden del documento
+    """
+    version: int
+    built_at: float
+    documents: Mapping[int, Mapping]
+    chunks: Mapping[int, Tuple[Tuple[int, str], ...]]
+    official_ids: Tuple[int, ...]
+    _index: BM25Index = field(repr=False)
+    _chunk_indexes: Mapping[int, BM25Index] = field(repr=False)
+
+    @classmethod
+    def build(cls, kb: SQLiteKnowledgeBase) -> "KBSnapshot":
+        """Lee el estado completo de SQLite (una transacción) y arma los índices."""
+        version, doc_rows, chunk_rows = kb.export_state()
+        documents = {
+            doc_id: MappingProxyType({'id': doc_id, 'titulo': titulo, 'contenido': contenido})
+            for doc_id, titulo, contenido in doc_rows
+        }
+        index = BM25Index()
+        index.add_many((doc_id, f"{titulo} {contenido}") for doc_id, titulo, contenido in doc_rows)
+
+        grouped: Dict[int, List[Tuple[int, str]]] = {}
+        chunk_indexes: Dict[int, BM25Index] = {}
+        for chunk_id, doc_id, _numero, texto, busqueda in chunk_rows:
+            grouped.setdefault(doc_id, []).append((chunk_id, texto))
+            chunk_index = chunk_indexes.get(doc_id)
+            if chunk_index is None:
+                chunk_index = chunk_indexes[doc_id] = BM25Index()
+            chunk_index.add(chunk_id, busqueda)
+
+        return cls(
+            version=version,
+            built_at=time.time(),
+            documents=MappingProxyType(documents),
+            chunks=MappingProxyType({doc_id: tuple(rows) for doc_id, rows in grouped.items()}),
+            official_ids=tuple(d for d, doc in documents.items() if OFFICIAL_DOC_PREFIX in doc['titulo']),
+            _index=index,
+            _chunk_indexes=MappingProxyType(chunk_indexes),
+        )
+
+    def official_documents(self) -> List[Mapping]:
+        return [self.documents[doc_id] for doc_id in self.official_ids]
+
+    def search(self, query: str, top_k: int = 3) -> List[Dict]:
+        """Top-k BM25 con extracto — mismo formato que SQLiteKnowledgeBase.search."""
+        terms = tokenize(query[:500])
+        results = []
+        for doc_id, score in self._index.search(query, top_k):
+            doc = self.documents[doc_id]
+            results.append({
+                'id': doc_id,
+                'titulo': doc['titulo'],
+                'snippet': SQLiteKnowledgeBase._excerpt(doc['contenido'], terms),
+                'score': score,
+            })
+        return results
+
+    def scored_chunks(self, doc_id: int, query: str) -> List[Tuple[str, float]]:
+        """Todos los chunks del documento en orden, con su score BM25 para la query (0 si no coincide)."""
+        ordered = self.chunks.get(doc_id)
+        if not ordered:
+            return []
+        scores = dict(self._chunk_indexes[doc_id].search(query, top_k=len(ordered)))
+        return [(texto, scores.get(chunk_id, 0.0)) for chunk_id, texto in ordered]
+
+    def info(self) -> Dict:
+        return {
+            "version": self.version,
+            "built_at": self.built_at,
+            "documents": len(self.documents),
+            "chunks": sum(len(rows) for rows in self.chunks.values()),
+        }
+
+
+class KBSnapshotManager:
+    """
+    Publica la foto vigente y la recarga en segundo plano.
+
+    - reload(): arma una foto nueva en el executor de AsyncKnowledgeBase y la publica
+    - watch():  tarea que consulta kb_version cada poll_interval segundos y recarga
+                cuando cambió (ingestas de load_documents.py, otros workers, re-seed)
+    - bundle_path: si se indica, en lugar de leer SQLite se mapea el bundle compilado
+                por build_kb_bundle.py y el watcher recarga cuando el archivo cambia
+    """
+
+    def __init__(self, kb: AsyncKnowledgeBase, poll_interval: float = 5.0, build_timeout: float = 60.0,
+                 bundle_path: Optional[str] = None):
+        self.kb = kb
+        self.poll_interval = poll_interval
+        self.build_timeout = build_timeout
+        self.bundle_path = bundle_path
+        self._bundle_stamp: Optional[Tuple[int, int]] = None
+        self._current: Optional[Union[KBSnapshot, KBBundle]] = None
+        self._reload_lock = asyncio.Lock()
+        self._watcher: Optional[asyncio.Task] = None
+        self._reloads = 0
+        self._last_build_ms = 0.0
+
+    @property
+    def current(self) -> Union[KBSnapshot, KBBundle]:
+        if self._current is None:
+            raise RuntimeError("Knowledge base snapshot not loaded yet")
+        return self._current
+
+    async def reload(self, force: bool = True) -> Union[KBSnapshot, KBBundle]:
+        """Reconstruye la foto (force=False: solo si kb_version — o el bundle — cambió)."""
+        async with self._reload_lock:
+            previous = self._current
+            if self.bundle_path:
+                stat = os.stat(self.bundle_path)
+                stamp = (stat.st_mtime_ns, stat.st_size)
+                if not force and previous is not None and stamp == self._bundle_stamp:
+                    return previous
+            elif not force and previous is not None:
+                version = await self.kb.arun(self.kb.kb.kb_version, timeout=self.build_timeout)
+                if version == previous.version:
+                    return previous
+            started = time.perf_counter()
+            if self.bundle_path:
+                snapshot = await self.kb.arun(KBBundle.open, self.bundle_path, timeout=self.build_timeout)
+                self._bundle_stamp = stamp
+            else:
+                snapshot = await self.kb.arun(KBSnapshot.build, self.kb.kb, timeout=self.build_timeout)
+            self._last_build_ms = (time.perf_counter() - started) * 1000
+            # Swap atómico: quien ya tomó self._current sigue con la foto anterior
+            self._current = snapshot
+            self._reloads += 1
+            logger.info(
+                f"✅ KB snapshot v{snapshot.version} published "
+                f"({len(snapshot.documents)} docs, {self._last_build_ms:.0f} ms"
+                f"{f', previous v{previous.version}' if previous else ''})"
+            )
+            return snapshot
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.reload(force=False)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"KB snapshot watcher: reload failed: {e!r}")
+
+    def start_watcher(self) -> None:
+        if self.poll_interval > 0 and self._watcher is None:
+            self._watcher = asyncio.get_running_loop().create_task(self._watch())
+
+    async def stop_watcher(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+
+    def metrics(self) -> Dict:
+        snapshot = self._current
+        return {
+            **(snapshot.info() if snapshot else {"version": None}),
+            "reloads": self._reloads,
+            "last_build_ms": round(self._last_build_ms, 1),
+            "watching": self._watcher is not None,
+            "source": "bundle" if self.bundle_path else "sqlite",
+        }
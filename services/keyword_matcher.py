@@ -0,0 +1,63 @@
+"""
+Keyword Matcher
+Términos de una consulta normalizados una sola vez (minúsculas, sin tildes) para
+contar cuántos aparecen en cada documento o bloque: "posesión" y "posesion" son el
+mismo término. Lo comparten _scan_search (_keyword_score) y _relevant_blocks.
+"""
+from typing import Dict, FrozenSet, Iterable
+
+from services.bm25_index import _TOKEN_RE, fold_accents
+
+MAX_QUERY_CHARS = 500   # mismo límite que BM25Index.search
+
+
+class KeywordMatcher:
+    """
+    Coincidencia por subcadena, como `w in text`, sobre el texto normalizado.
+
+    Cada término se busca por separado con `in` (el scan en C de str), de más largo a
+    más corto; los términos contenidos en otro (p.ej. "pago" dentro de "pagos") se dan
+    por encontrados cuando aparece el más largo, sin volver a recorrer el texto. No hay
+    autómata: con las pocas palabras de una consulta, un recorrido por término es más
+    rápido que un Aho-Corasick en Python puro.
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        folded = {fold_accents(t) for t in terms if t}
+        # Más largos primero: al encontrar uno quedan resueltos sus subtérminos
+        self.terms = tuple(sorted(folded, key=len, reverse=True))
+        self._implied: Dict[str, FrozenSet[str]] = {
+            term: frozenset(other for other in self.terms if other in term)
+            for term in self.terms
+        }
+
+    @classmethod
+    def from_query(cls, query: str, min_len: int = 2) -> "KeywordMatcher":
+        """Palabras de la consulta (sin signos: '¿qué' → 'que') de al menos min_len caracteres."""
+        words = _TOKEN_RE.findall(fold_accents(query[:MAX_QUERY_CHARS]))
+        return cls(w for w in words if len(w) >= min_len)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def matches(self, text: str, folded: bool = False) -> FrozenSet[str]:
+        """Términos presentes en `text` (folded=True si ya pasó por fold_accents)."""
+        if not self.terms:
+            return frozenset()
+        haystack = text if folded else fold_accents(text)
+        found = set()
+        for term in self.terms:
+            if term in found:
+                continue
+            if term in haystack:
+                found |= self._implied[term]
+                if len(found) == len(self.terms):
+                    break
+        return frozenset(found)
+
+    def count(self, text: str, folded: bool = False) -> int:
+        return len(self.matches(text, folded))
+
+    def score(self, text: str, folded: bool = False) -> float:
+        """Fracción de los términos que aparecen en el texto (0.0 sin términos)."""
+        return self.count(text, folded) / len(self.terms) if self.terms else 0.0
@@ -3,36 +3,202 @@ Knowledge Base Service
 Maneja búsqueda semántica en MongoDB para consultas legales
 """
 import os
+import asyncio
+from pathlib import Path
 from typing import List, Dict, Optional
-from sentence_transformers import SentenceTransformer
 import numpy as np
 from motor.motor_asyncio import AsyncIOMotorDatabase
 import logging
 
+from services.ann_index import IVFIndex, ids_fingerprint
+from services.embedding_cache import EmbeddingCache
+from services.embedding_model import EmbeddingModel
+
 logger = logging.getLogger(__name__)
 
+MODEL_NAME = 'paraphrase-multilingual-MiniLM-L12-v2'
+DEFAULT_EMBEDDING_CACHE_PATH = str(Path(__file__).resolve().parent.parent / "embedding_cache.db")
+
+# Debajo de este tamaño la búsqueda exacta es más rápida que mantener el índice IVF
+ANN_MIN_DOCS = int(os.getenv("KB_ANN_MIN_DOCS", "5000"))
+ANN_NPROBE = int(os.getenv("KB_ANN_NPROBE", "8"))
+ANN_SAVE_EVERY = 100   # store_document persiste el índice cada N altas
+
 class KnowledgeBaseService:
     """
     Servicio para búsqueda semántica en base de conocimientos legal
     """
     
-    def __init__(self, db: AsyncIOMotorDatabase):
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        ann_index_path: Optional[str] = None,
+        embedding_cache_path: Optional[str] = None,
+    ):
         self.db = db
-        # Usar modelo multilingüe para español
-        self.model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
+        # Usar modelo multilingüe para español — se carga en el primer uso o con warm_up()
+        self.model = EmbeddingModel(MODEL_NAME)
+        # Cache por hash de contenido: memoria (LRU) + SQLite persistente
+        self.embedding_cache = EmbeddingCache(
+            MODEL_NAME,
+            db_path=embedding_cache_path or os.getenv("KB_EMBEDDING_CACHE_PATH", DEFAULT_EMBEDDING_CACHE_PATH),
+        )
+        # Matriz de embeddings L2-normalizados (float32) — fila i ↔ self._matrix_docs[i].
+        # Se carga completa en la primera búsqueda y crece en store_document.
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_loaded = False
+        self._matrix_count = 0
+        self._matrix_docs: List[Dict] = []
+        self._matrix_ids: List[str] = []   # _id de MongoDB de cada fila (fingerprint del índice IVF)
+        self._matrix_lock = asyncio.Lock()
+        # Índice aproximado (IVF) — solo se activa desde ANN_MIN_DOCS documentos
+        self.ann_index_path = ann_index_path or os.getenv("KB_ANN_INDEX_PATH")
+        self._ann: Optional[IVFIndex] = None
+        self._ann_building = False
+        self._ann_unsaved = 0
         logger.info("✅ KnowledgeBase Service initialized")
+
+    def warm_up(self) -> "asyncio.Future":
+        """Carga el modelo en segundo plano (el servicio ya responde mientras tanto)."""
+        return self.model.warm_up()
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        """L2-normaliza sobre el último eje; así el coseno es un producto punto."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    @staticmethod
+    def _doc_summary(doc: Dict) -> Dict:
+        return {
+            "content": doc.get("content", ""),
+            "title": doc.get("title", "Sin título"),
+            "category": doc.get("category", "General"),
+            "metadata": doc.get("metadata", {})
+        }
+
+    async def _load_matrix(self) -> None:
+        """Lee todos los embeddings de MongoDB (sin límite) y arma la matriz normalizada."""
+        # Orden estable por _id: la fila de cada documento es la misma entre reinicios
+        cursor = self.db.knowledge.find({"embedding": {"$exists": True}}).sort("_id", 1)
+        vectors, docs, ids = [], [], []
+        async for doc in cursor:
+            embedding = doc.get("embedding") or []
+            if not embedding:
+                continue
+            if vectors and len(embedding) != len(vectors[0]):
+                logger.warning(f"Skipping document with embedding dim {len(embedding)}: {doc.get('title')}")
+                continue
+            vectors.append(embedding)
+            docs.append(self._doc_summary(doc))
+            ids.append(str(doc["_id"]))
+
+        self._matrix = self._normalize(np.array(vectors, dtype=np.float32)) if vectors else None
+        self._matrix_count = len(docs)
+        self._matrix_docs = docs
+        self._matrix_ids = ids
+        self._matrix_loaded = True
+        logger.info(f"✅ Embedding matrix loaded: {self._matrix_count} documents")
+        if self._matrix_count >= ANN_MIN_DOCS:
+            await self._build_ann()
+
+    async def _build_ann(self) -> None:
+        """
+        Carga o entrena el índice IVF sobre las filas actuales (uno a la vez). Las filas que
+        store_document agrega mientras tanto se suman al índice antes de activarlo.
+        """
+        if self._ann_building:
+            return   # ya hay uno en curso: tomará también las filas nuevas
+        self._ann_building = True
+        try:
+            n = self._matrix_count
+            # Vista de las primeras n filas: no cambian aunque la matriz crezca durante el armado
+            vectors, ids = self._matrix[:n], self._matrix_ids[:n]
+            # k-means sobre miles de vectores — fuera del event loop
+            index = await asyncio.to_thread(
+                lambda: IVFIndex.load_or_build(self.ann_index_path, vectors, ids_fingerprint(ids), ANN_NPROBE)
+            )
+            added = self._matrix_count
+            if added > n:
+                index.add(self._matrix[n:added], np.arange(n, added))
+                self._ann_unsaved += added - n
+            self._ann = index
+        finally:
+            self._ann_building = False
+
+    async def _update_ann(self, row: int) -> None:
+        """Alta incremental en el índice IVF tras store_document; persiste cada ANN_SAVE_EVERY."""
+        if self._ann is None:
+            if self._matrix_count >= ANN_MIN_DOCS:
+                await self._build_ann()
+            return
+        self._ann.add(self._matrix[row], [row])
+        self._ann_unsaved += 1
+        if self.ann_index_path and self._ann_unsaved >= ANN_SAVE_EVERY:
+            self._ann_unsaved = 0
+            await asyncio.to_thread(self._save_ann, self._ann, self._matrix_ids[:self._matrix_count])
+
+    def _save_ann(self, index: IVFIndex, ids: List[str]) -> None:
+        index.fingerprint = ids_fingerprint(ids)
+        index.save(self.ann_index_path)
+
+    async def _ensure_matrix(self) -> None:
+        if not self._matrix_loaded:
+            async with self._matrix_lock:
+                if not self._matrix_loaded:
+                    await self._load_matrix()
+
+    def _append_to_matrix(self, embedding: List[float], doc: Dict) -> Optional[int]:
+        """
+        Agrega una fila y devuelve su número (None si no se agregó).
+        La capacidad se duplica para que el append sea O(1) amortizado.
+        """
+        if not self._matrix_loaded:
+            # Matriz aún no cargada: _load_matrix leerá este documento desde MongoDB
+            return None
+        vector = self._normalize(np.asarray(embedding, dtype=np.float32))
+        if self._matrix is not None and vector.shape[0] != self._matrix.shape[1]:
+            logger.warning(f"Embedding dim {vector.shape[0]} does not match matrix; not indexed")
+            return None
+        if self._matrix is None or self._matrix_count == self._matrix.shape[0]:
+            capacity = max(16, self._matrix_count * 2)
+            grown = np.empty((capacity, vector.shape[0]), dtype=np.float32)
+            if self._matrix is not None:
+                grown[:self._matrix_count] = self._matrix[:self._matrix_count]
+            self._matrix = grown
+        row = self._matrix_count
+        self._matrix[row] = vector
+        self._matrix_docs.append(self._doc_summary(doc))
+        self._matrix_ids.append(str(doc["_id"]))
+        self._matrix_count += 1
+        return row
     
     async def embed_query(self, query: str) -> List[float]:
         """
-        Genera embedding para una consulta
+        Genera embedding para una consulta (cacheado por contenido)
         """
         try:
-            embedding = self.model.encode(query, convert_to_numpy=True)
-            return embedding.tolist()
+            return (await self.encode_many([query]))[0].tolist()
         except Exception as e:
             logger.error(f"Error generating embedding: {str(e)}")
             raise
-    
+
+    async def encode_many(self, texts: List[str]) -> np.ndarray:
+        """
+        Embeddings de varios textos: los que no están en cache se codifican
+        juntos en una sola llamada al modelo. Devuelve una matriz (len(texts), dim).
+        """
+        cached = self.embedding_cache.get_many(texts)
+        missing = list(dict.fromkeys(t for t, vec in zip(texts, cached) if vec is None))
+        if missing:
+            encoded = await self.model.aencode(missing)
+            self.embedding_cache.put_many(missing, encoded)
+            fresh = dict(zip(missing, encoded))
+            cached = [vec if vec is not None else fresh[t] for t, vec in zip(texts, cached)]
+        return np.stack(cached)
+
     async def semantic_search(
         self,
         query: str,
@@ -77,52 +243,38 @@ class KnowledgeBaseService:
         min_score: float
     ) -> List[Dict]:
         """
-        Búsqueda por similitud de coseno con embeddings pre-calculados
+        Búsqueda por similitud de coseno con embeddings pre-calculados:
+        un producto matriz-vector sobre la matriz normalizada + argpartition para el top-k
         """
         try:
-            # Obtener todos los documentos con embeddings
-            cursor = self.db.knowledge.find(
-                {"embedding": {"$exists": True}},
-                {"_id": 0}
-            ).limit(100)  # Limitar para eficiencia
-            
-            docs = await cursor.to_list(length=100)
-            
-            if not docs:
+            await self._ensure_matrix()
+            n = self._matrix_count
+            if n == 0:
                 logger.warning("No documents with embeddings found")
                 return []
-            
-            # Calcular similitudes
-            query_vec = np.array(query_embedding)
+
+            query_vec = self._normalize(np.asarray(query_embedding, dtype=np.float32))
+            if self._ann is not None:
+                # Aproximado: solo las nprobe listas IVF más cercanas
+                top, top_scores = self._ann.search(query_vec, limit)
+            else:
+                scores = self._matrix[:n] @ query_vec
+                k = min(limit, n)
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top])]
+                top_scores = scores[top]
+
             results = []
-            
-            for doc in docs:
-                doc_vec = np.array(doc.get("embedding", []))
-                if len(doc_vec) == 0:
-                    continue
-                
-                # Similitud de coseno
-                similarity = np.dot(query_vec, doc_vec) / (
-                    np.linalg.norm(query_vec) * np.linalg.norm(doc_vec)
-                )
-                
-                if similarity >= min_score:
-                    results.append({
-                        "content": doc.get("content", ""),
-                        "title": doc.get("title", "Sin título"),
-                        "category": doc.get("category", "General"),
-                        "score": float(similarity),
-                        "metadata": doc.get("metadata", {})
-                    })
-            
-            # Ordenar por score descendente
-            results.sort(key=lambda x: x["score"], reverse=True)
-            return results[:limit]
-            
+            for i, score in zip(top, top_scores):
+                if score < min_score:
+                    break
+                results.append({**self._matrix_docs[i], "score": float(score)})
+            return results
+
         except Exception as e:
             logger.error(f"Error in cosine similarity search: {str(e)}")
             return []
-    
+
     async def _keyword_search(
         self,
         query: str,
@@ -162,28 +314,46 @@ class KnowledgeBaseService:
         """
         Almacena un documento con su embedding en la base de conocimientos
         """
+        stored = await self.store_documents([{
+            "content": content,
+            "title": title,
+            "category": category,
+            "metadata": metadata,
+        }])
+        return stored == 1
+
+    async def store_documents(self, documents: List[Dict]) -> int:
+        """
+        Almacena varios documentos: un único encode_many para todos los embeddings
+        y un insert_many en MongoDB. Devuelve la cantidad almacenada.
+        """
+        if not documents:
+            return 0
         try:
-            # Generar embedding
-            embedding = await self.embed_query(content)
-            
-            # Preparar documento
-            doc = {
-                "content": content,
-                "title": title,
-                "category": category,
-                "embedding": embedding,
-                "metadata": metadata or {}
-            }
-            
+            embeddings = await self.encode_many([d["content"] for d in documents])
+
+            docs = [{
+                "content": d["content"],
+                "title": d["title"],
+                "category": d.get("category") or "General",
+                "embedding": embedding.tolist(),
+                "metadata": d.get("metadata") or {}
+            } for d, embedding in zip(documents, embeddings)]
+
             # Insertar en MongoDB
-            result = await self.db.knowledge.insert_one(doc)
-            
-            logger.info(f"Document stored: {title}")
-            return True
-            
+            await self.db.knowledge.insert_many(docs)
+            for doc in docs:
+                row = self._append_to_matrix(doc["embedding"], doc)
+                if row is not None:
+                    await self._update_ann(row)
+
+            for doc in docs:
+                logger.info(f"Document stored: {doc['title']}")
+            return len(docs)
+
         except Exception as e:
-            logger.error(f"Error storing document: {str(e)}")
-            return False
+            logger.error(f"Error storing documents: {str(e)}")
+            return 0
     
     async def initialize_sample_data(self):
         """
@@ -224,14 +394,9 @@ class KnowledgeBaseService:
                 }
             ]
             
-            for doc in sample_docs:
-                await self.store_document(
-                    content=doc["content"],
-                    title=doc["title"],
-                    category=doc["category"]
-                )
+            stored = await self.store_documents(sample_docs)
             
-            logger.info(f"✅ Initialized {len(sample_docs)} sample documents")
+            logger.info(f"✅ Initialized {stored} sample documents")
             
         except Exception as e:
             logger.error(f"Error initializing sample data: {str(e)}")
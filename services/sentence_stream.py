@@ -0,0 +1,79 @@
+"""
+Sentence Stream
+Tope de oraciones aplicado a medida que llegan los deltas del LLM en streaming: cada
+oración queda cerrada cuando llega el espacio que sigue a su punto final (o al terminar
+el stream). El resultado es el mismo que cortar el texto completo de una vez (partir en
+signo final + espacio, descartar fragmentos cortos, tomar las primeras N), sin importar
+cómo venga partido en deltas.
+"""
+import re
+from typing import List, Optional
+
+SENTENCE_BOUNDARY_RE = re.compile(r'(?<=[.!?])\s+')
+MIN_SENTENCE_CHARS = 10   # fragmentos más cortos ("1.", "Sí.") se descartan, como en el corte por lotes
+
+
+class SentenceAccumulator:
+    """
+    - feed(delta): oraciones que se completaron con este delta (hasta max_sentences)
+    - finish():    la oración final sin espacio posterior, al cerrar el stream
+    - cap_offset:  posición en el texto crudo donde termina la última oración aceptada
+                   una vez alcanzado el tope (lo que se puede reenviar al cliente)
+    """
+
+    def __init__(self, max_sentences: int = 5):
+        self.max_sentences = max_sentences
+        self.sentences: List[str] = []
+        self.raw_chars = 0
+        self.cap_offset: Optional[int] = None
+        self._pending = ""
+        self._pending_start = 0
+
+    @property
+    def full(self) -> bool:
+        return len(self.sentences) >= self.max_sentences
+
+    @property
+    def text(self) -> str:
+        """Texto final: las oraciones aceptadas, terminado en signo de puntuación."""
+        joined = " ".join(self.sentences)
+        if joined and joined[-1] not in ".!?":
+            joined += "."
+        return joined
+
+    def forwardable(self) -> int:
+        """Caracteres del texto crudo que entran en la respuesta (todo, hasta llegar al tope)."""
+        return self.cap_offset if self.cap_offset is not None else self.raw_chars
+
+    def feed(self, delta: str) -> List[str]:
+        self.raw_chars += len(delta)
+        if self.full or not delta:
+            return []
+        self._pending += delta
+        accepted: List[str] = []
+        cut = 0
+        for match in SENTENCE_BOUNDARY_RE.finditer(self._pending):
+            self._accept(self._pending[cut:match.start()], self._pending_start + match.start(), accepted)
+            cut = match.end()
+            if self.full:
+                break
+        self._pending = self._pending[cut:]
+        self._pending_start += cut
+        return accepted
+
+    def finish(self) -> List[str]:
+        accepted: List[str] = []
+        if not self.full and self._pending:
+            tail = self._pending.rstrip()
+            self._accept(tail, self._pending_start + len(tail), accepted)
+        self._pending = ""
+        return accepted
+
+    def _accept(self, piece: str, end: int, accepted: List[str]) -> None:
+        sentence = piece.strip()
+        if len(sentence) <= MIN_SENTENCE_CHARS:
+            return
+        self.sentences.append(sentence)
+        accepted.append(sentence)
+        if self.full:
+            self.cap_offset = end
@@ -0,0 +1,204 @@
+"""
+Sharded Knowledge Base
+Varias bases SQLite — un archivo por proyecto o por proyecto/categoría — detrás de
+una misma búsqueda. Cada consulta va solo a los shards que corresponden a la request
+(proyecto y categoría), que se consultan en paralelo en un thread pool propio, y el
+top-k global se arma con un heap sobre los top-k de cada shard.
+
+Nombres de shard: "proyecto" o "proyecto/categoria" (p.ej. "lomas/contratos").
+"""
+import asyncio
+import heapq
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from services.sqlite_knowledge import SQLiteKnowledgeBase
+
+logger = logging.getLogger(__name__)
+
+SHARD_SEPARATOR = "/"
+
+
+class UnknownShardError(KeyError):
+    """La request pide un proyecto o categoría sin shard configurado."""
+
+
+def parse_shards(spec: str, base_dir: Path) -> Dict[str, str]:
+    """
+    KB_SHARDS: "lomas=lomas.db,lomas/contratos=shards/lomas_contratos.db".
+    Las rutas relativas se resuelven contra base_dir.
+    """
+    shards: Dict[str, str] = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, sep, path = entry.partition("=")
+        if not sep or not name.strip() or not path.strip():
+            raise ValueError(f"Invalid KB_SHARDS entry: {entry!r} (expected name=path)")
+        resolved = Path(path.strip())
+        shards[name.strip().lower()] = str(resolved if resolved.is_absolute() else base_dir / resolved)
+    return shards
+
+
+class ShardedKnowledgeBase:
+    """
+    - shards:      nombre → SQLiteKnowledgeBase ya abierta (p.ej. la KB principal)
+    - default:     shard de las requests que no indican proyecto
+    - max_workers: hilos para el fan-out (cada uno con su conexión de lectura por shard)
+    """
+
+    def __init__(self, shards: Dict[str, SQLiteKnowledgeBase], default: str, max_workers: int = 8):
+        if default not in shards:
+            raise ValueError(f"Default shard {default!r} is not configured")
+        self._shards = dict(shards)
+        self._owned: List[str] = []
+        self.default = default
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kb-shard")
+        self._lock = threading.Lock()
+        self._queries = 0
+        self._fanout_total = 0
+        self._search_total = 0.0
+        self._dropped = 0
+        self._per_shard: Dict[str, int] = {name: 0 for name in self._shards}
+
+    @classmethod
+    def open(cls, paths: Dict[str, str], default: str, existing: Optional[Dict[str, SQLiteKnowledgeBase]] = None,
+             max_workers: int = 8) -> "ShardedKnowledgeBase":
+        """Abre los shards de `paths` (los de `existing` se reutilizan y no se cierran en close())."""
+        shards = dict(existing or {})
+        opened = []
+        for name, path in paths.items():
+            if name not in shards:
+                shards[name] = SQLiteKnowledgeBase(db_path=path)
+                opened.append(name)
+        sharded = cls(shards, default=default, max_workers=max_workers)
+        sharded._owned = opened
+        logger.info(f"✅ Sharded KnowledgeBase: {', '.join(sorted(shards))} (default: {default})")
+        return sharded
+
+    @property
+    def names(self) -> List[str]:
+        return sorted(self._shards)
+
+    def shard(self, name: str) -> SQLiteKnowledgeBase:
+        try:
+            return self._shards[name]
+        except KeyError:
+            raise UnknownShardError(name) from None
+
+    # ──────────────────────────────────────────────
+    # Ruteo
+    # ──────────────────────────────────────────────
+    def route(self, project: Optional[str] = None, category: Optional[str] = None) -> List[str]:
+        """
+        Shards de una request según su metadata: sin proyecto, el shard por defecto;
+        con proyecto, "proyecto" más sus "proyecto/categoria" (solo la pedida si
+        viene category).
+        """
+        project = (project or "").strip().lower() or self.default
+        category = (category or "").strip().lower()
+        prefix = project + SHARD_SEPARATOR
+        if category:
+            selected = [name for name in (project, prefix + category) if name in self._shards]
+        else:
+            selected = [name for name in self.names if name == project or name.startswith(prefix)]
+        if not selected:
+            raise UnknownShardError(f"{project}{SHARD_SEPARATOR + category if category else ''}")
+        return selected
+
+    # ──────────────────────────────────────────────
+    # Búsqueda con fan-out
+    # ──────────────────────────────────────────────
+    def _search_shard(self, name: str, query: str, top_k: int) -> List[Dict]:
+        return [{**result, 'shard': name} for result in self._shards[name].search(query, top_k)]
+
+    def _merge(self, names: List[str], per_shard: Iterable[List[Dict]], top_k: int, started: float) -> List[Dict]:
+        merged = heapq.nlargest(top_k, (r for results in per_shard for r in results), key=lambda r: r['score'])
+        with self._lock:
+            self._queries += 1
+            self._fanout_total += len(names)
+            self._search_total += time.perf_counter() - started
+            for name in names:
+                self._per_shard[name] = self._per_shard.get(name, 0) + 1
+        return merged
+
+    def search(self, query: str, top_k: int = 3, shards: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Top-k global: cada shard devuelve su top-k en paralelo y se combinan por score.
+        Cada resultado trae 'shard' (los ids solo son únicos dentro de un shard).
+        """
+        names = shards or [self.default]
+        started = time.perf_counter()
+        if len(names) == 1:
+            per_shard = [self._search_shard(names[0], query, top_k)]
+        else:
+            per_shard = list(self._executor.map(lambda name: self._search_shard(name, query, top_k), names))
+        return self._merge(names, per_shard, top_k, started)
+
+    async def asearch(self, query: str, top_k: int = 3, shards: Optional[List[str]] = None,
+                      timeout: Optional[float] = None) -> List[Dict]:
+        """
+        Igual que search() sin bloquear el event loop (un trabajo por shard, cada uno con
+        `timeout`). Un shard que falla o vence se descarta y se responde con el resto;
+        solo si fallan todos se propaga el error.
+        """
+        names = shards or [self.default]
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        outcomes = await asyncio.gather(*(
+            asyncio.wait_for(loop.run_in_executor(self._executor, self._search_shard, name, query, top_k), timeout)
+            for name in names
+        ), return_exceptions=True)
+        answered, per_shard, errors = [], [], []
+        for name, outcome in zip(names, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.warning(f"⚠️ Shard {name} dropped from search: {outcome!r}")
+                errors.append(outcome)
+            else:
+                answered.append(name)
+                per_shard.append(outcome)
+        if errors:
+            with self._lock:
+                self._dropped += len(errors)
+            if not answered:
+                raise errors[0]
+        return self._merge(answered, per_shard, top_k, started)
+
+    async def ascored_chunks(self, shard: str, doc_id: int, query: str,
+                             timeout: Optional[float] = None) -> List[Tuple[str, float]]:
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(
+            loop.run_in_executor(self._executor, self.shard(shard).scored_chunks, doc_id, query), timeout
+        )
+
+    def kb_version(self, shards: Optional[List[str]] = None) -> int:
+        """Suma de kb_version de los shards: cambia si cambia cualquiera de ellos."""
+        return sum(self._shards[name].kb_version() for name in (shards or [self.default]))
+
+    # ──────────────────────────────────────────────
+    # Estado / ciclo de vida
+    # ──────────────────────────────────────────────
+    def stats(self) -> Dict:
+        documents = {name: kb.count_documents() for name, kb in self._shards.items()}
+        with self._lock:
+            return {
+                "default": self.default,
+                "shards": {
+                    name: {"documents": documents[name], "queries": self._per_shard.get(name, 0)}
+                    for name in sorted(self._shards)
+                },
+                "queries": self._queries,
+                "dropped_shards": self._dropped,
+                "avg_fanout": round(self._fanout_total / self._queries, 2) if self._queries else 0.0,
+                "avg_search_ms": round(self._search_total / self._queries * 1000, 2) if self._queries else 0.0,
+            }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for name in self._owned:
+            self._shards[name].close()
@@ -0,0 +1,184 @@
+"""
+Speech Pipeline
+Motor en cadena LLM → TTS → avatar por oración: cada oración va al TTS apenas el LLM
+la termina y su audio se entrega al avatar mientras las siguientes todavía se generan.
+El tiempo hasta el primer movimiento de labios pasa a ser el de la primera oración, no
+el de la respuesta completa.
+
+- Orden:        las oraciones se entregan en el orden en que salieron del LLM, aunque
+                el TTS de una posterior termine antes.
+- Contrapresión: a lo sumo max_pending oraciones sintetizadas esperando entrega; si el
+                avatar va atrasado se deja de leer el stream del LLM.
+- Cancelación:  cancel() (p.ej. /liveavatar/interrupt) corta el stream, los TTS en
+                curso y la entrega; run() lanza SpeechInterrupted. Si llega antes de
+                run() (el turno todavía busca en la KB), run() ni arranca.
+
+El motor no conoce ElevenLabs ni LiveAvatar: recibe las funciones de síntesis y entrega.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SpeechInterrupted(Exception):
+    """El pipeline se canceló con cancel() antes de terminar de hablar."""
+
+
+@dataclass
+class SentenceTiming:
+    index: int
+    chars: int
+    ready: float              # el LLM cerró la oración
+    tts_started: float = 0.0
+    tts_done: float = 0.0
+    delivered: float = 0.0    # audio entregado al avatar
+
+
+class SpeechPipeline:
+    """
+    - synthesize(sentence) → audio de la oración
+    - deliver(index, audio) → entrega al avatar (se llama en orden, de a una)
+    - max_pending:         oraciones sintetizadas (o en síntesis) esperando entrega
+    - max_tts_concurrency: llamadas simultáneas al TTS
+    """
+
+    def __init__(self, synthesize: Callable[[str], Awaitable[Any]],
+                 deliver: Callable[[int, Any], Awaitable[None]],
+                 max_pending: int = 2, max_tts_concurrency: int = 2, name: str = "",
+                 started: Optional[float] = None):
+        self._synthesize = synthesize
+        self._deliver = deliver
+        self.max_pending = max_pending
+        self.max_tts_concurrency = max_tts_concurrency
+        self.name = name
+        # started: perf_counter del inicio de la request, para medir también etapas previas (STT)
+        self.started = started if started is not None else time.perf_counter()
+        self.sentences: List[str] = []
+        self.results: List[Any] = []   # audios ya entregados, en orden (parciales si hubo interrupción)
+        self._marks: Dict[str, float] = {}
+        self._timings: List[SentenceTiming] = []
+        self._tts_tasks: List[asyncio.Task] = []
+        self._task: Optional[asyncio.Task] = None
+        self._producer_error: Optional[BaseException] = None
+        self.interrupted = False
+
+    def mark(self, stage: str, at: Optional[float] = None) -> None:
+        """Marca de tiempo de una etapa externa (stt_done, llm_first_token...); la primera gana."""
+        self._marks.setdefault(stage, at if at is not None else time.perf_counter())
+
+    # ──────────────────────────────────────────────
+    # Ejecución
+    # ──────────────────────────────────────────────
+    async def run(self, sentences: AsyncIterator[str]) -> List[Any]:
+        """Habla las oraciones a medida que llegan → audios entregados, en orden."""
+        if self.interrupted:
+            aclose = getattr(sentences, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            self.mark("done")
+            raise SpeechInterrupted(self.name)
+        self._task = asyncio.ensure_future(self._run(sentences))
+        try:
+            return await self._task
+        except asyncio.CancelledError:
+            if self.interrupted:
+                raise SpeechInterrupted(self.name) from None
+            raise
+        finally:
+            self.mark("done")
+
+    def cancel(self) -> bool:
+        """Interrumpe el pipeline (en curso o todavía sin arrancar); False si ya había terminado."""
+        if self._task is not None and self._task.done():
+            return False
+        self.interrupted = True
+        if self._task is not None:
+            self._task.cancel()
+        return True
+
+    async def _run(self, sentences: AsyncIterator[str]) -> List[Any]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending)
+        tts_slots = asyncio.Semaphore(self.max_tts_concurrency)
+        producer = asyncio.ensure_future(self._produce(sentences, queue, tts_slots))
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                timing, tts_task = item
+                audio = await tts_task
+                await self._deliver(timing.index, audio)
+                timing.delivered = time.perf_counter()
+                self.mark("first_avatar")
+                self.results.append(audio)
+            if self._producer_error is not None:
+                raise self._producer_error
+            return self.results
+        finally:
+            # Error o cancelación: no dejar TTS ni lectura del LLM corriendo en segundo plano
+            pending = [t for t in [producer, *self._tts_tasks] if not t.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            for task in self._tts_tasks:
+                if task.done() and not task.cancelled():
+                    task.exception()   # ya reportado por quien la esperó (o irrelevante tras cancelar)
+
+    async def _produce(self, sentences: AsyncIterator[str], queue: asyncio.Queue,
+                       tts_slots: asyncio.Semaphore) -> None:
+        try:
+            async for sentence in sentences:
+                timing = SentenceTiming(index=len(self._timings), chars=len(sentence), ready=time.perf_counter())
+                self.mark("first_sentence")
+                self._timings.append(timing)
+                self.sentences.append(sentence)
+                task = asyncio.ensure_future(self._synthesize_one(sentence, timing, tts_slots))
+                self._tts_tasks.append(task)
+                await queue.put((timing, task))   # contrapresión: espera si el avatar va atrasado
+        except Exception as e:
+            self._producer_error = e
+        finally:
+            aclose = getattr(sentences, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        self.mark("llm_done")
+        await queue.put(None)
+
+    async def _synthesize_one(self, sentence: str, timing: SentenceTiming, tts_slots: asyncio.Semaphore) -> Any:
+        async with tts_slots:
+            timing.tts_started = time.perf_counter()
+            audio = await self._synthesize(sentence)
+            timing.tts_done = time.perf_counter()
+            self.mark("first_audio")
+            return audio
+
+    # ──────────────────────────────────────────────
+    # Métricas
+    # ──────────────────────────────────────────────
+    def report(self) -> Dict:
+        """Tiempos en ms desde la creación del pipeline (None = la etapa no ocurrió)."""
+        def ms(t: float) -> Optional[float]:
+            return round((t - self.started) * 1000, 1) if t else None
+
+        return {
+            "stages": {stage: ms(t) for stage, t in sorted(self._marks.items(), key=lambda kv: kv[1])},
+            "sentences": [
+                {
+                    "index":   t.index,
+                    "chars":   t.chars,
+                    "llm_ms":  ms(t.ready),
+                    "tts_start_ms": ms(t.tts_started),
+                    "tts_done_ms":  ms(t.tts_done),
+                    "avatar_ms": ms(t.delivered),
+                }
+                for t in self._timings
+            ],
+            "first_avatar_ms": ms(self._marks.get("first_avatar", 0.0)),
+            "total_ms": ms(self._marks.get("done", 0.0)),
+            "interrupted": self.interrupted,
+        }
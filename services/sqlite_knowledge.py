@@ -1,26 +1,210 @@
 """
 SQLite Knowledge Base Service
-Búsqueda por palabras clave (sin torch ni sentence-transformers)
+Búsqueda full-text con FTS5 + bm25() (sin torch ni sentence-transformers)
+
+Backends de búsqueda (KB_SEARCH_BACKEND):
+- "fts5"   (default): índice FTS5 dentro de SQLite
+- "memory": índice invertido BM25 en proceso (services/bm25_index.py)
+
+Los documentos oficiales (preguntas numeradas) se guardan además como chunks
+pre-procesados en conocimiento_chunks, con su propio índice FTS5.
+
+Embeddings (opcional, requiere numpy): la columna embedding guarda BLOBs float32
+o int8 + escala (services/embedding_matrix.py). semantic_search() rankea contra la
+matriz completa, mapeada desde un sidecar .npy mientras siga al día con la base.
+
+Deduplicación (services/dedup.py): cada documento guarda la huella de su contenido
+normalizado y una firma MinHash; add_documents descarta (o fusiona) duplicados
+exactos y casi duplicados en lugar de insertarlos otra vez.
+
+Conexiones: una conexión de lectura por hilo + un único escritor serializado,
+todas persistentes y en modo WAL (lecturas concurrentes con seed/ingesta).
 """
+import hashlib
+import os
 import sqlite3
 import json
 import logging
 import re
-from typing import List, Dict, Optional
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Dict, Optional, Sequence, Tuple
 from pathlib import Path
 
+from services.bm25_index import BM25Index, fold_accents, tokenize
+from services.dedup import DedupReport, NearDuplicateIndex, fingerprint, minhash, valid_signature
+from services.keyword_matcher import KeywordMatcher
+
+try:
+    from services.embedding_matrix import EMBEDDING_DTYPES, EmbeddingMatrix, pack_embedding
+except ImportError:  # numpy no instalado — la búsqueda semántica queda deshabilitada
+    EmbeddingMatrix = None
+
 logger = logging.getLogger(__name__)
 
+SEARCH_BACKENDS = ("fts5", "memory")
+
+# Prefijo de título de la Base de Conocimientos Oficial (seed + load_documents.py)
+OFFICIAL_DOC_PREFIX = "Prados de Paraíso - Base de Conocimientos Oficial"
+
+# Bloques = preguntas numeradas ("12. ¿...?" / "12) ...") o párrafos separados por línea en blanco
+_BLOCK_SPLIT_RE = re.compile(r'\n(?=\d+[\.\)]|\n)')
+_QUESTION_NUM_RE = re.compile(r'(\d+)[\.\)]')
+
+# Tuning de conexiones — todas las conexiones son persistentes
+BUSY_TIMEOUT_S = 10.0               # espera ante locks de otros procesos (workers gunicorn)
+MMAP_SIZE = 256 * 1024 * 1024       # lecturas vía mmap en lugar de read()
+CACHE_SIZE_KIB = 16 * 1024          # page cache por conexión
+STATEMENT_CACHE_SIZE = 128          # statements preparados cacheados por conexión
+
+# Documentos por transacción en add_documents
+INSERT_BATCH_SIZE = 1000
+
+# Qué hace add_documents con un duplicado: descartarlo, fusionar su metadata en el
+# documento existente, o insertarlo igual (comportamiento anterior)
+DUPLICATE_MODES = ("skip", "merge", "keep")
+
+# Formato de los embeddings nuevos: "float32" o "int8" (un cuarto del tamaño)
+EMBEDDING_DTYPE = os.getenv("KB_EMBEDDING_DTYPE", "float32").lower()
+
+def content_hash(contenido: str) -> str:
+    """sha256 del contenido — el seed compara hashes en lugar de leer documentos completos."""
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def split_into_chunks(contenido: str) -> List[Tuple[int, str, str]]:
+    """
+    Divide un documento en chunks (numero, texto, texto_busqueda).
+    numero es el de la pregunta (0 si el bloque no está numerado), texto viene
+    sin asteriscos de markdown y texto_busqueda en minúsculas y sin tildes.
+    """
+    chunks = []
+    for block in _BLOCK_SPLIT_RE.split(contenido):
+        texto = re.sub(r'\*+', '', block).strip()
+        if not texto:
+            continue
+        m = _QUESTION_NUM_RE.match(texto)
+        chunks.append((int(m.group(1)) if m else 0, texto, fold_accents(texto)))
+    return chunks
+
+
+@dataclass
+class _DedupState:
+    """Huellas (→ id más antiguo) e índice LSH de la base tal como está en `version` (kb_version)."""
+    version: int
+    known: Dict[str, int] = field(default_factory=dict)
+    near: NearDuplicateIndex = field(default_factory=NearDuplicateIndex)
+
+
 class SQLiteKnowledgeBase:
-    def __init__(self, db_path: str = "/app/backend/prados.db"):
+    def __init__(self, db_path: str = "/app/backend/prados.db", search_backend: Optional[str] = None,
+                 embeddings_path: Optional[str] = None):
         self.db_path = db_path
+        self._fts_enabled = False
+        self.search_backend = (search_backend or os.getenv("KB_SEARCH_BACKEND", "fts5")).lower()
+        if self.search_backend not in SEARCH_BACKENDS:
+            raise ValueError(f"Unknown search backend: {self.search_backend}")
+        self._index: Optional[BM25Index] = None
+        self._pid = os.getpid()
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        # Matriz de embeddings: se arma en la primera búsqueda semántica
+        self.embeddings_path = embeddings_path or f"{db_path}.embeddings"
+        self._embeddings: Optional["EmbeddingMatrix"] = None
+        self._embeddings_lock = threading.Lock()
+        # Estado de dedup reutilizado entre altas mientras kb_version no cambie (lo mantiene el escritor)
+        self._dedup: Optional[_DedupState] = None
         self._init_database()
-        logger.info(f"✅ SQLite KnowledgeBase initialized at {db_path}")
+        if self.search_backend == "memory":
+            self.refresh_index()
+        logger.info(f"✅ SQLite KnowledgeBase initialized at {db_path} (search: {self.search_backend})")
+
+    # ──────────────────────────────────────────────
+    # Conexiones
+    # ──────────────────────────────────────────────
+    def _connect(self, read_only: bool) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT_S,
+            isolation_level=None,          # transacciones explícitas (BEGIN IMMEDIATE)
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+        if read_only:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def _check_fork(self) -> None:
+        """Una conexión SQLite no puede cruzar un fork — cada worker abre las suyas."""
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._local = threading.local()
+            self._readers = []
+            self._readers_lock = threading.Lock()
+            self._write_lock = threading.Lock()
+            self._writer = None
+
+    def _reader(self) -> sqlite3.Connection:
+        """Conexión de lectura del hilo actual (se crea en el primer uso)."""
+        self._check_fork()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect(read_only=True)
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    @contextmanager
+    def write_transaction(self) -> Iterator[sqlite3.Cursor]:
+        """
+        Único escritor del proceso: serializa las escrituras y envuelve el bloque
+        en BEGIN IMMEDIATE … COMMIT (ROLLBACK si hay excepción). BEGIN IMMEDIATE
+        toma el lock de escritura al inicio, así dos procesos no se bloquean
+        mutuamente al pasar de lectura a escritura.
+        """
+        self._check_fork()
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect(read_only=False)
+            conn = self._writer
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                yield cursor
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def close(self) -> None:
+        """Cierra todas las conexiones abiertas por este proceso."""
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+        for conn in readers:
+            conn.close()
+        self._local = threading.local()
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
 
     def _init_database(self):
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            # WAL es persistente en el archivo; no puede activarse dentro de una transacción
+            conn = self._connect(read_only=False)
+            mode = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+            self._writer = conn
+            if mode.lower() != "wal":
+                logger.warning(f"⚠️ journal_mode is {mode}, expected WAL")
+            with self.write_transaction() as cursor:
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS conocimiento_legal (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -28,116 +212,986 @@ class SQLiteKnowledgeBase:
                         contenido TEXT NOT NULL,
                         embedding TEXT,
                         metadata TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        content_hash TEXT,
+                        fingerprint TEXT,
+                        minhash BLOB
                     )
                 ''')
                 cursor.execute('''
                     CREATE INDEX IF NOT EXISTS idx_titulo
                     ON conocimiento_legal(titulo)
                 ''')
-                conn.commit()
+                self._init_content_hash(cursor)
+                self._init_dedup(cursor)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS conocimiento_chunks (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        documento_id INTEGER NOT NULL,
+                        numero INTEGER NOT NULL,
+                        texto TEXT NOT NULL,
+                        texto_busqueda TEXT NOT NULL
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_chunks_documento
+                    ON conocimiento_chunks(documento_id, numero)
+                ''')
+                # Los chunks de un documento borrado o reescrito quedan obsoletos
+                cursor.execute('''
+                    CREATE TRIGGER IF NOT EXISTS conocimiento_chunks_parent_ad
+                    AFTER DELETE ON conocimiento_legal BEGIN
+                        DELETE FROM conocimiento_chunks WHERE documento_id = old.id;
+                    END
+                ''')
+                cursor.execute('''
+                    CREATE TRIGGER IF NOT EXISTS conocimiento_chunks_parent_au
+                    AFTER UPDATE OF contenido ON conocimiento_legal BEGIN
+                        DELETE FROM conocimiento_chunks WHERE documento_id = old.id;
+                    END
+                ''')
+                self._init_meta(cursor)
+                self._init_embeddings(cursor)
+                self._init_fts(cursor)
             logger.info("✅ Database tables created/verified")
         except Exception as e:
             logger.error(f"Error initializing database: {str(e)}")
             raise
 
-    def _keyword_score(self, query: str, titulo: str, contenido: str) -> float:
-        """Puntaje simple por coincidencia de palabras clave."""
-        # Cap query length to prevent ReDoS — use str.split() instead of regex
-        safe_query = query[:500].lower()
-        words = set(w for w in safe_query.split() if len(w) >= 2)
-        if not words:
-            return 0.0
-        text = (titulo + " " + contenido).lower()
-        matches = sum(1 for w in words if w in text)
-        return matches / len(words)
-
-    def add_document(self, titulo: str, contenido: str, metadata: Optional[Dict] = None):
+    def _init_content_hash(self, cursor: sqlite3.Cursor) -> None:
+        """Agrega content_hash a un prados.db previo y lo calcula una única vez."""
+        cursor.execute("PRAGMA table_info(conocimiento_legal)")
+        if 'content_hash' not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute('ALTER TABLE conocimiento_legal ADD COLUMN content_hash TEXT')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_content_hash
+            ON conocimiento_legal(content_hash)
+        ''')
+        cursor.execute('SELECT id, contenido FROM conocimiento_legal WHERE content_hash IS NULL')
+        missing = [(content_hash(contenido), doc_id) for doc_id, contenido in cursor.fetchall()]
+        if missing:
+            cursor.executemany('UPDATE conocimiento_legal SET content_hash = ? WHERE id = ?', missing)
+            logger.info(f"✅ content_hash backfilled for {len(missing)} documents")
+
+    def _init_dedup(self, cursor: sqlite3.Cursor) -> None:
+        """
+        Columnas de deduplicación en un prados.db previo. La huella y la firma MinHash
+        se calculan al necesitarlas (_dedup_rows); reescribir el contenido sin
+        recalcularlas las invalida.
+        """
+        cursor.execute("PRAGMA table_info(conocimiento_legal)")
+        columns = {row[1] for row in cursor.fetchall()}
+        if 'fingerprint' not in columns:
+            cursor.execute('ALTER TABLE conocimiento_legal ADD COLUMN fingerprint TEXT')
+        if 'minhash' not in columns:
+            cursor.execute('ALTER TABLE conocimiento_legal ADD COLUMN minhash BLOB')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_fingerprint
+            ON conocimiento_legal(fingerprint)
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS conocimiento_dedup_stale_au
+            AFTER UPDATE OF contenido ON conocimiento_legal
+            WHEN new.fingerprint IS old.fingerprint BEGIN
+                UPDATE conocimiento_legal SET fingerprint = NULL, minhash = NULL WHERE id = new.id;
+            END
+        ''')
+
+    @staticmethod
+    def _bump_sql(clave: str) -> str:
+        """Sentencia (para cuerpos de trigger) que incrementa un contador de kb_meta."""
+        return (
+            f"INSERT INTO kb_meta (clave, valor) VALUES ('{clave}', 1) "
+            "ON CONFLICT(clave) DO UPDATE SET valor = valor + 1;"
+        )
+
+    def _init_meta(self, cursor: sqlite3.Cursor) -> None:
+        """
+        kb_meta guarda contadores de versión mantenidos por triggers. kb_version sube
+        con cualquier cambio de documentos o chunks — lo comparten todos los procesos,
+        así cada worker detecta ingestas hechas por otro (ver services/kb_snapshot.py).
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS kb_meta (
+                clave TEXT PRIMARY KEY,
+                valor INTEGER NOT NULL
+            )
+        ''')
+        bump = self._bump_sql('kb_version')
+        for table, events in (
+            ('conocimiento_legal', ('INSERT', 'DELETE', 'UPDATE OF titulo, contenido')),
+            ('conocimiento_chunks', ('INSERT', 'DELETE')),
+        ):
+            for event in events:
+                suffix = event.split()[0][0].lower()
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {table}_version_a{suffix}
+                    AFTER {event} ON {table} BEGIN
+                        {bump}
+                    END
+                ''')
+
+    def _init_embeddings(self, cursor: sqlite3.Cursor) -> None:
+        """
+        embeddings_version (kb_meta) sube con cada alta/baja/cambio de embedding:
+        el sidecar .npy solo se reutiliza si se armó con la misma versión.
+        Reescribir el contenido de un documento (sin embedding nuevo) invalida el suyo.
+        """
+        bump = self._bump_sql('embeddings_version')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS kb_embeddings_version_ai
+            AFTER INSERT ON conocimiento_legal WHEN new.embedding IS NOT NULL BEGIN
+                {bump}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS kb_embeddings_version_ad
+            AFTER DELETE ON conocimiento_legal WHEN old.embedding IS NOT NULL BEGIN
+                {bump}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS kb_embeddings_version_au
+            AFTER UPDATE OF embedding ON conocimiento_legal BEGIN
+                {bump}
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS conocimiento_embedding_stale_au
+            AFTER UPDATE OF contenido ON conocimiento_legal
+            WHEN old.embedding IS NOT NULL AND new.embedding IS old.embedding BEGIN
+                UPDATE conocimiento_legal SET embedding = NULL WHERE id = new.id;
+            END
+        ''')
+
+    def _init_fts(self, cursor: sqlite3.Cursor) -> None:
+        """
+        Crea el índice FTS5 (external content sobre conocimiento_legal) y los
+        triggers que lo mantienen sincronizado en INSERT/UPDATE/DELETE — incluidos
+        los UPDATE directos que hace _seed_knowledge_base. Si la tabla FTS no
+        existía (prados.db previo), hace el backfill una única vez con 'rebuild'.
+        """
         try:
-            metadata_json = json.dumps(metadata) if metadata else None
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO conocimiento_legal (titulo, contenido, metadata)
-                    VALUES (?, ?, ?)
-                ''', (titulo, contenido, metadata_json))
-                conn.commit()
-                doc_id = cursor.lastrowid
-            logger.info(f"✅ Document added: {titulo} (ID: {doc_id})")
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'conocimiento_fts'"
+            )
+            needs_backfill = cursor.fetchone() is None
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'conocimiento_chunks_fts'"
+            )
+            chunks_need_backfill = cursor.fetchone() is None
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS conocimiento_fts USING fts5(
+                    titulo,
+                    contenido,
+                    content='conocimiento_legal',
+                    content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            ''')
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS conocimiento_fts_ai
+                AFTER INSERT ON conocimiento_legal BEGIN
+                    INSERT INTO conocimiento_fts(rowid, titulo, contenido)
+                    VALUES (new.id, new.titulo, new.contenido);
+                END
+            ''')
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS conocimiento_fts_ad
+                AFTER DELETE ON conocimiento_legal BEGIN
+                    INSERT INTO conocimiento_fts(conocimiento_fts, rowid, titulo, contenido)
+                    VALUES ('delete', old.id, old.titulo, old.contenido);
+                END
+            ''')
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS conocimiento_fts_au
+                AFTER UPDATE OF titulo, contenido ON conocimiento_legal BEGIN
+                    INSERT INTO conocimiento_fts(conocimiento_fts, rowid, titulo, contenido)
+                    VALUES ('delete', old.id, old.titulo, old.contenido);
+                    INSERT INTO conocimiento_fts(rowid, titulo, contenido)
+                    VALUES (new.id, new.titulo, new.contenido);
+                END
+            ''')
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS conocimiento_chunks_fts USING fts5(
+                    texto_busqueda,
+                    content='conocimiento_chunks',
+                    content_rowid='id'
+                )
+            ''')
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS conocimiento_chunks_fts_ai
+                AFTER INSERT ON conocimiento_chunks BEGIN
+                    INSERT INTO conocimiento_chunks_fts(rowid, texto_busqueda)
+                    VALUES (new.id, new.texto_busqueda);
+                END
+            ''')
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS conocimiento_chunks_fts_ad
+                AFTER DELETE ON conocimiento_chunks BEGIN
+                    INSERT INTO conocimiento_chunks_fts(conocimiento_chunks_fts, rowid, texto_busqueda)
+                    VALUES ('delete', old.id, old.texto_busqueda);
+                END
+            ''')
+            if needs_backfill:
+                cursor.execute("INSERT INTO conocimiento_fts(conocimiento_fts) VALUES ('rebuild')")
+                logger.info("✅ FTS5 index backfilled from conocimiento_legal")
+            if chunks_need_backfill:
+                cursor.execute("INSERT INTO conocimiento_chunks_fts(conocimiento_chunks_fts) VALUES ('rebuild')")
+            self._fts_enabled = True
+        except sqlite3.OperationalError as e:
+            # SQLite compilado sin FTS5 — search() cae al escaneo por palabras clave
+            logger.warning(f"⚠️ FTS5 not available, using keyword scan: {e}")
+            self._fts_enabled = False
+
+    @staticmethod
+    def _fts_query(query: str) -> str:
+        """Convierte texto libre en una expresión MATCH segura (términos entre comillas, OR)."""
+        # Cap query length to prevent ReDoS
+        terms = sorted(set(t for t in re.findall(r'\w+', query[:500].lower()) if len(t) >= 2))
+        # Prefijo solo para términos largos: "posesion"* cubre posesiones/posesionario,
+        # mientras que "de"* expandiría a medio vocabulario
+        return " OR ".join(f'"{t}"*' if len(t) >= 4 else f'"{t}"' for t in terms)
+
+    @staticmethod
+    def _keyword_score(matcher: KeywordMatcher, titulo: str, contenido: str) -> float:
+        """Puntaje simple por coincidencia de palabras clave (sin distinguir tildes)."""
+        return matcher.score(f"{titulo} {contenido}")
+
+    def add_document(self, titulo: str, contenido: str, metadata: Optional[Dict] = None,
+                     chunked: bool = False, on_duplicate: str = "skip", near_duplicates: bool = False) -> int:
+        """
+        Inserta un documento; con chunked=True también guarda sus chunks por pregunta.
+        Pasa por la misma deduplicación que add_documents: si es duplicado devuelve el
+        id del documento existente.
+        """
+        try:
+            report = DedupReport()
+            doc_id = self.add_documents(
+                [{'titulo': titulo, 'contenido': contenido, 'metadata': metadata, 'chunked': chunked}],
+                on_duplicate=on_duplicate, near_duplicates=near_duplicates, report=report,
+            )[0]
+            if report.inserted:
+                logger.info(f"✅ Document added: {titulo} (ID: {doc_id})")
             return doc_id
         except Exception as e:
             logger.error(f"Error adding document: {str(e)}")
             raise
 
+    def add_documents(self, documents: Iterable[Dict], batch_size: int = INSERT_BATCH_SIZE,
+                      on_duplicate: str = "skip", report: Optional[DedupReport] = None,
+                      near_duplicates: bool = False) -> List[int]:
+        """
+        Alta masiva: cada documento es {'titulo', 'contenido', 'metadata'?, 'chunked'?}.
+        Inserta con executemany en transacciones de batch_size documentos (chunks
+        incluidos) y actualiza el índice en memoria por lote. Devuelve los ids en orden.
+
+        Duplicados (misma huella normalizada, contra la base o dentro de la misma carga)
+        según on_duplicate: "skip" no los inserta, "merge" además suma su metadata al
+        documento existente, "keep" los inserta. Para un duplicado se devuelve el id del
+        documento existente; el detalle de lo descartado queda en `report`.
+
+        Los casi duplicados (firma MinHash sobre el umbral) pueden diferir en una cláusula:
+        por defecto se insertan y solo se informan en report.similar; con
+        near_duplicates=True se tratan como duplicados.
+        """
+        if on_duplicate not in DUPLICATE_MODES:
+            raise ValueError(f"Unknown duplicate mode: {on_duplicate}")
+        report = report if report is not None else DedupReport()
+        ids: List[int] = []
+        batch: List[Dict] = []
+        for doc in documents:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                ids.extend(self._insert_batch(batch, on_duplicate, near_duplicates, report))
+                batch = []
+        if batch:
+            ids.extend(self._insert_batch(batch, on_duplicate, near_duplicates, report))
+        if report.similar:
+            logger.info(f"⚠️ {len(report.similar)} inserted documents are near-duplicates of existing ones")
+        if report.dropped:
+            logger.info(f"✅ Dedup: {report.summary()}")
+        return ids
+
+    def _insert_batch(self, batch: List[Dict], on_duplicate: str, near_duplicates: bool,
+                      report: DedupReport) -> List[int]:
+        dedup = on_duplicate != "keep"
+        # Huella y firma fuera del lock de escritura
+        prepared = [
+            (doc, fingerprint(doc['contenido']), minhash(doc['contenido']) if dedup else None)
+            for doc in batch
+        ]
+        ids: List[int] = []
+        rows = []
+        inserted: List[Tuple[int, Dict]] = []
+        merges: Dict[int, List[Dict]] = {}
+        try:
+            with self.write_transaction() as cursor:
+                state = self._dedup_state(cursor) if dedup else None
+                # AUTOINCREMENT + lock de escritura tomado: los ids nuevos son consecutivos
+                cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'conocimiento_legal'")
+                row = cursor.fetchone()
+                cursor.execute('SELECT MAX(id) FROM conocimiento_legal')
+                next_id = max(row[0] if row else 0, cursor.fetchone()[0] or 0) + 1
+                for doc, digest, signature in prepared:
+                    if state is not None:
+                        existing_id = state.known.get(digest)
+                        match = None if existing_id is not None or signature is None else state.near.query(signature)
+                        if match is not None and not near_duplicates:
+                            report.similar.append((doc['titulo'], match[0], round(match[1], 3)))
+                            match = None
+                        if existing_id is not None or match is not None:
+                            if existing_id is not None:
+                                report.exact.append((doc['titulo'], existing_id))
+                            else:
+                                existing_id = match[0]
+                                report.near.append((doc['titulo'], existing_id, round(match[1], 3)))
+                            if on_duplicate == "merge":
+                                merges.setdefault(existing_id, []).append(doc)
+                            ids.append(existing_id)
+                            continue
+                        state.known[digest] = next_id
+                        if signature is not None:
+                            state.near.add(next_id, signature)
+                    rows.append((
+                        doc['titulo'], doc['contenido'], json.dumps(doc['metadata']) if doc.get('metadata') else None,
+                        content_hash(doc['contenido']), digest,
+                        (signature or b"") if state is not None else None,
+                    ))
+                    ids.append(next_id)
+                    inserted.append((next_id, doc))
+                    next_id += 1
+                cursor.executemany('''
+                    INSERT INTO conocimiento_legal (titulo, contenido, metadata, content_hash, fingerprint, minhash)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', rows)
+                chunk_rows = [
+                    (doc_id, numero, texto, busqueda)
+                    for doc_id, doc in inserted if doc.get('chunked')
+                    for numero, texto, busqueda in split_into_chunks(doc['contenido'])
+                ]
+                if chunk_rows:
+                    cursor.executemany('''
+                        INSERT INTO conocimiento_chunks (documento_id, numero, texto, texto_busqueda)
+                        VALUES (?, ?, ?, ?)
+                    ''', chunk_rows)
+                if merges:
+                    self._merge_metadata(cursor, merges)
+                    report.merged.extend(merges)
+                if state is not None:
+                    # El estado ya incluye este lote: sigue valiendo para la versión que deja la transacción
+                    state.version = self._meta_value('kb_version', cursor)
+        except BaseException:
+            # Rollback: el estado en memoria tiene altas que no se confirmaron
+            self._dedup = None
+            raise
+        report.inserted += len(inserted)
+        if self._index is not None and inserted:
+            self._index.add_many((doc_id, f"{doc['titulo']} {doc['contenido']}") for doc_id, doc in inserted)
+        if inserted:
+            logger.info(f"✅ {len(inserted)} documents added (IDs {inserted[0][0]}–{inserted[-1][0]}, "
+                        f"{len(chunk_rows)} chunks, {len(batch) - len(inserted)} duplicates)")
+        return ids
+
+    @staticmethod
+    def _merge_metadata(cursor: sqlite3.Cursor, merges: Dict[int, List[Dict]]) -> None:
+        """
+        Suma la metadata de los duplicados al documento que se conserva: las claves
+        existentes no se pisan y los títulos descartados quedan en 'duplicados'.
+        """
+        placeholders = ",".join("?" * len(merges))
+        cursor.execute(f'SELECT id, titulo, metadata FROM conocimiento_legal WHERE id IN ({placeholders})',
+                       list(merges))
+        updates = []
+        for doc_id, titulo, metadata_json in cursor.fetchall():
+            metadata = json.loads(metadata_json) if metadata_json else {}
+            aliases = metadata.setdefault('duplicados', [])
+            for doc in merges[doc_id]:
+                for key, value in (doc.get('metadata') or {}).items():
+                    metadata.setdefault(key, value)
+                if doc['titulo'] != titulo and doc['titulo'] not in aliases:
+                    aliases.append(doc['titulo'])
+            updates.append((json.dumps(metadata), doc_id))
+        cursor.executemany('UPDATE conocimiento_legal SET metadata = ? WHERE id = ?', updates)
+
+    # ──────────────────────────────────────────────
+    # Deduplicación
+    # ──────────────────────────────────────────────
+    def _dedup_rows(self, write_cursor: Optional[sqlite3.Cursor] = None) -> List[Tuple[int, str, str, Optional[bytes]]]:
+        """
+        (id, titulo, huella, firma) de todos los documentos por id. Calcula y guarda
+        las que faltan (documentos previos a la columna, seed, contenido reescrito).
+        Con write_cursor lee y guarda dentro de esa transacción de escritura.
+        """
+        cursor = write_cursor or self._reader().cursor()
+        cursor.execute('SELECT id, titulo, fingerprint, minhash FROM conocimiento_legal ORDER BY id')
+        rows = cursor.fetchall()
+        missing = [doc_id for doc_id, _, digest, signature in rows if digest is None or signature is None]
+        if missing:
+            computed = {}
+            for start in range(0, len(missing), INSERT_BATCH_SIZE):
+                part = missing[start:start + INSERT_BATCH_SIZE]
+                cursor.execute(
+                    f'SELECT id, contenido FROM conocimiento_legal WHERE id IN ({",".join("?" * len(part))})', part
+                )
+                for doc_id, contenido in cursor.fetchall():
+                    computed[doc_id] = (fingerprint(contenido), minhash(contenido) or b"")
+            sql = 'UPDATE conocimiento_legal SET fingerprint = ?, minhash = ? WHERE id = ?'
+            updates = [(digest, signature, doc_id) for doc_id, (digest, signature) in computed.items()]
+            if write_cursor is not None:
+                write_cursor.executemany(sql, updates)
+            else:
+                with self.write_transaction() as cursor:
+                    cursor.executemany(sql, updates)
+            logger.info(f"✅ Dedup signatures computed for {len(computed)} documents")
+            rows = [(doc_id, titulo, *computed.get(doc_id, (digest, signature)))
+                    for doc_id, titulo, digest, signature in rows]
+        return rows
+
+    def _dedup_state(self, cursor: sqlite3.Cursor) -> _DedupState:
+        """
+        Estado de dedup de la base actual (dentro de la transacción de escritura). Se
+        reutiliza mientras kb_version no cambie; si otro proceso escribió, se recarga.
+        """
+        version = self._meta_value('kb_version', cursor)
+        if self._dedup is not None and self._dedup.version == version:
+            return self._dedup
+        state = _DedupState(version)
+        for doc_id, _titulo, digest, signature in self._dedup_rows(cursor):
+            state.known.setdefault(digest, doc_id)
+            if valid_signature(signature):
+                state.near.add(doc_id, signature)
+        self._dedup = state
+        return state
+
+    def remove_duplicates(self, near_duplicates: bool = True) -> DedupReport:
+        """
+        Limpia una base que ya tiene duplicados (p.ej. load_documents.py ejecutado dos
+        veces): conserva el documento más antiguo de cada grupo y borra el resto.
+        """
+        report = DedupReport()
+        known: Dict[str, int] = {}
+        near = NearDuplicateIndex()
+        doomed: List[int] = []
+        for doc_id, titulo, digest, signature in self._dedup_rows():
+            if digest in known:
+                report.exact.append((titulo, known[digest]))
+                doomed.append(doc_id)
+                continue
+            match = near.query(signature) if near_duplicates and valid_signature(signature) else None
+            if match is not None:
+                report.near.append((titulo, match[0], round(match[1], 3)))
+                doomed.append(doc_id)
+                continue
+            known[digest] = doc_id
+            if valid_signature(signature):
+                near.add(doc_id, signature)
+        if doomed:
+            with self.write_transaction() as cursor:
+                cursor.executemany('DELETE FROM conocimiento_legal WHERE id = ?', [(d,) for d in doomed])
+            self.reindex_documents(doomed)
+            logger.info(f"✅ Removed {len(doomed)} duplicate documents")
+        return report
+
+    # ──────────────────────────────────────────────
+    # Staging (migraciones reanudables)
+    # ──────────────────────────────────────────────
+    def begin_staging(self, source: str, restart: bool = False) -> Tuple[Optional[str], int]:
+        """
+        Prepara la tabla de staging para una migración desde `source`. Devuelve el
+        checkpoint (último id de origen confirmado, filas en staging) para reanudar;
+        con restart=True descarta lo que hubiera de una corrida anterior.
+        """
+        with self.write_transaction() as cursor:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS conocimiento_staging (
+                    fuente_id TEXT PRIMARY KEY,
+                    titulo TEXT NOT NULL,
+                    contenido TEXT NOT NULL,
+                    metadata TEXT,
+                    embedding BLOB,
+                    content_hash TEXT,
+                    fingerprint TEXT
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS migracion_checkpoint (
+                    fuente TEXT PRIMARY KEY,
+                    ultimo_id TEXT,
+                    filas INTEGER NOT NULL DEFAULT 0,
+                    actualizado TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            cursor.execute("PRAGMA table_info(conocimiento_staging)")
+            columns = {row[1] for row in cursor.fetchall()}
+            for column in ('content_hash', 'fingerprint'):
+                if column not in columns:
+                    cursor.execute(f'ALTER TABLE conocimiento_staging ADD COLUMN {column} TEXT')
+            if restart:
+                cursor.execute('DELETE FROM conocimiento_staging')
+                cursor.execute('DELETE FROM migracion_checkpoint WHERE fuente = ?', (source,))
+            cursor.execute('SELECT ultimo_id FROM migracion_checkpoint WHERE fuente = ?', (source,))
+            row = cursor.fetchone()
+            cursor.execute('SELECT COUNT(*) FROM conocimiento_staging')
+            staged = cursor.fetchone()[0]
+        return (row[0] if row else None), staged
+
+    def stage_documents(self, source: str, documents: List[Dict], last_source_id: str) -> int:
+        """
+        Escribe un lote en staging y avanza el checkpoint en la misma transacción:
+        si el proceso muere, la próxima corrida retoma exactamente desde last_source_id.
+        Cada documento: {'fuente_id', 'titulo', 'contenido', 'metadata'?, 'embedding'?}.
+        """
+        rows = []
+        for doc in documents:
+            embedding = doc.get('embedding')
+            blob = pack_embedding(embedding, EMBEDDING_DTYPE) if embedding and EmbeddingMatrix is not None else None
+            rows.append((
+                str(doc['fuente_id']), doc['titulo'], doc['contenido'],
+                json.dumps(doc['metadata']) if doc.get('metadata') else None, blob,
+                content_hash(doc['contenido']), fingerprint(doc['contenido']),
+            ))
+        with self.write_transaction() as cursor:
+            cursor.executemany('''
+                INSERT OR REPLACE INTO conocimiento_staging
+                    (fuente_id, titulo, contenido, metadata, embedding, content_hash, fingerprint)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            cursor.execute('''
+                INSERT INTO migracion_checkpoint (fuente, ultimo_id, filas) VALUES (?, ?, ?)
+                ON CONFLICT(fuente) DO UPDATE SET
+                    ultimo_id = excluded.ultimo_id,
+                    filas = filas + excluded.filas,
+                    actualizado = CURRENT_TIMESTAMP
+            ''', (source, last_source_id, len(rows)))
+        return len(rows)
+
+    def swap_in_staging(self, source: str) -> int:
+        """
+        Reemplaza todos los documentos por el contenido de staging en una única
+        transacción (los lectores ven la base vieja hasta el COMMIT) y limpia staging
+        y checkpoint. Los duplicados exactos (misma huella) entran una sola vez.
+        Los triggers mantienen FTS, chunks y versiones al día.
+        """
+        with self.write_transaction() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM conocimiento_staging')
+            staged = cursor.fetchone()[0]
+            cursor.execute('DELETE FROM conocimiento_legal')
+            cursor.execute('''
+                INSERT INTO conocimiento_legal (titulo, contenido, metadata, embedding, content_hash, fingerprint)
+                SELECT titulo, contenido, metadata, embedding, content_hash, fingerprint
+                FROM conocimiento_staging
+                WHERE rowid IN (
+                    SELECT MIN(rowid) FROM conocimiento_staging
+                    GROUP BY COALESCE(fingerprint, fuente_id)
+                )
+                ORDER BY rowid
+            ''')
+            swapped = cursor.rowcount
+            cursor.execute('DELETE FROM conocimiento_staging')
+            cursor.execute('DELETE FROM migracion_checkpoint WHERE fuente = ?', (source,))
+        self.refresh_index()
+        logger.info(f"✅ Staging swapped in: {swapped} documents from {source} "
+                    f"({staged - swapped} exact duplicates dropped)")
+        return swapped
+
+    def store_chunks(self, doc_id: int, contenido: str, cursor: Optional[sqlite3.Cursor] = None) -> int:
+        """
+        Reemplaza los chunks de un documento. Con cursor se ejecuta dentro de la
+        transacción del llamador (p.ej. _seed_knowledge_base); sin cursor abre la suya.
+        """
+        if cursor is None:
+            with self.write_transaction() as own_cursor:
+                return self.store_chunks(doc_id, contenido, cursor=own_cursor)
+        chunks = split_into_chunks(contenido)
+        cursor.execute('DELETE FROM conocimiento_chunks WHERE documento_id = ?', (doc_id,))
+        cursor.executemany('''
+            INSERT INTO conocimiento_chunks (documento_id, numero, texto, texto_busqueda)
+            VALUES (?, ?, ?, ?)
+        ''', [(doc_id, numero, texto, busqueda) for numero, texto, busqueda in chunks])
+        logger.info(f"✅ {len(chunks)} chunks stored for document {doc_id}")
+        return len(chunks)
+
+    def count_chunks(self, doc_id: int) -> int:
+        cursor = self._reader().cursor()
+        cursor.execute('SELECT COUNT(*) FROM conocimiento_chunks WHERE documento_id = ?', (doc_id,))
+        return cursor.fetchone()[0]
+
+    def scored_chunks(self, doc_id: int, query: str) -> List[Tuple[str, float]]:
+        """
+        Todos los chunks del documento en orden con su relevancia para la query
+        (−bm25 con FTS5, palabras en común sin FTS5; 0 si no coincide).
+        """
+        cursor = self._reader().cursor()
+        scores: Dict[int, float] = {}
+        match = self._fts_query(query)
+        if match and self._fts_enabled:
+            cursor.execute('''
+                SELECT c.id, -bm25(conocimiento_chunks_fts)
+                FROM conocimiento_chunks_fts
+                JOIN conocimiento_chunks c ON c.id = conocimiento_chunks_fts.rowid
+                WHERE conocimiento_chunks_fts MATCH ? AND c.documento_id = ?
+            ''', (match, doc_id))
+            scores = dict(cursor.fetchall())
+        elif match:
+            words = set(tokenize(query[:500]))
+            cursor.execute(
+                'SELECT id, texto_busqueda FROM conocimiento_chunks WHERE documento_id = ?', (doc_id,)
+            )
+            scores = {chunk_id: float(sum(1 for w in words if w in busqueda))
+                      for chunk_id, busqueda in cursor.fetchall()}
+        cursor.execute(
+            'SELECT id, texto FROM conocimiento_chunks WHERE documento_id = ? ORDER BY id', (doc_id,)
+        )
+        return [(texto, scores.get(chunk_id, 0.0)) for chunk_id, texto in cursor.fetchall()]
+
     def search(self, query: str, top_k: int = 3) -> List[Dict]:
+        """
+        Top-k por bm25() sobre el índice FTS5 (el título pesa 10x el contenido).
+        Cada resultado trae un extracto ('snippet') en lugar del contenido completo.
+        """
+        if self._index is not None:
+            return self._memory_search(query, top_k)
+        if not self._fts_enabled:
+            return self._scan_search(query, top_k)
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT id, titulo, contenido FROM conocimiento_legal')
-                rows = cursor.fetchall()
+            match = self._fts_query(query)
+            if not match:
+                return []
+            cursor = self._reader().cursor()
+            cursor.execute('''
+                SELECT l.id, l.titulo,
+                       snippet(conocimiento_fts, 1, '', '', ' … ', 64),
+                       bm25(conocimiento_fts, 10.0, 1.0) AS rank
+                FROM conocimiento_fts
+                JOIN conocimiento_legal l ON l.id = conocimiento_fts.rowid
+                WHERE conocimiento_fts MATCH ?
+                ORDER BY rank
+                LIMIT ?
+            ''', (match, top_k))
+            rows = cursor.fetchall()
+
+            # bm25() devuelve valores negativos (menor = mejor) — se invierte el signo
+            top_results = [{
+                'id': doc_id,
+                'titulo': titulo,
+                'snippet': snippet,
+                'score': -rank
+            } for doc_id, titulo, snippet, rank in rows]
+            logger.info(f"Search '{query}' → {len(top_results)} docs")
+            return top_results
+
+        except Exception as e:
+            logger.error(f"Error searching: {str(e)}")
+            return []
+
+    def refresh_index(self) -> None:
+        """
+        (Re)construye el índice BM25 en memoria desde SQLite. Se llama al iniciar
+        y tras escrituras que no pasan por add_document (p.ej. _seed_knowledge_base).
+        """
+        if self.search_backend != "memory":
+            return
+        try:
+            cursor = self._reader().cursor()
+            cursor.execute('SELECT id, titulo, contenido FROM conocimiento_legal')
+            index = BM25Index()
+            index.add_many((doc_id, f"{titulo} {contenido}") for doc_id, titulo, contenido in cursor)
+            # Swap atómico: las búsquedas en curso terminan sobre el índice anterior
+            self._index = index
+            logger.info(f"✅ BM25 index built ({len(index)} docs)")
+        except Exception as e:
+            logger.error(f"Error building BM25 index: {str(e)}")
+            raise
+
+    def reindex_documents(self, doc_ids: Iterable[int]) -> None:
+        """
+        Actualización incremental del índice en memoria: reindexa los documentos
+        indicados y quita los que ya no existen (p.ej. tras _seed_knowledge_base).
+        """
+        if self._index is None:
+            return
+        doc_ids = list(doc_ids)
+        if not doc_ids:
+            return
+        placeholders = ",".join("?" * len(doc_ids))
+        cursor = self._reader().cursor()
+        cursor.execute(
+            f'SELECT id, titulo, contenido FROM conocimiento_legal WHERE id IN ({placeholders})', doc_ids
+        )
+        rows = cursor.fetchall()
+        self._index.add_many((doc_id, f"{titulo} {contenido}") for doc_id, titulo, contenido in rows)
+        for doc_id in set(doc_ids) - {row[0] for row in rows}:
+            self._index.remove(doc_id)
+
+    def _memory_search(self, query: str, top_k: int) -> List[Dict]:
+        """Top-k con el índice invertido: solo puntúa documentos que comparten términos."""
+        try:
+            hits = self._index.search(query, top_k)
+            if not hits:
+                return []
+            placeholders = ",".join("?" * len(hits))
+            cursor = self._reader().cursor()
+            cursor.execute(
+                f'SELECT id, titulo, contenido FROM conocimiento_legal WHERE id IN ({placeholders})',
+                [doc_id for doc_id, _ in hits]
+            )
+            rows = {doc_id: (titulo, contenido) for doc_id, titulo, contenido in cursor.fetchall()}
+
+            terms = tokenize(query[:500])
+            top_results = []
+            for doc_id, score in hits:
+                if doc_id not in rows:
+                    continue
+                titulo, contenido = rows[doc_id]
+                top_results.append({
+                    'id': doc_id,
+                    'titulo': titulo,
+                    'snippet': self._excerpt(contenido, terms),
+                    'score': score
+                })
+            logger.info(f"Search '{query}' → {len(top_results)} docs (memory)")
+            return top_results
+
+        except Exception as e:
+            logger.error(f"Error searching: {str(e)}")
+            return []
+
+    @staticmethod
+    def _excerpt(contenido: str, terms: List[str], width: int = 400) -> str:
+        """Extracto de ~width caracteres alrededor del primer término encontrado."""
+        # fold_accents conserva la longitud para las tildes del español (á → a, ñ → n)
+        lowered = fold_accents(contenido)
+        positions = [p for p in (lowered.find(t) for t in terms) if p >= 0]
+        start = max(min(positions) - width // 4, 0) if positions else 0
+        excerpt = contenido[start:start + width]
+        return ("… " if start else "") + excerpt + (" …" if start + width < len(contenido) else "")
+
+    def _scan_search(self, query: str, top_k: int) -> List[Dict]:
+        """Fallback sin FTS5: lee todas las filas y puntúa con _keyword_score."""
+        try:
+            cursor = self._reader().cursor()
+            cursor.execute('SELECT id, titulo, contenido FROM conocimiento_legal')
+            rows = cursor.fetchall()
 
             if not rows:
                 logger.warning("No documents in knowledge base")
                 return []
 
+            # La consulta se normaliza una sola vez para todas las filas
+            matcher = KeywordMatcher.from_query(query)
             results = []
             for doc_id, titulo, contenido in rows:
-                score = self._keyword_score(query, titulo, contenido)
+                score = self._keyword_score(matcher, titulo, contenido)
                 results.append({
                     'id': doc_id,
                     'titulo': titulo,
-                    'contenido': contenido,
+                    'snippet': contenido[:400],
                     'score': score
                 })
 
             results.sort(key=lambda x: x['score'], reverse=True)
             top_results = results[:top_k]
-            logger.info(f"Search '{query}' → {len(top_results)} docs")
+            logger.info(f"Search '{query}' → {len(top_results)} docs (scan)")
             return top_results
 
         except Exception as e:
             logger.error(f"Error searching: {str(e)}")
             return []
 
+    # ──────────────────────────────────────────────
+    # Embeddings / búsqueda semántica
+    # ──────────────────────────────────────────────
+    def set_embeddings(self, items: Iterable[Tuple[int, Sequence[float]]], dtype: Optional[str] = None) -> int:
+        """
+        Guarda embeddings [(doc_id, vector)] como BLOB en una sola transacción.
+        dtype: "float32" o "int8" (default KB_EMBEDDING_DTYPE).
+        """
+        if EmbeddingMatrix is None:
+            raise RuntimeError("numpy is required to store embeddings")
+        dtype = (dtype or EMBEDDING_DTYPE).lower()
+        if dtype not in EMBEDDING_DTYPES:
+            raise ValueError(f"Unknown embedding dtype: {dtype}")
+        rows = [(pack_embedding(vector, dtype), doc_id) for doc_id, vector in items]
+        with self.write_transaction() as cursor:
+            cursor.executemany('UPDATE conocimiento_legal SET embedding = ? WHERE id = ?', rows)
+        logger.info(f"✅ {len(rows)} embeddings stored ({dtype})")
+        return len(rows)
+
+    def _meta_value(self, clave: str, cursor: Optional[sqlite3.Cursor] = None) -> int:
+        cursor = cursor or self._reader().cursor()
+        cursor.execute("SELECT valor FROM kb_meta WHERE clave = ?", (clave,))
+        row = cursor.fetchone()
+        return row[0] if row else 0
+
+    def embeddings_version(self) -> int:
+        return self._meta_value('embeddings_version')
+
+    def load_embedding_matrix(self) -> Optional["EmbeddingMatrix"]:
+        """
+        Matriz de embeddings al día con la base. Orden de preferencia: la ya cargada,
+        el sidecar mapeado con mmap, o reconstruirla desde los BLOBs (y reescribir el sidecar).
+        """
+        if EmbeddingMatrix is None:
+            return None
+        version = self.embeddings_version()
+        current = self._embeddings
+        if current is not None and current.version == version:
+            return current
+        with self._embeddings_lock:
+            current = self._embeddings
+            if current is not None and current.version == version:
+                return current
+            try:
+                matrix = EmbeddingMatrix.load(self.embeddings_path, version)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not map embedding sidecar: {e}")
+                matrix = None
+            if matrix is None:
+                cursor = self._reader().cursor()
+                cursor.execute('''
+                    SELECT id, embedding FROM conocimiento_legal
+                    WHERE typeof(embedding) = 'blob'
+                    ORDER BY id
+                ''')
+                matrix = EmbeddingMatrix.from_blobs(cursor, version=version)
+                logger.info(f"✅ Embedding matrix built: {len(matrix)} docs, {matrix.nbytes // 1024} KiB")
+                if len(matrix):
+                    try:
+                        matrix.save(self.embeddings_path)
+                    except OSError as e:
+                        logger.warning(f"⚠️ Could not write embedding sidecar: {e}")
+            # Swap atómico: las búsquedas en curso terminan sobre la matriz anterior
+            self._embeddings = matrix
+            return matrix
+
+    def semantic_search(self, query_vector: Sequence[float], top_k: int = 3) -> List[Dict]:
+        """
+        Top-k por similitud coseno contra los embeddings guardados. El embedding de
+        la consulta lo calcula el llamador (este módulo no carga modelos).
+        """
+        try:
+            matrix = self.load_embedding_matrix()
+            if matrix is None or len(matrix) == 0:
+                return []
+            hits = matrix.search(query_vector, top_k)
+            if not hits:
+                return []
+            placeholders = ",".join("?" * len(hits))
+            cursor = self._reader().cursor()
+            cursor.execute(
+                f'SELECT id, titulo, contenido FROM conocimiento_legal WHERE id IN ({placeholders})',
+                [doc_id for doc_id, _ in hits]
+            )
+            rows = {doc_id: (titulo, contenido) for doc_id, titulo, contenido in cursor.fetchall()}
+            top_results = [{
+                'id': doc_id,
+                'titulo': rows[doc_id][0],
+                'snippet': self._excerpt(rows[doc_id][1], []),
+                'score': score
+            } for doc_id, score in hits if doc_id in rows]
+            logger.info(f"Semantic search → {len(top_results)} docs")
+            return top_results
+
+        except Exception as e:
+            logger.error(f"Error in semantic search: {str(e)}")
+            return []
+
+    # ──────────────────────────────────────────────
+    # Versión / snapshot
+    # ──────────────────────────────────────────────
+    def kb_version(self) -> int:
+        """Contador de cambios de documentos y chunks (compartido entre procesos)."""
+        return self._meta_value('kb_version')
+
+    def export_state(self) -> Tuple[int, List[Tuple], List[Tuple]]:
+        """
+        Lee versión, documentos (id, titulo, contenido) y chunks
+        (id, documento_id, numero, texto, texto_busqueda) dentro de una misma
+        transacción de lectura: en WAL las tres lecturas ven el mismo estado.
+        """
+        conn = self._reader()
+        conn.execute("BEGIN")
+        try:
+            row = conn.execute("SELECT valor FROM kb_meta WHERE clave = 'kb_version'").fetchone()
+            docs = conn.execute('SELECT id, titulo, contenido FROM conocimiento_legal ORDER BY id').fetchall()
+            chunks = conn.execute(
+                'SELECT id, documento_id, numero, texto, texto_busqueda FROM conocimiento_chunks ORDER BY id'
+            ).fetchall()
+        finally:
+            conn.execute("COMMIT")
+        return (row[0] if row else 0), docs, chunks
+
+    # ──────────────────────────────────────────────
+    # Listado paginado (keyset)
+    # ──────────────────────────────────────────────
+    def list_documents(self, after_id: int = 0, limit: int = 50,
+                       preview_chars: Optional[int] = 200) -> Tuple[List[Dict], Optional[int]]:
+        """
+        Una página por clave: documentos con id > after_id, en orden de id. El
+        contenido se recorta en SQL a preview_chars (None = completo). Devuelve
+        (documentos, cursor de la página siguiente o None si no hay más).
+        """
+        if preview_chars is None:
+            contenido_sql = 'contenido'
+            params: Tuple = (after_id, limit + 1)
+        else:
+            contenido_sql = "CASE WHEN length(contenido) > ? THEN substr(contenido, 1, ?) || '...' ELSE contenido END"
+            params = (preview_chars, preview_chars, after_id, limit + 1)
+        cursor = self._reader().cursor()
+        cursor.execute(f'''
+            SELECT id, titulo, {contenido_sql}, metadata
+            FROM conocimiento_legal
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+        ''', params)
+        rows = cursor.fetchall()
+        documents = [{
+            'id': doc_id,
+            'titulo': titulo,
+            'contenido': contenido,
+            'metadata': json.loads(metadata_json) if metadata_json else {},
+        } for doc_id, titulo, contenido, metadata_json in rows[:limit]]
+        next_after_id = documents[-1]['id'] if len(rows) > limit else None
+        return documents, next_after_id
+
+    def iter_documents(self, after_id: int = 0, preview_chars: Optional[int] = 200,
+                       page_size: int = 500) -> Iterator[Dict]:
+        """Recorre la base de a page_size filas sin cargarla entera en memoria."""
+        while True:
+            documents, next_after_id = self.list_documents(after_id, page_size, preview_chars)
+            yield from documents
+            if next_after_id is None:
+                return
+            after_id = next_after_id
+
+    def get_document(self, doc_id: int) -> Optional[Dict]:
+        documents, _ = self.list_documents(after_id=doc_id - 1, limit=1, preview_chars=None)
+        return documents[0] if documents and documents[0]['id'] == doc_id else None
+
     def get_all_documents_full(self) -> List[Dict]:
         """Devuelve todos los documentos con contenido completo (sin truncar)."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT id, titulo, contenido FROM conocimiento_legal')
-                rows = cursor.fetchall()
-            return [{'id': doc_id, 'titulo': titulo, 'contenido': contenido}
-                    for doc_id, titulo, contenido in rows]
+            return [{'id': doc['id'], 'titulo': doc['titulo'], 'contenido': doc['contenido']}
+                    for doc in self.iter_documents(preview_chars=None)]
         except Exception as e:
             logger.error(f"Error getting all documents: {str(e)}")
             return []
 
     def get_all_documents(self) -> List[Dict]:
+        """Todos los documentos con el contenido recortado a 200 caracteres (en SQL)."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT id, titulo, contenido, metadata FROM conocimiento_legal')
-                rows = cursor.fetchall()
-            documents = []
-            for doc_id, titulo, contenido, metadata_json in rows:
-                metadata = json.loads(metadata_json) if metadata_json else {}
-                documents.append({
-                    'id': doc_id,
-                    'titulo': titulo,
-                    'contenido': contenido[:200] + '...',
-                    'metadata': metadata
-                })
-            return documents
+            return list(self.iter_documents(preview_chars=200))
         except Exception as e:
             logger.error(f"Error getting documents: {str(e)}")
             return []
 
     def count_documents(self) -> int:
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT COUNT(*) FROM conocimiento_legal')
-                count = cursor.fetchone()[0]
+            cursor = self._reader().cursor()
+            cursor.execute('SELECT COUNT(*) FROM conocimiento_legal')
+            count = cursor.fetchone()[0]
             return count
         except Exception as e:
             logger.error(f"Error counting documents: {str(e)}")
@@ -145,10 +1199,10 @@ class SQLiteKnowledgeBase:
 
     def clear_database(self):
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            with self.write_transaction() as cursor:
                 cursor.execute('DELETE FROM conocimiento_legal')
-                conn.commit()
+            if self._index is not None:
+                self._index.clear()
             logger.info("✅ Database cleared")
         except Exception as e:
             logger.error(f"Error clearing database: {str(e)}")
@@ -0,0 +1,242 @@
+"""
+Token Budget
+Contexto del prompt armado por presupuesto de tokens en lugar de caracteres: el
+presupuesto de entrada se reparte entre el system prompt (fijo), los chunks de los
+documentos oficiales y los extractos adicionales, y cada sección se llena de forma
+greedy por relevancia por token. Los conteos se hacen con tiktoken y se cachean por
+texto, así cada chunk de la KB se tokeniza una sola vez.
+
+tiktoken es opcional: sin el paquete (o sin poder cargar su encoding) se estima con
+~4 caracteres por token.
+"""
+import logging
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Hashable, List, Sequence, Tuple
+
+try:
+    import tiktoken
+except ImportError:   # sin tiktoken se usa la estimación por caracteres
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4          # estimación sin tiktoken
+SEPARATOR_TOKENS = 1         # "\n\n" entre bloques
+
+
+class TokenCounter:
+    """
+    - model:     modelo del LLM (elige el encoding; o200k_base si tiktoken no lo conoce)
+    - max_items: conteos cacheados (LRU por contenido)
+    """
+
+    def __init__(self, model: str, max_items: int = 50_000):
+        self.model = model
+        self.max_items = max_items
+        self._encoding = self._load_encoding(model)
+        self._counts: "OrderedDict[Tuple[int, int], int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def _load_encoding(model: str):
+        if tiktoken is None:
+            logger.warning("⚠️ tiktoken not installed — estimating tokens from characters")
+            return None
+        name = model.split("/")[-1]
+        try:
+            return tiktoken.encoding_for_model(name)
+        except KeyError:
+            pass
+        except Exception as e:
+            logger.warning(f"⚠️ tiktoken encoding unavailable ({type(e).__name__}) — estimating tokens from characters")
+            return None
+        try:
+            return tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.warning(f"⚠️ tiktoken encoding unavailable ({type(e).__name__}) — estimating tokens from characters")
+            return None
+
+    @property
+    def exact(self) -> bool:
+        return self._encoding is not None
+
+    def count(self, text: str, cache: bool = True) -> int:
+        """cache=False para textos que no se repiten (respuestas del LLM): no desplazan a los chunks."""
+        if not text:
+            return 0
+        if not cache:
+            return self._encode_len(text)
+        # hash(str) queda cacheado en el objeto: los chunks de la foto se hashean una vez
+        key = (hash(text), len(text))
+        with self._lock:
+            cached = self._counts.get(key)
+            if cached is not None:
+                self._counts.move_to_end(key)
+                self._hits += 1
+                return cached
+            self._misses += 1
+        tokens = self._encode_len(text)
+        with self._lock:
+            self._counts[key] = tokens
+            while len(self._counts) > self.max_items:
+                self._counts.popitem(last=False)
+        return tokens
+
+    def _encode_len(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return -(-len(text) // CHARS_PER_TOKEN)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "encoding": self._encoding.name if self._encoding is not None else f"~{CHARS_PER_TOKEN} chars/token",
+                "cached": len(self._counts),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+@dataclass(frozen=True)
+class ContextPiece:
+    """
+    Un bloque candidato del contexto.
+    - doc:      documento al que pertenece (los bloques de un documento van bajo un solo encabezado)
+    - header:   encabezado del documento ("BASE DE CONOCIMIENTOS OFICIAL (...)")
+    - score:    relevancia para la pregunta (comparable solo dentro de la misma sección)
+    - position: orden dentro del documento (el contexto se arma en ese orden)
+    """
+    doc: Hashable
+    header: str
+    text: str
+    score: float
+    position: int = 0
+
+
+class ContextBudget:
+    """
+    - counter:        TokenCounter compartido
+    - prompt_tokens:  presupuesto de entrada total (system + contexto + pregunta)
+    - official_share: fracción del espacio de contexto reservada a los documentos oficiales;
+                      lo que una sección no usa lo aprovecha la otra
+    """
+
+    def __init__(self, counter: TokenCounter, prompt_tokens: int = 2500, official_share: float = 0.7,
+                 recent: int = 50):
+        self.counter = counter
+        self.prompt_tokens = prompt_tokens
+        self.official_share = official_share
+        self._lock = threading.Lock()
+        self._recent: Deque[Dict] = deque(maxlen=recent)
+        self._builds = 0
+        self._dropped = 0
+        self._requests = 0
+        self._prompt_total = 0
+        self._prompt_max = 0
+        self._over_budget = 0
+
+    # ──────────────────────────────────────────────
+    # Armado
+    # ──────────────────────────────────────────────
+    def build(self, fixed_prompt: str, user_text: str, official: Sequence[ContextPiece],
+              extra: Sequence[ContextPiece]) -> str:
+        """
+        Contexto que entra en el presupuesto después del prompt fijo y la pregunta.
+        Primero los oficiales con su parte, luego los adicionales con el resto y, si
+        sobra, más oficiales. Devuelve "" si no entra nada.
+        """
+        available = self.prompt_tokens - self.counter.count(fixed_prompt) - self.counter.count(user_text)
+        chosen: List[ContextPiece] = []
+        headed: set = set()
+        official_left = [p for p in official if p.text]
+        extra_left = [p for p in extra if p.text]
+
+        used = self._fill(official_left, int(max(available, 0) * self.official_share), chosen, headed)
+        used += self._fill(extra_left, available - used, chosen, headed)
+        used += self._fill(official_left, available - used, chosen, headed)
+
+        with self._lock:
+            self._builds += 1
+            self._dropped += len(official_left) + len(extra_left)
+        return self._render(chosen)
+
+    def _fill(self, pieces: List[ContextPiece], budget: int, chosen: List[ContextPiece], headed: set) -> int:
+        """Greedy por score/token; quita de `pieces` los elegidos y devuelve los tokens usados."""
+        if budget <= 0 or not pieces:
+            return 0
+        ranked = sorted(
+            pieces,
+            key=lambda p: (p.score / max(self.counter.count(p.text), 1), -p.position),
+            reverse=True,
+        )
+        used = 0
+        taken = set()
+        for piece in ranked:
+            cost = self.counter.count(piece.text) + SEPARATOR_TOKENS
+            if piece.doc not in headed:
+                cost += self.counter.count(piece.header) + SEPARATOR_TOKENS
+            if used + cost > budget:
+                continue   # puede entrar uno más chico
+            used += cost
+            headed.add(piece.doc)
+            chosen.append(piece)
+            taken.add(id(piece))
+        pieces[:] = [p for p in pieces if id(p) not in taken]
+        return used
+
+    @staticmethod
+    def _render(chosen: List[ContextPiece]) -> str:
+        # Documentos en el orden en que entró su primer bloque (oficiales primero), bloques en orden del documento
+        grouped: Dict[Hashable, List[ContextPiece]] = {}
+        for piece in chosen:
+            grouped.setdefault(piece.doc, []).append(piece)
+        parts = []
+        for pieces in grouped.values():
+            body = "\n\n".join(p.text for p in sorted(pieces, key=lambda p: p.position))
+            parts.append(f"{pieces[0].header}\n{body}")
+        return "\n\n".join(parts)
+
+    # ──────────────────────────────────────────────
+    # Métricas
+    # ──────────────────────────────────────────────
+    def record(self, request_id: str, system_prompt: str, user_text: str, cached_context: bool) -> Dict:
+        """Tokens de entrada efectivos de una request (con contexto nuevo o cacheado)."""
+        # Textos únicos por request: sin cachear, así no desplazan los conteos de chunks que usa build()
+        system_tokens = self.counter.count(system_prompt, cache=False)
+        user_tokens = self.counter.count(user_text, cache=False)
+        total = system_tokens + user_tokens
+        entry = {
+            "request": request_id,
+            "prompt_tokens": total,
+            "system_tokens": system_tokens,
+            "user_tokens": user_tokens,
+            "cached_context": cached_context,
+        }
+        with self._lock:
+            self._requests += 1
+            self._prompt_total += total
+            self._prompt_max = max(self._prompt_max, total)
+            self._over_budget += total > self.prompt_tokens
+            self._recent.append(entry)
+        return entry
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "prompt_budget": self.prompt_tokens,
+                "official_share": self.official_share,
+                "builds": self._builds,
+                "dropped_pieces": self._dropped,
+                "requests": self._requests,
+                "avg_prompt_tokens": round(self._prompt_total / self._requests, 1) if self._requests else 0.0,
+                "max_prompt_tokens": self._prompt_max,
+                "over_budget": self._over_budget,
+                "counter": self.counter.stats(),
+                "recent": list(self._recent),
+            }
@@ -0,0 +1,61 @@
+import numpy as np
+
+from services.ann_index import IVFIndex, ids_fingerprint
+
+
+def _vectors(n, dim=16, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_fingerprint_depends_on_ids_and_order():
+    assert ids_fingerprint(["a", "b"]) == ids_fingerprint(["a", "b"])
+    assert ids_fingerprint(["a", "b"]) != ids_fingerprint(["b", "a"])
+    assert ids_fingerprint(["a", "b"]) != ids_fingerprint(["a", "c"])
+    assert ids_fingerprint(["ab"]) != ids_fingerprint(["a", "b"])
+
+
+def test_fingerprint_round_trips(tmp_path):
+    path = str(tmp_path / "ann.npz")
+    index = IVFIndex.load_or_build(path, _vectors(200), ids_fingerprint(map(str, range(200))))
+    loaded = IVFIndex.load(path)
+    assert loaded.fingerprint == index.fingerprint
+    assert loaded.ntotal == 200
+
+
+def test_reuses_index_when_ids_match(tmp_path):
+    path = str(tmp_path / "ann.npz")
+    vectors = _vectors(200)
+    fingerprint = ids_fingerprint(map(str, range(200)))
+    IVFIndex.load_or_build(path, vectors, fingerprint)
+    mtime = (tmp_path / "ann.npz").stat().st_mtime_ns
+    IVFIndex.load_or_build(path, vectors, fingerprint)
+    assert (tmp_path / "ann.npz").stat().st_mtime_ns == mtime
+
+
+def test_rebuilds_when_same_count_but_different_ids(tmp_path):
+    # Un documento borrado y otro agregado: misma cantidad, filas distintas
+    path = str(tmp_path / "ann.npz")
+    old_ids = [str(i) for i in range(200)]
+    IVFIndex.load_or_build(path, _vectors(200, seed=0), ids_fingerprint(old_ids))
+
+    new_ids = old_ids[1:] + ["200"]
+    vectors = _vectors(200, seed=1)
+    index = IVFIndex.load_or_build(path, vectors, ids_fingerprint(new_ids))
+    assert index.fingerprint == ids_fingerprint(new_ids)
+    assert IVFIndex.load(path).fingerprint == ids_fingerprint(new_ids)
+    ids, scores = index.search(vectors[7], 1, nprobe=index.nlist)
+    assert ids[0] == 7
+    assert scores[0] > 0.99
+
+
+def test_index_without_fingerprint_is_stale(tmp_path):
+    path = str(tmp_path / "ann.npz")
+    vectors = _vectors(100)
+    legacy = IVFIndex(16, nlist=8)
+    legacy.train(vectors)
+    legacy.add(vectors, np.arange(100))
+    legacy.save(path)
+    assert IVFIndex.load(path).fingerprint == ""
+    index = IVFIndex.load_or_build(path, vectors, ids_fingerprint(map(str, range(100))))
+    assert index.fingerprint != ""
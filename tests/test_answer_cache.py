@@ -0,0 +1,61 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from services.answer_cache import AnswerCache
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "answers.db")
+
+
+def test_normalized_hit_and_persistence(db_path):
+    cache = AnswerCache(db_path)
+    cache.put("¡Hola Valeria! ¿Qué es la posesión?", 3, "gpt", "La posesión es ...")
+    assert cache.get("que es la POSESION", 3, "gpt") == "La posesión es ..."
+    assert cache.get("que es la posesion", 4, "gpt") is None
+    cache.close()
+
+    reopened = AnswerCache(db_path)
+    assert reopened.warm() == 1
+    assert reopened.get("qué es la posesión", 3, "gpt") == "La posesión es ..."
+    reopened.close()
+
+
+def test_reads_are_not_blocked_by_disk_writes(db_path):
+    cache = AnswerCache(db_path)
+    cache.put("que es la posesion", 1, "gpt", "respuesta")
+    writer = threading.Thread(target=cache.put, args=("cuanto cuesta el lote", 1, "gpt", "otra"))
+    with cache._db_lock:   # SQLite ocupado (escritura lenta en curso)
+        writer.start()
+        started = time.perf_counter()
+        assert cache.get("que es la posesion", 1, "gpt") == "respuesta"
+        # La entrada nueva ya está en memoria aunque todavía no llegó a disco
+        assert cache.get("cuanto cuesta el lote", 1, "gpt") == "otra"
+        assert time.perf_counter() - started < 0.5
+    writer.join(timeout=5)
+    assert cache._conn.execute("SELECT COUNT(*) FROM respuestas").fetchone()[0] == 2
+    cache.close()
+
+
+def test_failed_write_rolls_back_and_keeps_pending_hits(db_path, monkeypatch):
+    cache = AnswerCache(db_path)
+    cache.put("que es la posesion", 1, "gpt", "respuesta")
+    cache.get("que es la posesion", 1, "gpt")
+
+    def broken():
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(cache, "_evict_disk", broken)
+    with pytest.raises(RuntimeError):
+        cache.put("cuanto cuesta el lote", 1, "gpt", "otra")
+    assert not cache._conn.in_transaction
+    assert cache._touched[AnswerCache.key("que es la posesion", 1, "gpt")][1] == 1
+
+    monkeypatch.undo()
+    cache.close()
+    with sqlite3.connect(db_path) as conn:
+        assert dict(conn.execute("SELECT pregunta, hits FROM respuestas")) == {"que es la posesion": 1}
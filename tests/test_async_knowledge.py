@@ -0,0 +1,75 @@
+import asyncio
+import threading
+
+import pytest
+
+from services.async_knowledge import AsyncKnowledgeBase, KnowledgeBaseBusyError
+
+
+@pytest.fixture
+def akb():
+    akb = AsyncKnowledgeBase(kb=None, max_workers=1, max_queue=3, timeout=0.05)
+    yield akb
+    akb.shutdown()
+
+
+def test_timeout_releases_queue_slots(akb):
+    gate = threading.Event()
+
+    async def scenario():
+        # El primero ocupa el único worker; los demás esperan en la cola y vencen ahí
+        results = await asyncio.gather(*(akb.arun(gate.wait, 1.0) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, asyncio.TimeoutError) for r in results)
+        gate.set()
+        assert await akb.arun(lambda: "ok") == "ok"
+
+    asyncio.run(scenario())
+    metrics = akb.metrics()
+    assert metrics["queued"] == 0
+    assert metrics["running"] == 0
+    assert metrics["timeouts"] == 3
+
+
+def test_cancel_releases_queue_slots(akb):
+    gate = threading.Event()
+
+    async def scenario():
+        tasks = [asyncio.ensure_future(akb.arun(gate.wait, 1.0, timeout=10)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        gate.set()
+        # Sin la liberación los lugares cancelados quedaban ocupados y esto daba KnowledgeBaseBusyError
+        return await asyncio.gather(*(akb.arun(lambda: 1) for _ in range(3)))
+
+    assert asyncio.run(scenario()) == [1, 1, 1]
+    assert akb.metrics()["queued"] == 0
+
+
+def test_full_queue_is_rejected(akb):
+    gate = threading.Event()
+
+    async def scenario():
+        # Uno corriendo + tres en cola
+        tasks = [asyncio.ensure_future(akb.arun(gate.wait, 1.0, timeout=10)) for _ in range(4)]
+        await asyncio.sleep(0.01)
+        with pytest.raises(KnowledgeBaseBusyError):
+            await akb.arun(lambda: None)
+        gate.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert akb.metrics()["rejected"] == 1
+
+
+def test_explicit_zero_timeout_is_not_the_default(akb):
+    gate = threading.Event()
+    akb.timeout = 10
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await akb.arun(gate.wait, 1.0, timeout=0)
+
+    asyncio.run(scenario())
+    gate.set()
@@ -0,0 +1,53 @@
+import math
+
+import pytest
+
+from services.bm25_index import BM25Index, tokenize
+from services.sqlite_knowledge import SQLiteKnowledgeBase
+
+
+def test_tokenize_folds_accents_and_drops_single_letters():
+    assert tokenize("¿Qué es la POSESIÓN y el año?") == ["que", "es", "la", "posesion", "el", "ano"]
+
+
+def test_score_matches_bm25_formula():
+    index = BM25Index(k1=1.2, b=0.75)
+    index.add_many([(1, "lote lote playa"), (2, "playa"), (3, "contrato")])
+    (doc_id, score), *_ = index.search("lote")
+    avg_len = 5 / 3
+    idf = math.log(1 + (3 - 1 + 0.5) / (1 + 0.5))
+    expected = idf * 2 * 2.2 / (2 + 1.2 * (1 - 0.75 + 0.75 * 3 / avg_len))
+    assert doc_id == 1
+    assert score == pytest.approx(expected)
+
+
+def test_reindex_and_remove():
+    index = BM25Index()
+    index.add(1, "cuotas mensuales")
+    index.add(2, "pago al contado")
+    index.add(1, "descuento por pronto pago")
+    assert len(index) == 2
+    assert index.search("cuotas") == []
+    assert {doc_id for doc_id, _ in index.search("pago")} == {1, 2}
+    index.remove(2)
+    index.remove(99)
+    assert [doc_id for doc_id, _ in index.search("pago")] == [1]
+    assert index.search("") == []
+
+
+def test_memory_backend_reindexes_incrementally(tmp_path):
+    kb = SQLiteKnowledgeBase(db_path=str(tmp_path / "kb.db"), search_backend="memory")
+    try:
+        doc_id = kb.add_document("Pagos", "Cuotas mensuales del lote.")
+        assert [r["id"] for r in kb.search("cuotas")] == [doc_id]
+        with kb.write_transaction() as cursor:
+            cursor.execute("DELETE FROM conocimiento_legal WHERE id = ?", (doc_id,))
+        kb.reindex_documents([doc_id])
+        assert kb.search("cuotas") == []
+    finally:
+        kb.close()
+
+
+def test_unknown_backend_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        SQLiteKnowledgeBase(db_path=str(tmp_path / "kb.db"), search_backend="elastic")
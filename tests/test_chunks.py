@@ -0,0 +1,54 @@
+import pytest
+
+from services.sqlite_knowledge import SQLiteKnowledgeBase, split_into_chunks
+
+FAQ = ("**Preguntas frecuentes**\n"
+       "1. ¿Cómo se paga el lote? En **cuotas** mensuales.\n"
+       "2) ¿Hay descuento? Sí, por pago al contado.\n\n"
+       "Nota final sobre la posesión.")
+
+
+@pytest.fixture
+def kb(tmp_path):
+    kb = SQLiteKnowledgeBase(db_path=str(tmp_path / "kb.db"))
+    yield kb
+    kb.close()
+
+
+def test_split_numbers_questions_and_strips_markdown():
+    chunks = split_into_chunks(FAQ)
+    assert [numero for numero, _, _ in chunks] == [0, 1, 2, 0]
+    assert chunks[1][1] == "1. ¿Cómo se paga el lote? En cuotas mensuales."
+    assert chunks[1][2] == "1. ¿como se paga el lote? en cuotas mensuales."
+    assert split_into_chunks("\n\n  \n") == []
+
+
+def test_store_chunks_replaces_previous_ones(kb):
+    doc_id = kb.add_document("FAQ", FAQ)
+    assert kb.store_chunks(doc_id, FAQ) == 4
+    assert kb.store_chunks(doc_id, "1. Única pregunta.") == 1
+    assert kb.count_chunks(doc_id) == 1
+
+
+def test_chunks_follow_their_document(kb):
+    doc_id = kb.add_document("FAQ", FAQ)
+    kb.store_chunks(doc_id, FAQ)
+    with kb.write_transaction() as cursor:
+        cursor.execute("DELETE FROM conocimiento_legal WHERE id = ?", (doc_id,))
+    assert kb.count_chunks(doc_id) == 0
+
+
+def test_add_documents_can_chunk_on_insert(kb):
+    (doc_id,) = kb.add_documents([{"titulo": "FAQ", "contenido": FAQ, "chunked": True}])
+    assert kb.count_chunks(doc_id) == 4
+
+
+@pytest.mark.parametrize("fts", [True, False])
+def test_scored_chunks_keep_order_and_score_matches(kb, fts):
+    doc_id = kb.add_document("FAQ", FAQ)
+    kb.store_chunks(doc_id, FAQ)
+    kb._fts_enabled = fts
+    scored = kb.scored_chunks(doc_id, "descuento contado")
+    assert [texto for texto, _ in scored] == [texto for _, texto, _ in split_into_chunks(FAQ)]
+    assert [score > 0 for _, score in scored] == [False, False, True, False]
+    assert kb.scored_chunks(doc_id + 1, "descuento") == []
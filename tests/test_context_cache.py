@@ -0,0 +1,42 @@
+import time
+
+from services.context_cache import ContextCache, normalize_query
+
+
+def test_normalize_drops_stopwords_accents_and_case():
+    assert normalize_query("¿Qué es la Posesión legítima?") == "posesion legitima"
+    assert normalize_query("Hola, buenas tardes") == ""
+
+
+def test_query_variants_share_an_entry():
+    cache = ContextCache()
+    cache.put("¿Qué es la posesión legítima?", 1, "contexto")
+    assert cache.get("que es la POSESION legitima", 1) == "contexto"
+    assert cache.get("posesión legítima", 2) is None
+    assert cache.get("posesión legítima", 1, scope="shard-a") is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_queries_without_terms_are_not_cached():
+    cache = ContextCache()
+    cache.put("hola", 1, "contexto")
+    assert cache.stats()["items"] == 0
+
+
+def test_lru_eviction():
+    cache = ContextCache(max_items=2)
+    cache.put("pago", 1, "a")
+    cache.put("lote", 1, "b")
+    cache.get("pago", 1)
+    cache.put("playa", 1, "c")
+    assert cache.get("lote", 1) is None
+    assert cache.get("pago", 1) == "a"
+    assert cache.stats()["evicted"] == 1
+
+
+def test_entries_expire():
+    cache = ContextCache(ttl_seconds=0.01)
+    cache.put("pago", 1, "a")
+    time.sleep(0.02)
+    assert cache.get("pago", 1) is None
+    assert cache.stats()["expired"] == 1
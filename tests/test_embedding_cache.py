@@ -0,0 +1,58 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+from services.embedding_cache import EmbeddingCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EmbeddingCache("test-model", db_path=str(tmp_path / "emb.db"), max_memory_items=2)
+    yield cache
+    cache.close()
+
+
+def _disk_keys(cache):
+    return {k for (k,) in cache._conn.execute("SELECT clave FROM embedding_cache")}
+
+
+def test_round_trip_through_disk(cache):
+    texts = ["uno", "dos", "tres"]
+    cache.put_many(texts, np.eye(3, dtype=np.float32))
+    # "uno" ya salió del LRU en memoria: se lee de SQLite
+    found = cache.get_many(texts + ["cuatro"])
+    assert [v is None for v in found] == [False, False, False, True]
+    np.testing.assert_array_equal(found[0], [1, 0, 0])
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_failed_put_rolls_back_and_cache_stays_usable(cache, monkeypatch):
+    cache.put_many(["uno"], [np.ones(3)])
+
+    def broken_evict():
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(cache, "_evict_disk", broken_evict)
+    with pytest.raises(sqlite3.OperationalError):
+        cache.put_many(["dos"], [np.ones(3)])
+    assert not cache._conn.in_transaction
+    assert _disk_keys(cache) == {cache.key("uno")}
+
+    monkeypatch.undo()
+    cache.put_many(["tres"], [np.ones(3)])
+    assert _disk_keys(cache) == {cache.key("uno"), cache.key("tres")}
+
+
+def test_disk_hits_do_not_write_until_next_put(cache):
+    cache.put_many(["a", "b", "c"], np.eye(3, dtype=np.float32))
+    cache._conn.execute("UPDATE embedding_cache SET last_used = 0")
+    cache.get_many(["a"])   # fuera de memoria → acierto en disco
+
+    used = dict(cache._conn.execute("SELECT clave, last_used FROM embedding_cache"))
+    assert used[cache.key("a")] == 0
+
+    cache.put_many(["d"], [np.ones(3)])
+    used = dict(cache._conn.execute("SELECT clave, last_used FROM embedding_cache"))
+    assert used[cache.key("a")] > 0
+    assert used[cache.key("b")] == 0
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from services.embedding_matrix import EmbeddingMatrix, pack_embedding, unpack_embedding
+from services.sqlite_knowledge import SQLiteKnowledgeBase
+
+
+@pytest.fixture
+def kb(tmp_path):
+    kb = SQLiteKnowledgeBase(str(tmp_path / "kb.db"))
+    yield kb
+    kb.close()
+
+
+def _add(kb, n):
+    return [kb.add_document(f"Documento {i}", f"Contenido número {i} sobre contratos")
+            for i in range(n)]
+
+
+@pytest.mark.parametrize("dtype, tolerance", [("float32", 1e-6), ("int8", 1e-2)])
+def test_pack_round_trip_is_normalized(dtype, tolerance):
+    vector = np.array([3.0, -4.0, 0.5, 0.0], dtype=np.float32)
+    unpacked = unpack_embedding(pack_embedding(vector, dtype))
+    np.testing.assert_allclose(unpacked, vector / np.linalg.norm(vector), atol=tolerance)
+
+
+def test_unknown_dtype_and_blob_are_rejected():
+    with pytest.raises(ValueError):
+        pack_embedding([1.0, 0.0], "float16")
+    with pytest.raises(ValueError):
+        unpack_embedding(b"XXXX" + b"\0" * 8)
+
+
+def test_int8_matrix_stays_int8_and_ranks_like_float32():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(20, 16)).astype(np.float32)
+    rows_f32 = [(i, pack_embedding(v, "float32")) for i, v in enumerate(vectors)]
+    rows_i8 = [(i, pack_embedding(v, "int8")) for i, v in enumerate(vectors)]
+    exact = EmbeddingMatrix.from_blobs(rows_f32)
+    quantized = EmbeddingMatrix.from_blobs(rows_i8)
+    assert quantized.vectors.dtype == np.int8
+    assert quantized.scales is not None and quantized.nbytes < exact.nbytes
+
+    query = vectors[7]
+    assert quantized.search(query, top_k=1)[0][0] == 7
+    exact_scores = dict(exact.search(query, top_k=20))
+    for doc_id, score in quantized.search(query, top_k=20):
+        assert score == pytest.approx(exact_scores[doc_id], abs=2e-2)
+
+
+def test_mixed_formats_fall_back_to_float32():
+    rows = [(1, pack_embedding([1.0, 0.0, 0.0], "float32")),
+            (2, pack_embedding([0.0, 1.0, 0.0], "int8")),
+            (3, pack_embedding([1.0, 1.0], "float32"))]   # otra dimensión: se descarta
+    matrix = EmbeddingMatrix.from_blobs(rows)
+    assert matrix.scales is None and matrix.vectors.dtype == np.float32
+    assert list(matrix.ids) == [1, 2]
+    assert matrix.search([0.0, 1.0, 0.0], top_k=1)[0][0] == 2
+
+
+def test_query_with_wrong_dimension_is_rejected():
+    matrix = EmbeddingMatrix.from_blobs([(1, pack_embedding([1.0, 0.0]))])
+    with pytest.raises(ValueError):
+        matrix.search([1.0, 0.0, 0.0])
+
+
+def test_sidecar_is_ignored_once_stale(tmp_path):
+    base = str(tmp_path / "emb")
+    EmbeddingMatrix.from_blobs([(1, pack_embedding([1.0, 0.0]))], version=3).save(base)
+    loaded = EmbeddingMatrix.load(base, 3)
+    assert loaded is not None and list(loaded.ids) == [1]
+    assert isinstance(loaded.vectors, np.memmap)
+    assert EmbeddingMatrix.load(base, 4) is None
+
+
+def test_semantic_search_rebuilds_after_embeddings_change(kb):
+    ids = _add(kb, 3)
+    kb.set_embeddings([(ids[0], [1, 0, 0]), (ids[1], [0, 1, 0])], dtype="int8")
+    assert [r["id"] for r in kb.semantic_search([0, 1, 0], top_k=1)] == [ids[1]]
+    first = kb.load_embedding_matrix()
+
+    kb.set_embeddings([(ids[2], [0, 0, 1])], dtype="float32")
+    assert kb.embeddings_version() != first.version
+    assert [r["id"] for r in kb.semantic_search([0, 0, 1], top_k=1)] == [ids[2]]
+    assert len(kb.load_embedding_matrix()) == 3
+
+
+def test_sidecar_is_reused_by_a_new_instance(kb, tmp_path):
+    ids = _add(kb, 2)
+    kb.set_embeddings([(ids[0], [1, 0]), (ids[1], [0, 1])])
+    kb.load_embedding_matrix()
+
+    other = SQLiteKnowledgeBase(kb.db_path)
+    try:
+        matrix = other.load_embedding_matrix()
+        assert isinstance(matrix.vectors, np.memmap)
+        assert list(matrix.ids) == ids
+    finally:
+        other.close()
@@ -0,0 +1,56 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from services.embedding_model import EmbeddingModel
+
+
+class LengthEncoder:
+    """Modelo de prueba: embedding = [largo del texto, 1]."""
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def encode(self, texts, batch_size, convert_to_numpy):
+        self.calls.append(list(texts))
+        if self.fail:
+            raise RuntimeError("sin memoria")
+        return np.array([[len(t), 1.0] for t in texts])
+
+
+@pytest.fixture
+def model():
+    model = EmbeddingModel("test-model", max_batch=8, max_wait_ms=20)
+    yield model
+    model.close()
+
+
+def test_model_is_not_loaded_on_construction(model):
+    assert model.stats()["loaded"] is False
+
+
+def test_concurrent_queries_share_one_batch(model):
+    encoder = model._model = LengthEncoder()
+
+    async def scenario():
+        return await asyncio.gather(model.aencode(["a"]), model.aencode(["bb", "ccc"]), model.aencode([]))
+
+    single, pair, empty = asyncio.run(scenario())
+    assert encoder.calls == [["a", "bb", "ccc"]]
+    np.testing.assert_array_equal(single, [[1, 1]])
+    np.testing.assert_array_equal(pair, [[2, 1], [3, 1]])
+    assert empty.shape == (0, 0)
+    assert model.stats()["avg_batch_size"] == 3
+
+
+def test_encoder_errors_reach_every_caller(model):
+    model._model = LengthEncoder(fail=True)
+
+    async def scenario():
+        return await asyncio.gather(model.aencode(["a"]), model.aencode(["b"]), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert model.stats()["batches"] == 0
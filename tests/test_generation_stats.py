@@ -0,0 +1,48 @@
+import pytest
+
+from services.generation_stats import GenerationStats
+
+
+def test_sampled_requests_feed_the_estimate_but_save_nothing():
+    stats = GenerationStats(max_tokens=500, sample_rate=0.0)
+    entry = stats.record("r1", tokens=100, elapsed_s=1.0, capped=True, stopped=False, tail_tokens=60, tail_s=0.5)
+    assert entry["sampled"]
+    assert entry["tokens_saved"] is None
+    summary = stats.stats()
+    assert summary["samples"] == 1
+    assert summary["early_stopped"] == 0
+    assert summary["tokens_saved"] == 0
+    assert summary["latency_saved_ms"] == 0
+    assert summary["avg_tail_tokens"] == 60.0
+
+
+def test_stopped_requests_use_the_sample_average():
+    stats = GenerationStats(max_tokens=500, sample_rate=0.0)
+    stats.record("s1", 100, 1.0, capped=True, stopped=False, tail_tokens=40, tail_s=0.4)
+    stats.record("s2", 100, 1.0, capped=True, stopped=False, tail_tokens=80, tail_s=0.8)
+    entry = stats.record("r1", 90, 0.9, capped=True, stopped=True)
+    assert entry["tokens_saved"] == 60.0
+    assert entry["latency_saved_ms"] == pytest.approx(600.0)
+    assert entry["budget_tokens_saved"] == 410
+    summary = stats.stats()
+    assert summary["early_stopped"] == 1
+    assert summary["tokens_saved"] == 60
+    assert summary["requests"] == 3
+    assert summary["capped"] == 3
+
+
+def test_stop_without_samples_has_no_estimate():
+    stats = GenerationStats(max_tokens=500)
+    entry = stats.record("r1", 90, 0.9, capped=True, stopped=True)
+    assert entry["tokens_saved"] is None
+    assert entry["latency_saved_ms"] is None
+    assert stats.stats()["tokens_saved"] == 0
+
+
+def test_uncapped_requests_count_only_tokens():
+    stats = GenerationStats(max_tokens=500)
+    stats.record("r1", 50, 0.5, capped=False, stopped=False)
+    summary = stats.stats()
+    assert summary["capped"] == 0
+    assert summary["avg_tokens"] == 50.0
+    assert summary["samples"] == 0
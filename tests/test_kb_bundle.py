@@ -0,0 +1,58 @@
+import pytest
+
+from services.kb_bundle import KBBundle, write_bundle
+from services.kb_snapshot import KBSnapshot
+from services.sqlite_knowledge import OFFICIAL_DOC_PREFIX, SQLiteKnowledgeBase
+
+DOCUMENTOS = [
+    (f"{OFFICIAL_DOC_PREFIX} - Pagos",
+     "1. ¿Cómo se paga el lote? En cuotas mensuales sin intereses.\n"
+     "2. ¿Hay descuento por pago al contado? Sí, un descuento del diez por ciento.\n"
+     "3. ¿Qué pasa si me atraso? Se aplica una mora sobre la cuota vencida."),
+    ("Servicios del proyecto",
+     "1. ¿Hay agua y luz? Sí, agua potable y energía eléctrica en cada lote.\n"
+     "2. ¿Hay seguridad? Vigilancia las veinticuatro horas en la portería."),
+    ("Ubicación", "El proyecto queda en la costa, a dos horas de la ciudad, cerca de la playa."),
+]
+CONSULTAS = ["pago del lote en cuotas", "descuento contado", "agua potable", "playa", "lote", "inexistente"]
+
+
+@pytest.fixture
+def kb(tmp_path):
+    kb = SQLiteKnowledgeBase(db_path=str(tmp_path / "kb.db"))
+    for titulo, contenido in DOCUMENTOS:
+        doc_id = kb.add_document(titulo, contenido)
+        if contenido.startswith("1."):
+            kb.store_chunks(doc_id, contenido)
+    yield kb
+    kb.close()
+
+
+def _ids(results):
+    return [r["id"] for r in results]
+
+
+@pytest.mark.parametrize("query", CONSULTAS)
+def test_bundle_matches_snapshot(kb, tmp_path, query):
+    path = str(tmp_path / "kb.bundle")
+    write_bundle(path, kb)
+    bundle = KBBundle.open(path)
+    snapshot = KBSnapshot.build(kb)
+
+    assert bundle.version == snapshot.version
+    got, expected = bundle.search(query, top_k=4), snapshot.search(query, top_k=4)
+    assert _ids(got) == _ids(expected)
+    assert [r["score"] for r in got] == pytest.approx([r["score"] for r in expected])
+    for doc_id in snapshot.documents:
+        assert bundle.documents[doc_id] == snapshot.documents[doc_id]
+        got_chunks, expected_chunks = bundle.scored_chunks(doc_id, query), snapshot.scored_chunks(doc_id, query)
+        assert [texto for texto, _ in got_chunks] == [texto for texto, _ in expected_chunks]
+        assert [score for _, score in got_chunks] == pytest.approx([score for _, score in expected_chunks])
+    assert [d["id"] for d in bundle.official_documents()] == [d["id"] for d in snapshot.official_documents()]
+
+
+def test_bundle_rejects_other_files(tmp_path):
+    path = tmp_path / "otro.bin"
+    path.write_bytes(b"no es un bundle" * 10)
+    with pytest.raises(ValueError):
+        KBBundle.open(str(path))
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from services.async_knowledge import AsyncKnowledgeBase
+from services.kb_snapshot import KBSnapshot, KBSnapshotManager
+from services.sqlite_knowledge import OFFICIAL_DOC_PREFIX, SQLiteKnowledgeBase
+
+DOCUMENTOS = [
+    (f"{OFFICIAL_DOC_PREFIX} - Pagos",
+     "1. ¿Cómo se paga el lote? En cuotas mensuales sin intereses.\n"
+     "2. ¿Hay descuento por pago al contado? Sí, un descuento del diez por ciento.\n"
+     "3. ¿Qué pasa si me atraso? Se aplica una mora sobre la cuota vencida."),
+    ("Servicios del proyecto",
+     "1. ¿Hay agua y luz? Sí, el proyecto cuenta con agua potable y energía eléctrica.\n"
+     "2. ¿Hay seguridad? Vigilancia las veinticuatro horas en la portería."),
+    ("Ubicación", "El proyecto queda en la costa, a dos horas de la ciudad, cerca de la playa."),
+    ("Contrato", "La compraventa del lote se firma ante notario y la posesión se entrega al firmar."),
+]
+CONSULTAS = ["pago del lote en cuotas", "descuento contado", "agua potable energía",
+             "playa costa", "notario posesión", "lote", "palabrainexistente"]
+
+
+def _kb(tmp_path, backend):
+    kb = SQLiteKnowledgeBase(db_path=str(tmp_path / f"{backend}.db"), search_backend=backend)
+    for titulo, contenido in DOCUMENTOS:
+        doc_id = kb.add_document(titulo, contenido)
+        if contenido.startswith("1."):
+            kb.store_chunks(doc_id, contenido)
+    return kb
+
+
+@pytest.fixture
+def fts_kb(tmp_path):
+    kb = _kb(tmp_path, "fts5")
+    yield kb
+    kb.close()
+
+
+@pytest.fixture
+def memory_kb(tmp_path):
+    kb = _kb(tmp_path, "memory")
+    yield kb
+    kb.close()
+
+
+def _ids(results):
+    return [r["id"] for r in results]
+
+
+@pytest.mark.parametrize("query", CONSULTAS)
+def test_snapshot_matches_memory_backend(memory_kb, query):
+    snapshot = KBSnapshot.build(memory_kb)
+    expected = memory_kb.search(query, top_k=4)
+    got = snapshot.search(query, top_k=4)
+    assert _ids(got) == _ids(expected)
+    assert [r["score"] for r in got] == pytest.approx([r["score"] for r in expected])
+    assert [r["snippet"] for r in got] == [r["snippet"] for r in expected]
+
+
+@pytest.mark.parametrize("query", CONSULTAS)
+def test_snapshot_matches_fts_documents(fts_kb, query):
+    # FTS5 pondera el título distinto: se compara el conjunto de documentos y el mejor
+    snapshot = KBSnapshot.build(fts_kb)
+    expected = fts_kb.search(query, top_k=len(DOCUMENTOS))
+    got = snapshot.search(query, top_k=len(DOCUMENTOS))
+    assert set(_ids(got)) == set(_ids(expected))
+    if len(expected) and query != "lote":
+        assert got[0]["id"] == expected[0]["id"]
+
+
+def test_snapshot_chunks_follow_document_order(fts_kb):
+    snapshot = KBSnapshot.build(fts_kb)
+    (official,) = snapshot.official_documents()
+    scored = snapshot.scored_chunks(official["id"], "descuento contado")
+    assert [texto[:2] for texto, _ in scored] == ["1.", "2.", "3."]
+    assert max(scored, key=lambda item: item[1])[0].startswith("2.")
+    assert fts_kb.scored_chunks(official["id"], "descuento")[1][1] > 0
+
+
+def test_manager_reloads_only_when_version_changes(fts_kb):
+    akb = AsyncKnowledgeBase(kb=fts_kb, max_workers=1)
+    manager = KBSnapshotManager(akb, poll_interval=0)
+
+    async def scenario():
+        first = await manager.reload()
+        assert await manager.reload(force=False) is first
+        fts_kb.add_document("Mascotas", "Se permiten mascotas dentro del condominio.")
+        second = await manager.reload(force=False)
+        assert second is not first and second.version > first.version
+        # La foto anterior no cambia: las requests en curso siguen viéndola igual
+        assert not first.search("mascotas condominio")
+        assert second.search("mascotas condominio")[0]["titulo"] == "Mascotas"
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        akb.shutdown()
+    assert manager.metrics()["reloads"] == 2
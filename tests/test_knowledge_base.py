@@ -0,0 +1,79 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+pytest.importorskip("motor")
+
+from services.knowledge_base import KnowledgeBaseService  # noqa: E402
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    def sort(self, field, direction):
+        return _Cursor(sorted(self._docs, key=lambda doc: doc[field], reverse=direction < 0))
+
+    def __aiter__(self):
+        self._iter = iter(self._docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _Collection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query):
+        return _Cursor([doc for doc in self.docs if doc.get("embedding")])
+
+
+class _Database:
+    def __init__(self, docs):
+        self.knowledge = _Collection(docs)
+
+
+def _doc(doc_id, title, embedding):
+    return {"_id": doc_id, "title": title, "content": title.lower(), "embedding": embedding}
+
+
+@pytest.fixture
+def service(tmp_path):
+    docs = [_doc(f"{i:03d}", f"Doc {i}", [float(i == j) for j in range(4)]) for i in range(4)]
+    docs.append(_doc("900", "Otra dimensión", [1.0, 0.0]))
+    docs.append(_doc("901", "Sin embedding", []))
+    service = KnowledgeBaseService(_Database(docs), embedding_cache_path=str(tmp_path / "emb.db"))
+    yield service
+    service.model.close()
+    service.embedding_cache.close()
+
+
+def test_search_ranks_by_cosine_over_every_document(service):
+    results = asyncio.run(service._cosine_similarity_search([0.1, 0.0, 3.0, 0.0], limit=2, min_score=0.0))
+    assert [r["title"] for r in results] == ["Doc 2", "Doc 0"]
+    assert results[0]["score"] == pytest.approx(3.0 / np.hypot(0.1, 3.0))
+    assert service._matrix_count == 4
+
+
+def test_min_score_cuts_the_results(service):
+    results = asyncio.run(service._cosine_similarity_search([0.0, 1.0, 0.0, 0.0], limit=3, min_score=0.5))
+    assert [r["title"] for r in results] == ["Doc 1"]
+
+
+def test_appended_rows_grow_the_matrix(service):
+    async def scenario():
+        await service._ensure_matrix()
+        for i in range(20):
+            assert service._append_to_matrix([0.0, 0.0, 0.0, 1.0 + i], _doc(f"1{i:02d}", f"Nuevo {i}", [])) == 4 + i
+        assert service._append_to_matrix([1.0, 0.0], _doc("999", "Mala dimensión", [])) is None
+        return await service._cosine_similarity_search([0.0, 0.0, 0.0, 1.0], limit=30, min_score=0.99)
+
+    results = asyncio.run(scenario())
+    assert service._matrix_count == 24 and service._matrix.shape[0] >= 24
+    assert len(results) == 21
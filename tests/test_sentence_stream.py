@@ -0,0 +1,57 @@
+import random
+
+from services.sentence_stream import MIN_SENTENCE_CHARS, SENTENCE_BOUNDARY_RE, SentenceAccumulator
+
+ANSWER = (
+    "La posesión legítima se acredita con la constancia notarial. Sí. "
+    "El saneamiento incluye el título individual!  ¿Cuándo se entrega el título? "
+    "Entre tres y seis meses después del último pago. 1. Los documentos se presentan en la oficina. "
+    "Todo queda respaldado con actas notariales. Cualquier duda consultá con el equipo legal"
+)
+
+
+def _batch(text, max_sentences=5):
+    """Corte del texto completo de una vez: la referencia del acumulador."""
+    parts = [p.strip() for p in SENTENCE_BOUNDARY_RE.split(text)]
+    return [p for p in parts if len(p) > MIN_SENTENCE_CHARS][:max_sentences]
+
+
+def _stream(text, cuts, max_sentences=5):
+    acc = SentenceAccumulator(max_sentences=max_sentences)
+    emitted = []
+    start = 0
+    for cut in cuts + [len(text)]:
+        emitted += acc.feed(text[start:cut])
+        start = cut
+    emitted += acc.finish()
+    return acc, emitted
+
+
+def test_matches_batch_split_for_any_chunking():
+    rng = random.Random(0)
+    for _ in range(300):
+        cuts = sorted(rng.sample(range(1, len(ANSWER)), rng.randint(0, 40)))
+        for max_sentences in (1, 3, 5, 20):
+            acc, emitted = _stream(ANSWER, cuts, max_sentences)
+            assert emitted == _batch(ANSWER, max_sentences)
+            assert acc.sentences == emitted
+
+
+def test_cap_offset_marks_end_of_last_accepted_sentence():
+    acc, emitted = _stream(ANSWER, list(range(1, len(ANSWER))), max_sentences=2)
+    assert acc.full
+    assert ANSWER[:acc.forwardable()].endswith(emitted[-1])
+    # Después del tope no se acepta nada más
+    assert acc.feed(" Otra oración bastante larga. ") == []
+
+
+def test_forwardable_is_everything_until_full():
+    acc = SentenceAccumulator(max_sentences=5)
+    acc.feed("Primera oración completa. Segunda sin ")
+    assert acc.forwardable() == len("Primera oración completa. Segunda sin ")
+
+
+def test_text_ends_with_punctuation():
+    acc, _ = _stream("Cualquier duda consultá con el equipo legal", [])
+    assert acc.text == "Cualquier duda consultá con el equipo legal."
+    assert SentenceAccumulator().text == ""
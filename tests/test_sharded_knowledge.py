@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+import pytest
+
+from services.sharded_knowledge import ShardedKnowledgeBase
+
+POSESION = "La posesión legítima del lote se acredita con la constancia notarial y los pagos al día."
+
+
+@pytest.fixture
+def sharded(tmp_path):
+    sharded = ShardedKnowledgeBase.open(
+        {"lomas": str(tmp_path / "lomas.db"), "lomas/contratos": str(tmp_path / "contratos.db")},
+        default="lomas",
+    )
+    for name in sharded.names:
+        sharded.shard(name).add_document(f"Posesión ({name})", POSESION, chunked=True)
+    yield sharded
+    sharded.close()
+
+
+def _search(sharded, **kwargs):
+    return asyncio.run(sharded.asearch("posesion legitima", top_k=5, shards=["lomas", "lomas/contratos"], **kwargs))
+
+
+def test_fan_out_merges_all_shards(sharded):
+    assert {r["shard"] for r in _search(sharded)} == {"lomas", "lomas/contratos"}
+
+
+def test_failing_shard_is_dropped(sharded, monkeypatch):
+    def broken(query, top_k):
+        raise RuntimeError("database disk image is malformed")
+
+    monkeypatch.setattr(sharded.shard("lomas/contratos"), "search", broken)
+    assert {r["shard"] for r in _search(sharded)} == {"lomas"}
+    assert sharded.stats()["dropped_shards"] == 1
+
+
+def test_slow_shard_is_dropped_after_timeout(sharded, monkeypatch):
+    search = sharded.shard("lomas").search
+
+    def slow(query, top_k):
+        time.sleep(0.5)
+        return search(query, top_k)
+
+    monkeypatch.setattr(sharded.shard("lomas"), "search", slow)
+    started = time.perf_counter()
+    assert {r["shard"] for r in _search(sharded, timeout=0.1)} == {"lomas/contratos"}
+    assert time.perf_counter() - started < 0.4
+
+
+def test_all_shards_failing_raises(sharded, monkeypatch):
+    def broken(query, top_k):
+        raise RuntimeError("down")
+
+    for name in sharded.names:
+        monkeypatch.setattr(sharded.shard(name), "search", broken)
+    with pytest.raises(RuntimeError):
+        _search(sharded)
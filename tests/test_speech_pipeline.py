@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+
+from services.speech_pipeline import SpeechInterrupted, SpeechPipeline
+
+
+async def _sentences(items, delay=0.0, closed=None):
+    try:
+        for item in items:
+            await asyncio.sleep(delay)
+            yield item
+    finally:
+        if closed is not None:
+            closed.append(True)
+
+
+def test_delivers_in_order_even_if_tts_finishes_out_of_order():
+    delivered = []
+
+    async def synthesize(sentence):
+        # La primera tarda más que las siguientes
+        await asyncio.sleep(0.05 if sentence == "uno" else 0.0)
+        return sentence.upper()
+
+    async def deliver(index, audio):
+        delivered.append((index, audio))
+
+    pipeline = SpeechPipeline(synthesize, deliver, max_tts_concurrency=3)
+    assert asyncio.run(pipeline.run(_sentences(["uno", "dos", "tres"]))) == ["UNO", "DOS", "TRES"]
+    assert delivered == [(0, "UNO"), (1, "DOS"), (2, "TRES")]
+    assert pipeline.report()["first_avatar_ms"] is not None
+
+
+def test_back_pressure_stops_reading_the_llm():
+    read = []
+
+    async def source():
+        for i in range(10):
+            read.append(i)
+            yield f"oración {i}"
+
+    async def synthesize(sentence):
+        return sentence
+
+    async def deliver(index, audio):
+        await asyncio.sleep(0.01)
+
+    async def scenario():
+        pipeline = SpeechPipeline(synthesize, deliver, max_pending=2)
+        task = asyncio.ensure_future(pipeline.run(source()))
+        await asyncio.sleep(0.005)
+        # Una entregándose + max_pending en cola + la que espera lugar
+        assert len(read) <= 4
+        await task
+
+    asyncio.run(scenario())
+    assert len(read) == 10
+
+
+def test_cancel_mid_run_stops_tts_and_source():
+    closed, synthesized = [], []
+
+    async def synthesize(sentence):
+        await asyncio.sleep(0.01)
+        synthesized.append(sentence)
+        return sentence
+
+    async def deliver(index, audio):
+        await asyncio.sleep(0.02)
+
+    async def scenario():
+        pipeline = SpeechPipeline(synthesize, deliver)
+        task = asyncio.ensure_future(pipeline.run(_sentences([f"s{i}" for i in range(20)], 0.005, closed)))
+        await asyncio.sleep(0.06)
+        assert pipeline.cancel()
+        with pytest.raises(SpeechInterrupted):
+            await task
+        return pipeline
+
+    pipeline = asyncio.run(scenario())
+    assert pipeline.interrupted
+    assert closed == [True]
+    assert 0 < len(pipeline.results) < 20
+    assert len(synthesized) < 20
+    assert pipeline.report()["interrupted"]
+
+
+def test_cancel_before_run_skips_the_turn():
+    closed = []
+
+    async def synthesize(sentence):
+        raise AssertionError("no debería sintetizar")
+
+    async def deliver(index, audio):
+        raise AssertionError("no debería entregar")
+
+    async def scenario():
+        pipeline = SpeechPipeline(synthesize, deliver)
+        # /liveavatar/interrupt mientras el turno todavía busca en la KB
+        assert pipeline.cancel()
+        source = _sentences(["uno"], closed=closed)
+        await source.__anext__()   # generador ya iniciado: aclose() ejecuta su finally
+        with pytest.raises(SpeechInterrupted):
+            await pipeline.run(source)
+        return pipeline
+
+    pipeline = asyncio.run(scenario())
+    assert closed == [True]
+    assert pipeline.results == []
+    assert pipeline.report()["total_ms"] is not None
+
+
+def test_cancel_after_finish_returns_false():
+    async def synthesize(sentence):
+        return sentence
+
+    async def deliver(index, audio):
+        pass
+
+    async def scenario():
+        pipeline = SpeechPipeline(synthesize, deliver)
+        await pipeline.run(_sentences(["uno"]))
+        return pipeline.cancel()
+
+    assert asyncio.run(scenario()) is False
+
+
+def test_tts_error_propagates():
+    async def synthesize(sentence):
+        raise RuntimeError("tts down")
+
+    async def deliver(index, audio):
+        pass
+
+    with pytest.raises(RuntimeError, match="tts down"):
+        asyncio.run(SpeechPipeline(synthesize, deliver).run(_sentences(["uno", "dos"])))
@@ -0,0 +1,68 @@
+import sqlite3
+import threading
+
+import pytest
+
+from services.sqlite_knowledge import SQLiteKnowledgeBase
+
+
+@pytest.fixture
+def kb(tmp_path):
+    kb = SQLiteKnowledgeBase(db_path=str(tmp_path / "kb.db"))
+    yield kb
+    kb.close()
+
+
+def _count(kb):
+    return kb._reader().execute("SELECT COUNT(*) FROM conocimiento_legal").fetchone()[0]
+
+
+def test_database_uses_wal(kb):
+    assert kb._reader().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_one_persistent_reader_per_thread(kb):
+    main = kb._reader()
+    assert kb._reader() is main
+    other = []
+    thread = threading.Thread(target=lambda: other.append(kb._reader()))
+    thread.start()
+    thread.join()
+    assert other[0] is not main
+    assert len(kb._readers) == 2
+
+
+def test_readers_are_read_only(kb):
+    with pytest.raises(sqlite3.OperationalError):
+        kb._reader().execute("DELETE FROM conocimiento_legal")
+
+
+def test_failed_write_rolls_back(kb):
+    with pytest.raises(RuntimeError):
+        with kb.write_transaction() as cursor:
+            cursor.execute("INSERT INTO conocimiento_legal (titulo, contenido) VALUES ('a', 'b')")
+            raise RuntimeError("fallo a mitad de la transacción")
+    assert _count(kb) == 0
+    kb.add_document("Pagos", "Cuotas mensuales.")
+    assert _count(kb) == 1
+
+
+def test_readers_see_committed_state_during_a_write(kb):
+    kb.add_document("Pagos", "Cuotas mensuales.")
+    with kb.write_transaction() as cursor:
+        cursor.execute("INSERT INTO conocimiento_legal (titulo, contenido) VALUES ('a', 'b')")
+        assert _count(kb) == 1
+    assert _count(kb) == 2
+
+
+def test_connections_are_reopened_after_fork(kb):
+    parent_reader, parent_writer = kb._reader(), kb._writer
+    kb._pid -= 1   # simula el proceso hijo de un fork
+    child_reader = kb._reader()
+    assert child_reader is not parent_reader
+    assert kb._readers == [child_reader]
+    kb.add_document("Pagos", "Cuotas mensuales.")
+    assert _count(kb) == 1
+    assert kb._writer is not parent_writer
+    parent_reader.close()
+    parent_writer.close()
@@ -0,0 +1,91 @@
+import pytest
+
+from services.dedup import DedupReport
+from services.sqlite_knowledge import SQLiteKnowledgeBase
+
+LOTE = ("El precio del lote en Prados de Paraíso se paga en cuotas mensuales durante "
+        "el plazo pactado en el contrato de compraventa, con la posesión desde la firma.")
+
+
+@pytest.fixture
+def kb(tmp_path):
+    kb = SQLiteKnowledgeBase(db_path=str(tmp_path / "kb.db"))
+    yield kb
+    kb.close()
+
+
+def _count(kb):
+    return kb._reader().execute("SELECT COUNT(*) FROM conocimiento_legal").fetchone()[0]
+
+
+def test_add_document_skips_exact_duplicate(kb):
+    before = _count(kb)
+    first = kb.add_document("Pago del lote", LOTE)
+    again = kb.add_document("Pago del lote (copia)", "  " + LOTE.upper() + "  ")
+    assert again == first
+    assert _count(kb) == before + 1
+
+
+def test_near_duplicate_is_inserted_and_reported_by_default(kb):
+    long_text = " ".join(f"clausula{i} del contrato" for i in range(200))
+    [first] = kb.add_documents([{"titulo": "Contrato", "contenido": long_text}])
+    # Una cláusula distinta es un cambio sustancial: se inserta y solo se informa
+    revised = long_text.replace("clausula199 del contrato", "clausula199 del anexo")
+    report = DedupReport()
+    [revised_id] = kb.add_documents([{"titulo": "Contrato (rev)", "contenido": revised}], report=report)
+    assert revised_id != first
+    assert report.inserted == 1
+    assert [(titulo, doc_id) for titulo, doc_id, _ in report.similar] == [("Contrato (rev)", first)]
+    assert report.near == []
+
+
+def test_near_duplicates_opt_in_skips_them(kb):
+    long_text = " ".join(f"clausula{i} del contrato" for i in range(200))
+    first = kb.add_document("Contrato", long_text)
+    revised = long_text.replace("clausula199 del contrato", "clausula199 del anexo")
+    assert kb.add_document("Contrato (rev)", revised, near_duplicates=True) == first
+
+
+def test_add_document_keep_inserts_duplicate(kb):
+    first = kb.add_document("Pago del lote", LOTE)
+    assert kb.add_document("Pago del lote", LOTE, on_duplicate="keep") != first
+
+
+def test_dedup_state_reused_until_version_changes(kb, tmp_path):
+    kb.add_document("Pago del lote", LOTE)
+    state = kb._dedup
+    kb.add_document("Otro", "Los títulos de propiedad se entregan una vez completado el pago total del lote.")
+    assert kb._dedup is state
+    assert state.version == kb.kb_version()
+
+    # Otro proceso (otra instancia sobre el mismo archivo) agrega un documento
+    other = SQLiteKnowledgeBase(db_path=str(tmp_path / "kb.db"))
+    try:
+        [other_id] = other.add_documents([{"titulo": "Ajeno", "contenido": "Documento cargado por otro worker " * 5}],
+                                         on_duplicate="keep")
+    finally:
+        other.close()
+
+    report = DedupReport()
+    assert kb.add_documents([{"titulo": "Ajeno", "contenido": "Documento cargado por otro worker " * 5}],
+                            report=report) == [other_id]
+    assert kb._dedup is not state
+    assert report.exact == [("Ajeno", other_id)]
+
+
+def test_failed_batch_discards_dedup_state(kb, monkeypatch):
+    kb.add_document("Pago del lote", LOTE)
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(kb, "_merge_metadata", broken)
+    with pytest.raises(RuntimeError):
+        kb.add_documents([{"titulo": "Nuevo", "contenido": "Contenido nuevo sobre el saneamiento legal " * 3},
+                          {"titulo": "Pago", "contenido": LOTE}], on_duplicate="merge")
+    assert kb._dedup is None
+    monkeypatch.undo()
+    # El documento del lote fallido no quedó registrado como existente
+    before = _count(kb)
+    kb.add_document("Nuevo", "Contenido nuevo sobre el saneamiento legal " * 3)
+    assert _count(kb) == before + 1
@@ -0,0 +1,71 @@
+import pytest
+
+from services.sqlite_knowledge import SQLiteKnowledgeBase
+
+
+@pytest.fixture
+def kb(tmp_path):
+    kb = SQLiteKnowledgeBase(db_path=str(tmp_path / "kb.db"))
+    yield kb
+    kb.close()
+
+
+def _add(kb, n, length=50):
+    return [kb.add_document(f"Documento {i}", f"doc{i} " + "x" * length, {"n": i}) for i in range(n)]
+
+
+def test_keyset_pages_cover_every_document_once(kb):
+    ids = _add(kb, 7)
+    seen, after_id, pages = [], 0, 0
+    while after_id is not None:
+        documents, after_id = kb.list_documents(after_id=after_id, limit=3)
+        seen.extend(doc["id"] for doc in documents)
+        pages += 1
+    assert seen == ids
+    assert pages == 3
+
+
+def test_exact_last_page_has_no_next_cursor(kb):
+    ids = _add(kb, 4)
+    documents, next_after_id = kb.list_documents(limit=2)
+    assert next_after_id == ids[1]
+    documents, next_after_id = kb.list_documents(after_id=next_after_id, limit=2)
+    assert [doc["id"] for doc in documents] == ids[2:]
+    assert next_after_id is None
+
+
+def test_paging_is_stable_when_earlier_rows_are_deleted(kb):
+    ids = _add(kb, 6)
+    _, next_after_id = kb.list_documents(limit=3)
+    with kb.write_transaction() as cursor:
+        cursor.execute("DELETE FROM conocimiento_legal WHERE id IN (?, ?)", (ids[0], ids[1]))
+    documents, _ = kb.list_documents(after_id=next_after_id, limit=3)
+    assert [doc["id"] for doc in documents] == ids[3:]
+
+
+def test_preview_is_trimmed_in_sql(kb):
+    (doc_id,) = _add(kb, 1, length=500)
+    (preview,), _ = kb.list_documents(preview_chars=20)
+    assert preview["contenido"] == ("doc0 " + "x" * 15) + "..."
+    assert preview["metadata"] == {"n": 0}
+    (full,), _ = kb.list_documents(preview_chars=None)
+    assert len(full["contenido"]) == 505
+    assert kb.get_document(doc_id)["contenido"] == full["contenido"]
+
+
+def test_short_content_is_not_marked_as_trimmed(kb):
+    kb.add_document("Corto", "breve")
+    (doc,), _ = kb.list_documents(preview_chars=200)
+    assert doc["contenido"] == "breve"
+
+
+def test_get_document_missing_id(kb):
+    ids = _add(kb, 2)
+    kb.clear_database()
+    assert kb.get_document(ids[0]) is None
+
+
+def test_iter_documents_walks_all_pages(kb):
+    ids = _add(kb, 5)
+    assert [doc["id"] for doc in kb.iter_documents(page_size=2)] == ids
+    assert [doc["id"] for doc in kb.iter_documents(after_id=ids[2], page_size=2)] == ids[3:]
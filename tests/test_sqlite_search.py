@@ -0,0 +1,58 @@
+import pytest
+
+from services.sqlite_knowledge import SQLiteKnowledgeBase
+
+
+@pytest.fixture
+def kb(tmp_path):
+    kb = SQLiteKnowledgeBase(db_path=str(tmp_path / "kb.db"))
+    yield kb
+    kb.close()
+
+
+def _ids(results):
+    return [r["id"] for r in results]
+
+
+def test_title_outweighs_content(kb):
+    in_content = kb.add_document("Preguntas generales", "La posesión del lote se entrega al firmar.")
+    in_title = kb.add_document("Posesión", "Se entrega al firmar el contrato.")
+    assert _ids(kb.search("posesión", top_k=2)) == [in_title, in_content]
+
+
+def test_accents_and_prefixes_match(kb):
+    doc_id = kb.add_document("Entrega", "Las posesiones se entregan con acta.")
+    assert _ids(kb.search("POSESION")) == [doc_id]
+
+
+def test_query_syntax_is_escaped(kb):
+    doc_id = kb.add_document("Pagos", "Cuotas mensuales del lote.")
+    for query in ['cuotas"', "cuotas AND OR NOT", "lote*)(", "NEAR(cuotas lote)"]:
+        assert _ids(kb.search(query)) == [doc_id]
+    assert kb.search("?!") == []
+
+
+def test_index_follows_updates_and_deletes(kb):
+    doc_id = kb.add_document("Pagos", "Cuotas mensuales del lote.")
+    with kb.write_transaction() as cursor:
+        cursor.execute("UPDATE conocimiento_legal SET contenido = ? WHERE id = ?",
+                       ("Pago al contado con descuento.", doc_id))
+    assert kb.search("cuotas") == []
+    assert _ids(kb.search("contado")) == [doc_id]
+    with kb.write_transaction() as cursor:
+        cursor.execute("DELETE FROM conocimiento_legal WHERE id = ?", (doc_id,))
+    assert kb.search("contado") == []
+
+
+def test_snippet_is_an_excerpt(kb):
+    kb.add_document("Largo", "relleno " * 300 + "escritura pública ante notario " + "relleno " * 300)
+    (result,) = kb.search("notario")
+    assert "notario" in result["snippet"]
+    assert len(result["snippet"]) < 1000
+
+
+def test_scan_fallback_finds_the_same_document(kb):
+    doc_id = kb.add_document("Servicios", "Agua potable y energía eléctrica.")
+    kb.add_document("Ubicación", "Cerca de la playa.")
+    kb._fts_enabled = False
+    assert _ids(kb.search("energia electrica", top_k=1)) == [doc_id]
@@ -0,0 +1,85 @@
+import pytest
+
+from services.sqlite_knowledge import SQLiteKnowledgeBase
+
+SOURCE = "mongodb:test.conocimiento"
+
+
+@pytest.fixture
+def kb(tmp_path):
+    kb = SQLiteKnowledgeBase(db_path=str(tmp_path / "kb.db"))
+    yield kb
+    kb.close()
+
+
+def _docs(start, end):
+    return [{"fuente_id": f"{i:04d}", "titulo": f"Documento {i}",
+             "contenido": f"Contenido del documento número {i}", "metadata": {"n": i}}
+            for i in range(start, end)]
+
+
+def _migrate(kb, docs, batch_size=3, fail_after=None):
+    """Mismo bucle que migrate_to_sqlite: retoma desde el checkpoint y copia por lotes."""
+    last_id, _ = kb.begin_staging(SOURCE)
+    pending = [doc for doc in docs if last_id is None or doc["fuente_id"] > last_id]
+    for batches, start in enumerate(range(0, len(pending), batch_size)):
+        if fail_after is not None and batches == fail_after:
+            raise RuntimeError("conexión perdida")
+        batch = pending[start:start + batch_size]
+        kb.stage_documents(SOURCE, batch, batch[-1]["fuente_id"])
+    return kb.swap_in_staging(SOURCE)
+
+
+def _titles(kb):
+    return [doc["titulo"] for doc in kb.iter_documents()]
+
+
+def test_interrupted_migration_resumes_from_checkpoint(kb):
+    kb.add_document("Viejo", "Documento anterior a la migración")
+    docs = _docs(0, 8)
+    with pytest.raises(RuntimeError):
+        _migrate(kb, docs, fail_after=2)
+
+    # La base activa no cambia hasta el swap
+    assert _titles(kb) == ["Viejo"]
+    assert kb.begin_staging(SOURCE) == ("0005", 6)
+
+    staged = []
+    original = kb.stage_documents
+
+    def spy(source, documents, last_source_id):
+        staged.extend(doc["fuente_id"] for doc in documents)
+        return original(source, documents, last_source_id)
+
+    kb.stage_documents = spy
+    assert _migrate(kb, docs) == 8
+    assert staged == ["0006", "0007"]
+    assert _titles(kb) == [f"Documento {i}" for i in range(8)]
+    assert kb.search("Contenido documento número 3")
+
+
+def test_swap_clears_staging_and_checkpoint(kb):
+    _migrate(kb, _docs(0, 4))
+    assert kb.begin_staging(SOURCE) == (None, 0)
+
+
+def test_restart_discards_previous_run(kb):
+    with pytest.raises(RuntimeError):
+        _migrate(kb, _docs(0, 6), fail_after=1)
+    assert kb.begin_staging(SOURCE, restart=True) == (None, 0)
+
+
+def test_exact_duplicates_enter_once(kb):
+    docs = _docs(0, 3)
+    docs.append(dict(docs[0], fuente_id="0099", titulo="Copia"))
+    assert _migrate(kb, docs) == 3
+    assert "Copia" not in _titles(kb)
+
+
+def test_restaging_a_batch_is_idempotent(kb):
+    kb.begin_staging(SOURCE)
+    docs = _docs(0, 3)
+    kb.stage_documents(SOURCE, docs, "0002")
+    kb.stage_documents(SOURCE, docs, "0002")
+    _, staged = kb.begin_staging(SOURCE)
+    assert staged == 3
@@ -0,0 +1,84 @@
+import pytest
+
+from services.token_budget import SEPARATOR_TOKENS, ContextBudget, ContextPiece, TokenCounter
+
+PROMPT = "Sos Valeria, asistente legal de Prados de Paraíso."
+QUESTION = "¿Qué es la posesión legítima?"
+
+
+@pytest.fixture(scope="module")
+def counter():
+    return TokenCounter("gpt-4o-mini")
+
+
+def _piece(doc, text, score, position=0, header=None):
+    return ContextPiece(doc, header or f"DOC {doc}:", text, score, position)
+
+
+def _context_tokens(counter, context):
+    return counter.count(context, cache=False)
+
+
+def _budget(counter, context_tokens, share=0.7):
+    fixed = counter.count(PROMPT) + counter.count(QUESTION)
+    return ContextBudget(counter, prompt_tokens=fixed + context_tokens, official_share=share)
+
+
+def test_fill_respects_budget(counter):
+    official = [_piece("a", f"Chunk oficial {i} sobre la posesión y sus requisitos legales.", 1.0, i)
+                for i in range(40)]
+    extra = [_piece(f"x{i}", f"Extracto adicional {i} sobre pagos y cuotas.", 0.5) for i in range(20)]
+    budget = _budget(counter, 200)
+    context = budget.build(PROMPT, QUESTION, official, extra)
+    assert context
+    assert _context_tokens(counter, context) <= 200 + 5   # tolerancia por uniones entre bloques
+    assert budget.stats()["dropped_pieces"] > 0
+
+
+def test_most_relevant_per_token_wins(counter):
+    relevant = _piece("a", "La posesión legítima se acredita con constancia notarial.", 5.0, 3)
+    filler = [_piece("a", f"Texto de relleno número {i} sin relación con la pregunta.", 0.1, i) for i in range(3)]
+    cost = (counter.count(relevant.text) + counter.count(relevant.header) + 2 * SEPARATOR_TOKENS)
+    context = _budget(counter, cost, share=1.0).build(PROMPT, QUESTION, filler + [relevant], [])
+    assert context == f"{relevant.header}\n{relevant.text}"
+
+
+def test_pieces_render_in_document_order_under_one_header(counter):
+    pieces = [_piece("a", f"Bloque {i} del documento oficial.", score, i)
+              for i, score in enumerate([0.1, 3.0, 2.0])]
+    context = _budget(counter, 1000).build(PROMPT, QUESTION, pieces, [])
+    assert context == "DOC a:\nBloque 0 del documento oficial.\n\nBloque 1 del documento oficial.\n\n" \
+                      "Bloque 2 del documento oficial."
+
+
+def test_unused_share_goes_to_the_other_section(counter):
+    official = [_piece("a", "Único chunk oficial corto.", 1.0)]
+    extra = [_piece(f"x{i}", f"Extracto adicional {i} con bastante texto para ocupar lugar.", 1.0) for i in range(6)]
+    total = sum(counter.count(p.text) + counter.count(p.header) + 2 * SEPARATOR_TOKENS for p in official + extra)
+    # Con 90% reservado a oficiales que casi no ocupan, los adicionales entran todos
+    context = _budget(counter, total, share=0.9).build(PROMPT, QUESTION, official, extra)
+    assert all(p.text in context for p in official + extra)
+    assert context.startswith("DOC a:")
+
+
+def test_nothing_fits_returns_empty(counter):
+    budget = ContextBudget(counter, prompt_tokens=1)
+    assert budget.build(PROMPT, QUESTION, [_piece("a", "texto", 1.0)], []) == ""
+
+
+def test_counter_caches_counts():
+    local = TokenCounter("gpt-4o-mini", max_items=2)
+    for text in ("uno dos", "uno dos", "tres", "cuatro"):
+        local.count(text)
+    stats = local.stats()
+    assert stats["hits"] == 1
+    assert stats["cached"] == 2
+    assert local.count("", cache=True) == 0
+
+
+def test_record_does_not_cache_per_request_prompts():
+    local = TokenCounter("gpt-4o-mini")
+    budget = ContextBudget(local, prompt_tokens=100)
+    entry = budget.record("r1", PROMPT + " contexto único de esta request", QUESTION, cached_context=False)
+    assert entry["prompt_tokens"] > 0
+    assert local.stats()["cached"] == 0